@@ -1,8 +1,14 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flights.google_flight_scraper import get_flight_url, scrape_flights
 from flights.hotels import BrightDataAPI
+from util.tracing import TRACE_HEADER, new_trace_id, set_trace_id, span
+from util.cancellation import CancellationToken, TaskCancelled
 import requests
 import asyncio
+import json
+import math
+import os
+import time
 import uuid
 import threading
 from enum import Enum
@@ -15,12 +21,30 @@ app = Flask(__name__)
 task_results = defaultdict(dict)
 # Lock for thread-safe operations on task_results
 task_lock = threading.Lock()
+# Signalled whenever a task publishes an event, so streams wake up immediately
+task_events = threading.Condition(task_lock)
+# Cancellation tokens of running tasks, and the running tasks of each frontend session
+task_tokens = {}
+session_tasks = defaultdict(set)
+
+# Default and maximum per-request deadline in seconds
+DEFAULT_TASK_TIMEOUT = 600
+# Idle streams send a heartbeat this often so clients and proxies keep the connection open
+STREAM_HEARTBEAT_SECONDS = 15
+# Each open stream holds a server thread for as long as its task runs, so streams may
+# use at most MAX_OPEN_STREAMS of the threads; the rest stay free for ordinary requests.
+# Clients refused a stream (503) fall back to polling /task_status.
+SERVER_THREADS = int(os.getenv("SERVER_THREADS", "32"))
+MAX_OPEN_STREAMS = int(os.getenv("MAX_OPEN_STREAMS", str(SERVER_THREADS // 2)))
+stream_slots = threading.BoundedSemaphore(MAX_OPEN_STREAMS)
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
 
 class TaskStatus(Enum):
     PENDING = "pending"
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 def run_async(coro):
     """Helper function to run async code"""
@@ -31,9 +55,20 @@ def run_async(coro):
     finally:
         loop.close()
 
+def _append_event(task_id, event):
+    # Called with task_lock held
+    events = task_results[task_id].setdefault('events', [])
+    event['seq'] = len(events) + 1
+    event['time'] = time.time()
+    events.append(event)
+    task_events.notify_all()
+
 def update_task_status(task_id, status, data=None, error=None):
     """Thread-safe update of task status"""
     with task_lock:
+        # A cancelled task keeps its status even if the worker finishes afterwards
+        if task_results[task_id].get('status') == TaskStatus.CANCELLED.value:
+            return
         if data is not None:
             task_results[task_id].update({
                 'status': status,
@@ -46,19 +81,95 @@ def update_task_status(task_id, status, data=None, error=None):
             })
         else:
             task_results[task_id]['status'] = status
+        event = {'event': 'status', 'status': status}
+        if data is not None:
+            event['data'] = data
+        if error is not None:
+            event['error'] = error
+        _append_event(task_id, event)
+
+def publish_partial(task_id, kind, data):
+    """Publish an intermediate result (a hotel page, flight candidates) of a running task"""
+    with task_lock:
+        if task_results[task_id].get('status') in TERMINAL_STATUSES:
+            return
+        task_results[task_id].setdefault('partial', {})[kind] = data
+        _append_event(task_id, {'event': 'partial', 'kind': kind, 'data': data})
+
+def task_timeout(value):
+    """Deadline requested by a client, in seconds, capped at DEFAULT_TASK_TIMEOUT"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return DEFAULT_TASK_TIMEOUT
+    if not math.isfinite(value) or value <= 0:
+        return DEFAULT_TASK_TIMEOUT
+    return min(value, DEFAULT_TASK_TIMEOUT)
+
+def create_task(data, trace_id):
+    """Register a new task with its cancellation token and deadline"""
+    task_id = str(uuid.uuid4())
+    token = CancellationToken(timeout=task_timeout(data.get('timeout')))
+    session_id = data.get('session_id')
+
+    # Optionally cancel the session's tasks that belong to an earlier search
+    if session_id and data.get('cancel_previous'):
+        with task_lock:
+            previous = [
+                tid for tid in session_tasks[session_id]
+                if task_results[tid].get('trace_id') != trace_id
+            ]
+        for tid in previous:
+            cancel_task(tid, "Superseded by a new search")
+
+    with task_lock:
+        task_results[task_id] = {
+            'status': TaskStatus.PENDING.value,
+            'trace_id': trace_id,
+            'session_id': session_id
+        }
+        task_tokens[task_id] = token
+        if session_id:
+            session_tasks[session_id].add(task_id)
+    return task_id, token
 
-def process_flight_search(task_id, origin, destination, start_date, end_date, preferences):
+def finish_task(task_id):
+    """Forget the cancellation token of a task that is no longer running"""
+    with task_lock:
+        task_tokens.pop(task_id, None)
+        session_id = task_results[task_id].get('session_id')
+        if session_id:
+            session_tasks[session_id].discard(task_id)
+            if not session_tasks[session_id]:
+                del session_tasks[session_id]
+
+def cancel_task(task_id, reason="Task cancelled"):
+    """Signal a running task to stop and mark it as cancelled"""
+    with task_lock:
+        token = task_tokens.get(task_id)
+        status = task_results[task_id].get('status') if task_id in task_results else None
+    if token is not None:
+        token.cancel(reason)
+    if status in (TaskStatus.PENDING.value, TaskStatus.PROCESSING.value):
+        update_task_status(task_id, TaskStatus.CANCELLED.value, error=reason)
+    return status
+
+def process_flight_search(task_id, origin, destination, start_date, end_date, preferences, trace_id=None, token=None):
+    set_trace_id(trace_id)
     try:
         # Update status to processing
         update_task_status(task_id, TaskStatus.PROCESSING.value)
 
-        # Get flight search URL
-        url = run_async(get_flight_url(origin, destination, start_date, end_date))
-        if not url:
-            raise Exception("Failed to generate flight search URL")
+        with span("process_flight_search", task_id=task_id, origin=origin, destination=destination):
+            # Get flight search URL
+            url = run_async(get_flight_url(origin, destination, start_date, end_date, token=token))
+            if not url:
+                raise Exception("Failed to generate flight search URL")
+            publish_partial(task_id, "flight_url", url)
 
-        # Scrape flight results
-        flight_results = run_async(scrape_flights(url, preferences))
+            # Scrape flight results; candidates for each leg are published as the agent finds them
+            flight_results = run_async(scrape_flights(
+                url, preferences, token=token,
+                on_partial=lambda kind, data: publish_partial(task_id, kind, data)
+            ))
         
         # Store results
         update_task_status(
@@ -67,6 +178,13 @@ def process_flight_search(task_id, origin, destination, start_date, end_date, pr
             data=flight_results
         )
 
+    except TaskCancelled as e:
+        print(f"Flight search task {task_id} stopped: {str(e)}")
+        update_task_status(
+            task_id,
+            TaskStatus.CANCELLED.value,
+            error=str(e)
+        )
     except Exception as e:
         print(f"Error in flight search task: {str(e)}")
         update_task_status(
@@ -74,22 +192,27 @@ def process_flight_search(task_id, origin, destination, start_date, end_date, pr
             TaskStatus.FAILED.value,
             error=str(e)
         )
+    finally:
+        finish_task(task_id)
 
-def process_hotel_search(task_id, location, check_in, check_out, occupancy, currency):
+def process_hotel_search(task_id, location, check_in, check_out, occupancy, currency, trace_id=None, token=None):
+    set_trace_id(trace_id)
     try:
         # Update status to processing
         update_task_status(task_id, TaskStatus.PROCESSING.value)
 
         # Create API instance and search for hotels
         api = BrightDataAPI()
-        with requests.Session() as session:
+        with span("process_hotel_search", task_id=task_id, location=location), requests.Session() as session:
             hotels = api.search_hotels(
                 session=session,
                 location=location,
                 check_in=check_in,
                 check_out=check_out,
                 occupancy=occupancy,
-                currency=currency
+                currency=currency,
+                token=token,
+                on_page=lambda page: publish_partial(task_id, "hotels_page", page)
             )
 
         # Store results
@@ -99,6 +222,13 @@ def process_hotel_search(task_id, location, check_in, check_out, occupancy, curr
             data=hotels
         )
 
+    except TaskCancelled as e:
+        print(f"Hotel search task {task_id} stopped: {str(e)}")
+        update_task_status(
+            task_id,
+            TaskStatus.CANCELLED.value,
+            error=str(e)
+        )
     except Exception as e:
         print(f"Error in hotel search task: {str(e)}")
         update_task_status(
@@ -106,6 +236,8 @@ def process_hotel_search(task_id, location, check_in, check_out, occupancy, curr
             TaskStatus.FAILED.value,
             error=str(e)
         )
+    finally:
+        finish_task(task_id)
 
 @app.route('/search_flights', methods=['POST'])
 def search_flights():
@@ -126,21 +258,21 @@ def search_flights():
             }), 400
 
         # Generate task ID and store initial status
-        task_id = str(uuid.uuid4())
-        with task_lock:
-            task_results[task_id] = {'status': TaskStatus.PENDING.value}
+        trace_id = request.headers.get(TRACE_HEADER) or new_trace_id()
+        task_id, token = create_task(data, trace_id)
 
         # Start background thread
         thread = threading.Thread(
             target=process_flight_search,
-            args=(task_id, origin, destination, start_date, end_date, preferences),
+            args=(task_id, origin, destination, start_date, end_date, preferences, trace_id, token),
             daemon=True
         )
         thread.start()
         
         return jsonify({
             'task_id': task_id,
-            'status': TaskStatus.PENDING.value
+            'status': TaskStatus.PENDING.value,
+            'trace_id': trace_id
         })
 
     except Exception as e:
@@ -165,21 +297,21 @@ def search_hotels():
             }), 400
 
         # Generate task ID and store initial status
-        task_id = str(uuid.uuid4())
-        with task_lock:
-            task_results[task_id] = {'status': TaskStatus.PENDING.value}
+        trace_id = request.headers.get(TRACE_HEADER) or new_trace_id()
+        task_id, token = create_task(data, trace_id)
 
         # Start background thread
         thread = threading.Thread(
             target=process_hotel_search,
-            args=(task_id, location, check_in, check_out, occupancy, currency),
+            args=(task_id, location, check_in, check_out, occupancy, currency, trace_id, token),
             daemon=True
         )
         thread.start()
         
         return jsonify({
             'task_id': task_id,
-            'status': TaskStatus.PENDING.value
+            'status': TaskStatus.PENDING.value,
+            'trace_id': trace_id
         })
 
     except Exception as e:
@@ -190,6 +322,8 @@ def get_status(task_id):
     try:
         with task_lock:
             result = task_results.get(task_id)
+            # The event log is only served by /task_stream
+            result = {key: value for key, value in result.items() if key != 'events'} if result else None
         if not result:
             return jsonify({'error': 'Task not found'}), 404
 
@@ -198,6 +332,64 @@ def get_status(task_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/task_stream/<task_id>', methods=['GET'])
+def stream_task(task_id):
+    """Stream a task's events as NDJSON until it finishes.
+
+    Each line is one event: {"event": "partial", "kind": ..., "data": ...} for
+    intermediate results and {"event": "status", "status": ...} for status changes,
+    the final one carrying the result or error. Pass ?after=<seq> to resume after the
+    last event received. Answers 503 when MAX_OPEN_STREAMS streams are already open.
+    """
+    with task_lock:
+        if task_id not in task_results:
+            return jsonify({'error': 'Task not found'}), 404
+    if not stream_slots.acquire(blocking=False):
+        return jsonify({'error': 'Too many open task streams, poll /task_status instead'}), 503, {'Retry-After': '2'}
+    cursor = request.args.get('after', default=0, type=int)
+
+    def generate():
+        nonlocal cursor
+        while True:
+            with task_events:
+                task_events.wait_for(
+                    lambda: len(task_results[task_id].get('events', [])) > cursor,
+                    timeout=STREAM_HEARTBEAT_SECONDS
+                )
+                events = task_results[task_id].get('events', [])[cursor:]
+                status = task_results[task_id].get('status')
+            for event in events:
+                yield json.dumps(event, default=str) + "\n"
+            cursor += len(events)
+            if status in TERMINAL_STATUSES:
+                # The final status event is always the last one a task publishes
+                return
+            if not events:
+                yield json.dumps({'event': 'heartbeat', 'status': status}) + "\n"
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Runs when the stream finishes or the client disconnects, even if it never started
+    response.call_on_close(stream_slots.release)
+    return response
+
+@app.route('/task/<task_id>', methods=['DELETE'])
+def delete_task(task_id):
+    try:
+        with task_lock:
+            exists = task_id in task_results
+        if not exists:
+            return jsonify({'error': 'Task not found'}), 404
+
+        cancel_task(task_id)
+        with task_lock:
+            status = task_results[task_id].get('status')
+
+        return jsonify({'task_id': task_id, 'status': status})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 if __name__ == '__main__':
     # Use waitress instead of Flask's development server
-    serve(app, host='0.0.0.0', port=5000) 
\ No newline at end of file
+    serve(app, host='0.0.0.0', port=5000, threads=SERVER_THREADS) 
\ No newline at end of file
@@ -1,7 +1,11 @@
 from playwright.async_api import async_playwright
-from browser_use import Agent, Browser, BrowserConfig
+from browser_use import ActionResult, Agent, Browser, BrowserConfig, Controller
+from pydantic import BaseModel
+from typing import List, Optional
 from config.models import model
 from flights.util import flight_scrape_task
+from util.tracing import span
+from util.cancellation import CancellationToken
 from dotenv import load_dotenv
 import os
 
@@ -9,6 +13,10 @@ load_dotenv()
 
 class FlightSearchScraper:
     async def start(self, use_bright_data=True):
+        with span("scraper.start", use_bright_data=use_bright_data):
+            await self._start(use_bright_data)
+
+    async def _start(self, use_bright_data):
         self.playwright = await async_playwright().start()
 
         if use_bright_data:
@@ -74,48 +82,52 @@ class FlightSearchScraper:
     async def fill_flight_search(self, origin, destination, start_date, end_date):
         try:
             print("Navigating to Google Flights...")
-            await self.page.goto("https://www.google.com/travel/flights")
+            with span("scraper.goto"):
+                await self.page.goto("https://www.google.com/travel/flights")
 
             print("Filling in destination...")
-            if not await self.fill_and_select_airport(
-                'input[aria-label="Where to? "]', destination
-            ):
-                raise Exception("Failed to set destination airport")
+            with span("scraper.fill_destination", airport=destination):
+                if not await self.fill_and_select_airport(
+                    'input[aria-label="Where to? "]', destination
+                ):
+                    raise Exception("Failed to set destination airport")
 
             # Fill origin and destination using helper method
             print("Filling in origin...")
-            if not await self.fill_and_select_airport(
-                'input[aria-label="Where from?"]', origin
-            ):
-                raise Exception("Failed to set origin airport")
+            with span("scraper.fill_origin", airport=origin):
+                if not await self.fill_and_select_airport(
+                    'input[aria-label="Where from?"]', origin
+                ):
+                    raise Exception("Failed to set origin airport")
 
             print("Selecting dates...")
-            # Click the departure date button
-
-            await self.page.click('input[aria-label*="Departure"]')
-            await self.page.wait_for_timeout(1000)
+            with span("scraper.select_dates", start_date=start_date, end_date=end_date):
+                # Click the departure date button
 
-            # Select departure date
-            departure_button = await self.page.wait_for_selector(
-                f'div[aria-label*="{start_date}"]', timeout=5000
-            )
-            await departure_button.click()
-            await self.page.wait_for_timeout(1000)
+                await self.page.click('input[aria-label*="Departure"]')
+                await self.page.wait_for_timeout(1000)
 
-            return_button = await self.page.wait_for_selector(
-                f'div[aria-label*="{end_date}"]', timeout=5000
-            )
-            await return_button.click()
-            await self.page.wait_for_timeout(1000)
+                # Select departure date
+                departure_button = await self.page.wait_for_selector(
+                    f'div[aria-label*="{start_date}"]', timeout=5000
+                )
+                await departure_button.click()
+                await self.page.wait_for_timeout(1000)
 
-            # Click Done button if it exists
-            try:
-                done_button = await self.page.wait_for_selector(
-                    'button[aria-label*="Done."]', timeout=5000
+                return_button = await self.page.wait_for_selector(
+                    f'div[aria-label*="{end_date}"]', timeout=5000
                 )
-                await done_button.click()
-            except:
-                print("No Done button found, continuing...")
+                await return_button.click()
+                await self.page.wait_for_timeout(1000)
+
+                # Click Done button if it exists
+                try:
+                    done_button = await self.page.wait_for_selector(
+                        'button[aria-label*="Done."]', timeout=5000
+                    )
+                    await done_button.click()
+                except:
+                    print("No Done button found, continuing...")
 
             return self.page.url
 
@@ -132,7 +144,42 @@ class FlightSearchScraper:
             print(f"Error during cleanup: {str(e)}")
 
 
-async def scrape_flights(url, preferences):
+class FlightOption(BaseModel):
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+    origin: Optional[str] = None
+    destination: Optional[str] = None
+    price: Optional[str] = None
+    num_stops: Optional[int] = None
+    duration: Optional[str] = None
+    airline: Optional[str] = None
+    stop_locations: Optional[str] = None
+
+
+class FlightCandidates(BaseModel):
+    flights: List[FlightOption]
+
+
+def candidate_controller(on_partial):
+    """Agent actions that hand the flight options found so far to `on_partial(kind, flights)`"""
+    controller = Controller()
+
+    @controller.action("Save the best outbound flight options found so far", param_model=FlightCandidates)
+    def save_outbound_candidates(params: FlightCandidates):
+        on_partial("outbound_candidates", [flight.model_dump() for flight in params.flights])
+        return ActionResult(extracted_content=f"Saved {len(params.flights)} outbound options")
+
+    @controller.action("Save the best return flight options found so far", param_model=FlightCandidates)
+    def save_return_candidates(params: FlightCandidates):
+        on_partial("return_candidates", [flight.model_dump() for flight in params.flights])
+        return ActionResult(extracted_content=f"Saved {len(params.flights)} return options")
+
+    return controller
+
+
+async def scrape_flights(url, preferences, token=None, on_partial=None):
+    token = token or CancellationToken()
+    token.check()
     browser = Browser(
         config=BrowserConfig(
             chrome_instance_path="C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe"
@@ -142,29 +189,39 @@ async def scrape_flights(url, preferences):
         {"open_tab": {"url": url}},
     ]
 
+    options = {"controller": candidate_controller(on_partial)} if on_partial else {}
     agent = Agent(
-        task=flight_scrape_task(preferences, url),
+        task=flight_scrape_task(preferences, url, publish_candidates=on_partial is not None),
         llm=model,
         initial_actions=initial_actions,
         browser=browser,
+        **options,
     )
 
-    history = await agent.run()
-    await browser.close()
+    try:
+        with span("scraper.agent_run", url=url):
+            history = await token.watch(agent.run())
+    finally:
+        # Release the browser even when the task is cancelled mid-run
+        await browser.close()
     result = history.final_result()
     return result
 
 
-async def get_flight_url(origin, destination, start_date, end_date):
+async def get_flight_url(origin, destination, start_date, end_date, token=None):
+    token = token or CancellationToken()
     try:
         scraper = FlightSearchScraper()
-        await scraper.start(use_bright_data=False)
-        url = await scraper.fill_flight_search(
-            origin=origin,
-            destination=destination,
-            start_date=start_date,
-            end_date=end_date,
-        )
+        await token.watch(scraper.start(use_bright_data=False))
+        with span("scraper.fill_flight_search"):
+            url = await token.watch(
+                scraper.fill_flight_search(
+                    origin=origin,
+                    destination=destination,
+                    start_date=start_date,
+                    end_date=end_date,
+                )
+            )
         return url
 
     finally:
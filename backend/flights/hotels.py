@@ -1,9 +1,10 @@
 import os
 import requests
-import time
 from dotenv import load_dotenv
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
 from datetime import datetime
+from util.tracing import span
+from util.cancellation import CancellationToken, TaskCancelled
 
 load_dotenv()
 
@@ -12,6 +13,7 @@ class BrightDataAPI:
     BASE_URL = "https://api.brightdata.com/serp"
     CUSTOMER_ID = "c_8a10678a"
     ZONE = "serp_api1"
+    REQUEST_TIMEOUT = 30
 
     def __init__(self):
         self.api_key = os.getenv("BRIGHTDATA_API_KEY")
@@ -21,10 +23,22 @@ class BrightDataAPI:
         }
 
     def _poll_results(
-        self, session: requests.Session, response_id: str, max_retries: int = 10, delay: int = 10
+        self,
+        session: requests.Session,
+        response_id: str,
+        max_retries: int = 10,
+        delay: int = 10,
+        token: CancellationToken = None,
+        on_page: Callable[[Dict], None] = None,
     ) -> Optional[Dict]:
-        """Generic polling function for any type of search results."""
+        """Generic polling function for any type of search results.
+
+        `on_page` is called with the result the moment it is parsed, before the poll
+        span closes and before the caller stores the final result.
+        """
+        token = token or CancellationToken()
         for _ in range(max_retries):
+            token.check()
             try:
                 response = session.get(
                     f"{self.BASE_URL}/get_result",
@@ -34,26 +48,49 @@ class BrightDataAPI:
                         "response_id": response_id,
                     },
                     headers=self.headers,
+                    timeout=token.timeout(self.REQUEST_TIMEOUT),
                 )
                 if response.status_code == 200:
                     try:
                         result = response.json()
-                        return result
                     except ValueError as e:
                         print(f"Failed to parse JSON response: {e}")
                         print("Raw response:", response.text[:200])
+                    else:
+                        if on_page:
+                            try:
+                                on_page(result)
+                            except Exception as e:
+                                print(f"Error publishing results page: {e}")
+                        return result
 
-                time.sleep(delay)
-
+            except TaskCancelled:
+                raise
             except Exception as e:
                 print(f"Error polling results: {e}")
 
+            # Wake up early if the task is cancelled instead of sleeping through the delay
+            if token.wait(delay):
+                token.check()
+
         return None
 
     def search_travel(
-        self, session: requests.Session, url: str, params: Dict[Any, Any] = None
+        self,
+        session: requests.Session,
+        url: str,
+        params: Dict[Any, Any] = None,
+        token: CancellationToken = None,
+        on_page: Callable[[Dict], None] = None,
     ) -> Optional[Dict]:
-        """Generic travel search function that can be used for both flights and hotels."""
+        """Generic travel search function that can be used for both flights and hotels.
+
+        `on_page` is called with each page of results as soon as the poll returns it.
+        The BrightData SERP API answers with a single page, so it fires once, right
+        before the task completes; streaming clients still get the results without
+        waiting for their next status poll.
+        """
+        token = token or CancellationToken()
         payload = {"url": url, "brd_json": "json"}
 
         if params:
@@ -64,18 +101,24 @@ class BrightDataAPI:
                 payload["url"] += f"?{query_params}"
 
         try:
-            response = session.post(
-                f"{self.BASE_URL}/req",
-                params={"customer": self.CUSTOMER_ID, "zone": self.ZONE},
-                headers=self.headers,
-                json=payload,
-            )
-            response.raise_for_status()
-            data = response.json()
+            token.check()
+            with span("brightdata.request", url=url):
+                response = session.post(
+                    f"{self.BASE_URL}/req",
+                    params={"customer": self.CUSTOMER_ID, "zone": self.ZONE},
+                    headers=self.headers,
+                    json=payload,
+                    timeout=token.timeout(self.REQUEST_TIMEOUT),
+                )
+                response.raise_for_status()
+                data = response.json()
             response_id = data.get("response_id")
             if response_id:
-                return self._poll_results(session, response_id)
+                with span("brightdata.poll_results", response_id=response_id):
+                    return self._poll_results(session, response_id, token=token, on_page=on_page)
 
+        except TaskCancelled:
+            raise
         except requests.exceptions.RequestException as http_err:
             print(f"HTTP error occurred: {http_err}")
         except Exception as err:
@@ -93,6 +136,8 @@ class BrightDataAPI:
         currency: str = "USD",
         free_cancellation: bool = False,
         accommodation_type: str = "hotels",
+        token: CancellationToken = None,
+        on_page: Callable[[Dict], None] = None,
     ) -> Optional[Dict]:
         """Specific method for hotel searches."""
         url = f"https://www.google.com/travel/search?q={location}"
@@ -109,7 +154,7 @@ class BrightDataAPI:
         if accommodation_type:
             params["brd_accommodation_type"] = accommodation_type
 
-        return self.search_travel(session, url, params)
+        return self.search_travel(session, url, params, token=token, on_page=on_page)
 
 
 # Example usage
@@ -1,4 +1,13 @@
-def flight_scrape_task(preferences, url):
+CANDIDATE_STEPS = """
+    While working, report progress with these actions:
+        - As soon as the outbound options are listed, call save_outbound_candidates with the
+          best few options (up to 5) before selecting one
+        - As soon as the return options are listed, call save_return_candidates with the
+          best few options (up to 5) before selecting one
+    """
+
+
+def flight_scrape_task(preferences, url, publish_candidates=False):
     return f"""Follow these steps in order:
     Go to {url}
     1. Find and click the 'Search' button on the page
@@ -60,4 +69,4 @@ def flight_scrape_task(preferences, url):
         - Each flight should have its own complete set of details
         - Store the duration in the format "Xh Ym" (e.g., "2h 15m")
         - Return the total price of the flight, which is the maximum of the two prices listed
-    """
\ No newline at end of file
+    """ + (CANDIDATE_STEPS if publish_candidates else "")
\ No newline at end of file
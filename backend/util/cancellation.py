@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+
+# Shortest timeout handed to a network call; requests rejects zero and negative timeouts
+MIN_CALL_TIMEOUT = 0.1
+
+
+class TaskCancelled(Exception):
+    """Raised when a task is cancelled or runs past its deadline"""
+
+
+class CancellationToken:
+    """Cancellation flag plus an optional deadline, shared by a task and its workers"""
+
+    def __init__(self, timeout=None):
+        self._event = threading.Event()
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.reason = None
+
+    def cancel(self, reason="Task cancelled"):
+        """Request cancellation of the task"""
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self):
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("Task deadline exceeded")
+            return True
+        return False
+
+    def remaining(self):
+        """Seconds left before the deadline, or None if there is no deadline"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def timeout(self, default):
+        """Clamp a per-call timeout (in seconds) to the time left before the deadline.
+
+        Raises TaskCancelled once the task is cancelled or past its deadline, so the
+        result is never below MIN_CALL_TIMEOUT.
+        """
+        self.check()
+        remaining = self.remaining()
+        return default if remaining is None else max(min(default, remaining), MIN_CALL_TIMEOUT)
+
+    def check(self):
+        """Raise TaskCancelled if the task has been cancelled"""
+        if self.cancelled:
+            raise TaskCancelled(self.reason)
+
+    def wait(self, seconds):
+        """Sleep for up to `seconds`, waking early on cancellation. Returns True if cancelled"""
+        remaining = self.remaining()
+        self._event.wait(seconds if remaining is None else min(seconds, remaining))
+        return self.cancelled
+
+    async def watch(self, coro, poll_interval=0.5):
+        """Run a coroutine, cancelling it as soon as the token is cancelled"""
+        task = asyncio.ensure_future(coro)
+        while not task.done():
+            if self.cancelled:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                raise TaskCancelled(self.reason)
+            await asyncio.wait({task}, timeout=poll_interval)
+        return task.result()
@@ -0,0 +1,88 @@
+"""Request tracing: spans exported as JSONL and correlated across services by trace ID.
+
+The frontend and backend run as separate apps, each from its own directory with its
+own top-level `util` package, so there is no shared package to import this from and
+each app carries a copy. Keep the span code identical in both; the service recorded
+on spans is TRACE_SERVICE, defaulting to the app's directory name.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TRACE_HEADER = "X-Trace-Id"
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "traces.jsonl")
+TRACE_SERVICE = os.getenv("TRACE_SERVICE") or os.path.basename(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+_span_id = contextvars.ContextVar("span_id", default=None)
+_export_lock = threading.Lock()
+
+
+def new_trace_id():
+    """Generate a new trace ID"""
+    return uuid.uuid4().hex
+
+
+def set_trace_id(trace_id):
+    """Bind a trace ID to the current thread/task context"""
+    _trace_id.set(trace_id)
+    _span_id.set(None)
+    return trace_id
+
+
+def get_trace_id():
+    """Return the trace ID of the current context, if any"""
+    return _trace_id.get()
+
+
+def export_span(record, path=None):
+    """Append a finished span to the local JSONL exporter"""
+    line = json.dumps(record, default=str)
+    with _export_lock:
+        with open(path or TRACE_EXPORT_PATH, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+
+
+@contextmanager
+def span(name, **attributes):
+    """Record a span around a block of work in the current trace"""
+    trace_id = _trace_id.get()
+    if trace_id is None:
+        yield None
+        return
+
+    span_id = uuid.uuid4().hex[:16]
+    parent_id = _span_id.get()
+    token = _span_id.set(span_id)
+    record = {
+        "trace_id": trace_id,
+        "span_id": span_id,
+        "parent_id": parent_id,
+        "name": name,
+        "service": TRACE_SERVICE,
+        "attributes": attributes,
+        "start": time.time(),
+        "status": "ok",
+    }
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record["status"] = "error"
+        record["error"] = str(e)
+        raise
+    finally:
+        record["duration_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        _span_id.reset(token)
+        try:
+            export_span(record)
+        except OSError as e:
+            print(f"Error exporting span: {e}")
@@ -0,0 +1,246 @@
+"""Local airport and city lookup used by the rule-based travel request parser."""
+
+# IATA code -> (city name, country)
+AIRPORTS = {
+    # North America
+    "JFK": ("New York", "United States"),
+    "LGA": ("New York", "United States"),
+    "EWR": ("Newark", "United States"),
+    "LAX": ("Los Angeles", "United States"),
+    "SFO": ("San Francisco", "United States"),
+    "SJC": ("San Jose", "United States"),
+    "SEA": ("Seattle", "United States"),
+    "ORD": ("Chicago", "United States"),
+    "BOS": ("Boston", "United States"),
+    "IAD": ("Washington", "United States"),
+    "DCA": ("Washington", "United States"),
+    "ATL": ("Atlanta", "United States"),
+    "MIA": ("Miami", "United States"),
+    "MCO": ("Orlando", "United States"),
+    "DFW": ("Dallas", "United States"),
+    "IAH": ("Houston", "United States"),
+    "DEN": ("Denver", "United States"),
+    "PHX": ("Phoenix", "United States"),
+    "LAS": ("Las Vegas", "United States"),
+    "SAN": ("San Diego", "United States"),
+    "AUS": ("Austin", "United States"),
+    "MSP": ("Minneapolis", "United States"),
+    "DTW": ("Detroit", "United States"),
+    "PHL": ("Philadelphia", "United States"),
+    "HNL": ("Honolulu", "United States"),
+    "YYZ": ("Toronto", "Canada"),
+    "YVR": ("Vancouver", "Canada"),
+    "YUL": ("Montreal", "Canada"),
+    "MEX": ("Mexico City", "Mexico"),
+    "CUN": ("Cancun", "Mexico"),
+    # South America
+    "GRU": ("Sao Paulo", "Brazil"),
+    "GIG": ("Rio de Janeiro", "Brazil"),
+    "EZE": ("Buenos Aires", "Argentina"),
+    "LIM": ("Lima", "Peru"),
+    "BOG": ("Bogota", "Colombia"),
+    "SCL": ("Santiago", "Chile"),
+    # Europe
+    "LHR": ("London", "United Kingdom"),
+    "LGW": ("London", "United Kingdom"),
+    "CDG": ("Paris", "France"),
+    "NCE": ("Nice", "France"),
+    "AMS": ("Amsterdam", "Netherlands"),
+    "FRA": ("Frankfurt", "Germany"),
+    "MUC": ("Munich", "Germany"),
+    "BER": ("Berlin", "Germany"),
+    "MAD": ("Madrid", "Spain"),
+    "BCN": ("Barcelona", "Spain"),
+    "LIS": ("Lisbon", "Portugal"),
+    "FCO": ("Rome", "Italy"),
+    "MXP": ("Milan", "Italy"),
+    "VCE": ("Venice", "Italy"),
+    "ZRH": ("Zurich", "Switzerland"),
+    "VIE": ("Vienna", "Austria"),
+    "PRG": ("Prague", "Czech Republic"),
+    "CPH": ("Copenhagen", "Denmark"),
+    "ARN": ("Stockholm", "Sweden"),
+    "OSL": ("Oslo", "Norway"),
+    "HEL": ("Helsinki", "Finland"),
+    "DUB": ("Dublin", "Ireland"),
+    "ATH": ("Athens", "Greece"),
+    "IST": ("Istanbul", "Turkey"),
+    "KEF": ("Reykjavik", "Iceland"),
+    # Middle East & Africa
+    "DXB": ("Dubai", "United Arab Emirates"),
+    "AUH": ("Abu Dhabi", "United Arab Emirates"),
+    "DOH": ("Doha", "Qatar"),
+    "TLV": ("Tel Aviv", "Israel"),
+    "CAI": ("Cairo", "Egypt"),
+    "JNB": ("Johannesburg", "South Africa"),
+    "CPT": ("Cape Town", "South Africa"),
+    "NBO": ("Nairobi", "Kenya"),
+    "CMN": ("Casablanca", "Morocco"),
+    "RAK": ("Marrakech", "Morocco"),
+    # Asia
+    "BKK": ("Bangkok", "Thailand"),
+    "DMK": ("Bangkok", "Thailand"),
+    "HKT": ("Phuket", "Thailand"),
+    "CNX": ("Chiang Mai", "Thailand"),
+    "KBV": ("Krabi", "Thailand"),
+    "USM": ("Koh Samui", "Thailand"),
+    "SIN": ("Singapore", "Singapore"),
+    "KUL": ("Kuala Lumpur", "Malaysia"),
+    "CGK": ("Jakarta", "Indonesia"),
+    "DPS": ("Bali", "Indonesia"),
+    "MNL": ("Manila", "Philippines"),
+    "SGN": ("Ho Chi Minh City", "Vietnam"),
+    "HAN": ("Hanoi", "Vietnam"),
+    "HKG": ("Hong Kong", "Hong Kong"),
+    "TPE": ("Taipei", "Taiwan"),
+    "PEK": ("Beijing", "China"),
+    "PVG": ("Shanghai", "China"),
+    "ICN": ("Seoul", "South Korea"),
+    "NRT": ("Tokyo", "Japan"),
+    "HND": ("Tokyo", "Japan"),
+    "KIX": ("Osaka", "Japan"),
+    "DEL": ("Delhi", "India"),
+    "BOM": ("Mumbai", "India"),
+    "BLR": ("Bangalore", "India"),
+    "CMB": ("Colombo", "Sri Lanka"),
+    "KTM": ("Kathmandu", "Nepal"),
+    "MLE": ("Male", "Maldives"),
+    # Oceania
+    "SYD": ("Sydney", "Australia"),
+    "MEL": ("Melbourne", "Australia"),
+    "BNE": ("Brisbane", "Australia"),
+    "PER": ("Perth", "Australia"),
+    "AKL": ("Auckland", "New Zealand"),
+}
+
+# City name or alias (lowercase) -> primary IATA code
+CITY_AIRPORTS = {
+    "new york": "JFK",
+    "new york city": "JFK",
+    "nyc": "JFK",
+    "manhattan": "JFK",
+    "newark": "EWR",
+    "los angeles": "LAX",
+    "san francisco": "SFO",
+    "san jose": "SJC",
+    "seattle": "SEA",
+    "chicago": "ORD",
+    "boston": "BOS",
+    "washington": "IAD",
+    "washington dc": "IAD",
+    "atlanta": "ATL",
+    "miami": "MIA",
+    "orlando": "MCO",
+    "dallas": "DFW",
+    "houston": "IAH",
+    "denver": "DEN",
+    "phoenix": "PHX",
+    "las vegas": "LAS",
+    "vegas": "LAS",
+    "san diego": "SAN",
+    "austin": "AUS",
+    "minneapolis": "MSP",
+    "detroit": "DTW",
+    "philadelphia": "PHL",
+    "honolulu": "HNL",
+    "hawaii": "HNL",
+    "toronto": "YYZ",
+    "vancouver": "YVR",
+    "montreal": "YUL",
+    "mexico city": "MEX",
+    "cancun": "CUN",
+    "sao paulo": "GRU",
+    "rio de janeiro": "GIG",
+    "buenos aires": "EZE",
+    "lima": "LIM",
+    "bogota": "BOG",
+    "santiago": "SCL",
+    "london": "LHR",
+    "paris": "CDG",
+    "amsterdam": "AMS",
+    "frankfurt": "FRA",
+    "munich": "MUC",
+    "berlin": "BER",
+    "madrid": "MAD",
+    "barcelona": "BCN",
+    "lisbon": "LIS",
+    "rome": "FCO",
+    "milan": "MXP",
+    "venice": "VCE",
+    "zurich": "ZRH",
+    "vienna": "VIE",
+    "prague": "PRG",
+    "copenhagen": "CPH",
+    "stockholm": "ARN",
+    "oslo": "OSL",
+    "helsinki": "HEL",
+    "dublin": "DUB",
+    "athens": "ATH",
+    "istanbul": "IST",
+    "reykjavik": "KEF",
+    "iceland": "KEF",
+    "dubai": "DXB",
+    "abu dhabi": "AUH",
+    "doha": "DOH",
+    "tel aviv": "TLV",
+    "cairo": "CAI",
+    "johannesburg": "JNB",
+    "cape town": "CPT",
+    "nairobi": "NBO",
+    "casablanca": "CMN",
+    "marrakech": "RAK",
+    "bangkok": "BKK",
+    "phuket": "HKT",
+    "chiang mai": "CNX",
+    "krabi": "KBV",
+    "koh samui": "USM",
+    "samui": "USM",
+    "singapore": "SIN",
+    "kuala lumpur": "KUL",
+    "jakarta": "CGK",
+    "bali": "DPS",
+    "denpasar": "DPS",
+    "manila": "MNL",
+    "ho chi minh city": "SGN",
+    "saigon": "SGN",
+    "hanoi": "HAN",
+    "hong kong": "HKG",
+    "taipei": "TPE",
+    "beijing": "PEK",
+    "shanghai": "PVG",
+    "seoul": "ICN",
+    "tokyo": "NRT",
+    "osaka": "KIX",
+    "kyoto": "KIX",
+    "delhi": "DEL",
+    "new delhi": "DEL",
+    "mumbai": "BOM",
+    "bangalore": "BLR",
+    "colombo": "CMB",
+    "kathmandu": "KTM",
+    "maldives": "MLE",
+    "sydney": "SYD",
+    "melbourne": "MEL",
+    "brisbane": "BNE",
+    "perth": "PER",
+    "auckland": "AKL",
+}
+
+
+def lookup_airport(text):
+    """Resolve an airport code or city name to (code, city), or None if unknown"""
+    if not text:
+        return None
+    candidate = text.strip().strip(".,!?")
+    if candidate.isupper() and candidate in AIRPORTS:
+        return candidate, AIRPORTS[candidate][0]
+    code = CITY_AIRPORTS.get(candidate.lower())
+    if code:
+        return code, AIRPORTS[code][0]
+    return None
+
+
+def airport_country(code):
+    """Country of an airport code, or None if unknown"""
+    entry = AIRPORTS.get((code or "").upper())
+    return entry[1] if entry else None
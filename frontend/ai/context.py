@@ -1,10 +1,115 @@
-def generate_travel_context_memory(travel_context):
-    return f"""I am your travel assistant. I have access to your travel details:
-            - Flight from {travel_context['origin']} to {travel_context['destination']}
-            - Travel dates: {travel_context['start_date']} to {travel_context['end_date']}
-            - Number of travelers: {travel_context['occupancy']}
-            
-            Flight Details: {travel_context['flights']}
-            Hotel Details: {travel_context['hotels']}
-            
-            Your preferences: {travel_context['preferences']}"""
+import json
+import re
+from ai.results import normalize_flights, normalize_hotels
+from ai.tokens import estimate_tokens, truncate_to_tokens
+
+# Token budget for the travel context pinned into every assistant prompt
+CONTEXT_TOKEN_BUDGET = 600
+MAX_HOTELS_IN_CONTEXT = 5
+HOTEL_ID_PATTERN = re.compile(r"\bH\d+\b", re.I)
+FLIGHTS_PATTERN = re.compile(r"\b(flights?|fly|flying|departure|return leg|airline)\b", re.I)
+
+
+def _format_price(amount, currency):
+    if amount is None:
+        return "price n/a"
+    return f"{amount:,.0f} {currency}"
+
+
+def _format_flight(leg):
+    stops = leg["num_stops"]
+    stops_text = "nonstop" if stops == 0 else f"{stops} stop(s)" if stops is not None else "stops n/a"
+    if stops and leg.get("stop_locations"):
+        stops_text += f" via {leg['stop_locations']}"
+    return (f"- {leg['direction'].capitalize()}: {leg.get('airline') or 'airline n/a'}, "
+            f"{leg.get('origin') or '?'} {leg.get('start_time') or ''} → "
+            f"{leg.get('destination') or '?'} {leg.get('end_time') or ''}, "
+            f"{stops_text}, {leg.get('duration') or 'duration n/a'}, "
+            f"{_format_price(leg['price'], leg['currency'])}")
+
+
+def _format_hotel(hotel):
+    rating = f"{hotel['rating']}★" if hotel.get("rating") is not None else "unrated"
+    reviews = f" ({hotel['reviews']:,} reviews)" if isinstance(hotel.get("reviews"), (int, float)) else ""
+    return (f"- [{hotel['id']}] {hotel['name']}: "
+            f"{_format_price(hotel['price_per_night'], hotel['currency'])}/night, {rating}{reviews}")
+
+
+def rank_hotels(hotels):
+    """Deterministic ordering: best rated first, then cheapest, then by name"""
+    return sorted(
+        hotels,
+        key=lambda h: (
+            -(h["rating"] or 0),
+            h["price_per_night"] if h["price_per_night"] is not None else float("inf"),
+            h["name"],
+        ),
+    )
+
+
+def build_travel_digest(travel_context, token_budget=CONTEXT_TOKEN_BUDGET, max_hotels=MAX_HOTELS_IN_CONTEXT):
+    """Build a compact, deterministic digest of the trip that fits in `token_budget` tokens"""
+    flights = normalize_flights(travel_context.get('flights'))
+    hotels = rank_hotels(normalize_hotels(travel_context.get('hotels')))
+
+    header = [
+        "I am your travel assistant. I have access to your travel details:",
+        f"- Flight from {travel_context['origin']} to {travel_context['destination']}",
+        f"- Travel dates: {travel_context['start_date']} to {travel_context['end_date']}",
+        f"- Number of travelers: {travel_context['occupancy']}",
+    ]
+    flight_lines = ["Selected flights:"] + ([_format_flight(leg) for leg in flights] or ["- No flight details available"])
+    footer = ("Full flight and hotel details are available on request "
+              "(look up a hotel by its ID, e.g. H1, or ask for \"flights\").")
+
+    # Drop hotels from the bottom of the ranking until everything fits the budget
+    preferences = travel_context.get('preferences') or ""
+    for count in range(min(max_hotels, len(hotels)), -1, -1):
+        hotel_lines = [f"Top {count} of {len(hotels)} hotels:"] + [_format_hotel(h) for h in hotels[:count]]
+        fixed = "\n".join(header + flight_lines + hotel_lines + [footer])
+        remaining = token_budget - estimate_tokens(fixed) - 5
+        if remaining >= 20 or count == 0:
+            break
+
+    preferences_line = f"Your preferences: {truncate_to_tokens(preferences, max(remaining, 20))}"
+    return "\n".join(header + flight_lines + hotel_lines + [preferences_line, footer])
+
+
+def generate_travel_context_memory(travel_context, token_budget=CONTEXT_TOKEN_BUDGET):
+    digest = build_travel_digest(travel_context, token_budget)
+    raw_tokens = estimate_tokens(travel_context.get('flights')) + estimate_tokens(travel_context.get('hotels'))
+    print(f"Travel context: {estimate_tokens(digest)} tokens (raw results: {raw_tokens} tokens)")
+    return digest
+
+
+def trip_details_query(travel_context, question):
+    """The lookup a trip question names: a hotel ID, "flights", or None when it names neither"""
+    match = HOTEL_ID_PATTERN.search(question)
+    if match:
+        return match.group(0).upper()
+    lowered = question.lower()
+    for hotel in normalize_hotels(travel_context.get('hotels')):
+        if hotel["name"] and hotel["name"].lower() in lowered:
+            return hotel["id"]
+    if FLIGHTS_PATTERN.search(question):
+        return "flights"
+    return None
+
+
+def lookup_trip_details(travel_context, query):
+    """Return full details for a hotel ID/name or the flights, for on-demand lookups"""
+    query = (query or "").strip()
+    lowered = query.lower()
+    if not query or "flight" in lowered:
+        flights = normalize_flights(travel_context.get('flights'))
+        return json.dumps(flights, indent=1, default=str) if flights else str(travel_context.get('flights'))
+
+    hotels = normalize_hotels(travel_context.get('hotels'))
+    for hotel in hotels:
+        if hotel["id"].lower() == lowered or lowered in hotel["name"].lower():
+            details = {key: value for key, value in hotel.items() if key != "raw"}
+            details["details"] = hotel["raw"]
+            return json.dumps(details, indent=1, default=str)
+
+    names = ", ".join(f"{h['id']}: {h['name']}" for h in rank_hotels(hotels)[:20])
+    return f"No hotel matched '{query}'. Available hotels: {names}"
@@ -0,0 +1,183 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+
+load_dotenv()
+
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "embedding_cache")
+EMBEDDING_CACHE_MEMORY_ITEMS = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "4096"))
+
+
+class EmbeddingCache:
+    """Content-addressed embedding store shared by every process on the machine.
+
+    Vectors are appended to one float32 file per (model, dimension) and read back through
+    a memory map; a sqlite index maps sha256(model, kind, text) to a row in that file.
+    Appends take sqlite's write lock, so concurrent Streamlit workers never hand out the
+    same row twice. A small in-memory LRU sits in front for the hottest queries.
+    """
+
+    def __init__(self, directory=EMBEDDING_CACHE_DIR, memory_items=EMBEDDING_CACHE_MEMORY_ITEMS):
+        self.directory = directory
+        self.memory_items = memory_items
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._maps = {}
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._init_db()
+
+    def _connection(self):
+        # sqlite connections cannot be shared between threads, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.directory, "index.sqlite"), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS vectors (
+                key TEXT PRIMARY KEY,
+                file TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                row INTEGER NOT NULL,
+                created REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE TABLE IF NOT EXISTS files (file TEXT PRIMARY KEY, rows INTEGER NOT NULL)")
+
+    @staticmethod
+    def make_key(model_name, text, kind="document"):
+        return hashlib.sha256(f"{model_name}\x00{kind}\x00{text}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _file_name(model_name, dim):
+        return f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)}-{dim}.f32"
+
+    def _read_row(self, file_name, dim, row):
+        path = os.path.join(self.directory, file_name)
+        with self._lock:
+            vectors = self._maps.get(file_name)
+            if vectors is None or row >= len(vectors):
+                # Another process may have appended since the file was mapped; remap to see the new rows
+                vectors = np.memmap(path, dtype=np.float32, mode="r").reshape(-1, dim)
+                self._maps[file_name] = vectors
+        return np.array(vectors[row])
+
+    def _remember(self, key, vector):
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def get_many(self, keys):
+        """Cached vectors for `keys`: {key: np.ndarray} for the keys that were found"""
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+        self.counters["memory_hits"] += len(found)
+
+        missing = [key for key in keys if key not in found]
+        for i in range(0, len(missing), 500):
+            chunk = missing[i:i + 500]
+            rows = self._connection().execute(
+                f"SELECT key, file, dim, row FROM vectors WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for key, file_name, dim, row in rows:
+                try:
+                    vector = self._read_row(file_name, dim, row)
+                except (OSError, ValueError) as e:
+                    print(f"Embedding cache read error: {e}")
+                    continue
+                found[key] = vector
+                self._remember(key, vector)
+                self.counters["disk_hits"] += 1
+        self.counters["misses"] += len(keys) - len(found)
+        return found
+
+    def put_many(self, model_name, items):
+        """Append (key, vector) pairs to the store"""
+        if not items:
+            return
+        dim = len(items[0][1])
+        file_name = self._file_name(model_name, dim)
+        vectors = np.asarray([vector for _, vector in items], dtype=np.float32)
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT rows FROM files WHERE file = ?", (file_name,)).fetchone()
+            start = row[0] if row else 0
+            with open(os.path.join(self.directory, file_name), "ab+") as f:
+                # Truncate rows a crashed writer appended but never committed to the index
+                f.truncate(start * dim * 4)
+                f.write(vectors.tobytes())
+            conn.execute("INSERT OR REPLACE INTO files (file, rows) VALUES (?, ?)", (file_name, start + len(items)))
+            now = time.time()
+            conn.executemany(
+                "INSERT OR IGNORE INTO vectors (key, file, dim, row, created) VALUES (?, ?, ?, ?, ?)",
+                [(key, file_name, dim, start + i, now) for i, (key, _) in enumerate(items)],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        for (key, _), vector in zip(items, vectors):
+            self._remember(key, vector)
+
+    def stats(self):
+        total = sum(self.counters.values())
+        hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+        return dict(self.counters, hit_rate=hits / total if total else 0.0)
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends texts it has never seen to the embedding server"""
+
+    def __init__(self, embeddings, model_name, cache=None):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache or embedding_cache()
+
+    def _embed(self, texts, kind, compute):
+        keys = [EmbeddingCache.make_key(self.model_name, text, kind) for text in texts]
+        found = self.cache.get_many(keys)
+        missing = [i for i, key in enumerate(keys) if key not in found]
+        if missing:
+            vectors = compute([texts[i] for i in missing])
+            self.cache.put_many(self.model_name, [(keys[i], vector) for i, vector in zip(missing, vectors)])
+            found.update({keys[i]: np.asarray(vector, dtype=np.float32) for i, vector in zip(missing, vectors)})
+        return [found[key].tolist() for key in keys]
+
+    def embed_documents(self, texts):
+        return self._embed(list(texts), "document", self.embeddings.embed_documents)
+
+    def embed_query(self, text):
+        return self._embed([text], "query", lambda texts: [self.embeddings.embed_query(texts[0])])[0]
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def embedding_cache():
+    """Process-wide cache instance, created on first use"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = EmbeddingCache()
+        return _shared_cache
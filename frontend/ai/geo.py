@@ -0,0 +1,121 @@
+"""Grid-bucketed spatial index for radius and nearest-neighbour restaurant lookups."""
+import math
+import re
+from collections import defaultdict
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+# ~1.1 km cells at the equator; small enough that a radius query touches few cells
+CELL_DEGREES = 0.01
+DEFAULT_RADIUS_KM = 2.0
+MAX_RADIUS_KM = 50.0
+
+RADIUS_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(km|kilometers?|kilometres?|m|meters?|metres?)\b", re.I)
+WALKING_PATTERN = re.compile(r"\bwalking distance\b", re.I)
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distance in km from one point to arrays of points"""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def parse_radius_km(text, default=DEFAULT_RADIUS_KM):
+    """Radius mentioned in a query ("within 500 m", "3km"), in km"""
+    match = RADIUS_PATTERN.search(text or "")
+    if match:
+        value, unit = float(match.group(1)), match.group(2).lower()
+        return min(value / 1000 if unit.startswith("m") else value, MAX_RADIUS_KM)
+    if WALKING_PATTERN.search(text or ""):
+        return 1.0
+    return default
+
+
+def resolve_place(text, hotels=(), places=None):
+    """Coordinates for a hotel ID/name from the trip or a known place; returns (label, lat, lon) or None.
+
+    `places` maps lower-case place names to (lat, lon), usually the destination shard's
+    reference points for "near <place>" queries.
+    """
+    lowered = (text or "").lower()
+    hotel_id = re.search(r"\b(h\d+)\b", lowered)
+    for hotel in hotels:
+        if hotel.get("lat") is None or hotel.get("lon") is None:
+            continue
+        name = hotel["name"].lower()
+        if (hotel_id and hotel["id"].lower() == hotel_id.group(1)) or (len(name) > 3 and name in lowered):
+            return hotel["name"], hotel["lat"], hotel["lon"]
+    # Longest names first so specific places win over shorter overlapping ones
+    places = places or {}
+    for place in sorted(places, key=len, reverse=True):
+        if re.search(rf"\b{re.escape(place)}\b", lowered):
+            lat, lon = places[place]
+            return place.title(), lat, lon
+    return None
+
+
+class GeoIndex:
+    """Points bucketed into a fixed lat/lon grid.
+
+    Radius queries only compute distances for points in the cells overlapping the
+    search circle; nearest-neighbour queries double the search radius until it
+    contains k matches, so the k closest inside it are the true nearest.
+    """
+
+    def __init__(self, lats, lons, cell_degrees=CELL_DEGREES):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.cell_degrees = cell_degrees
+        self.valid = np.isfinite(self.lats) & np.isfinite(self.lons)
+
+        buckets = defaultdict(list)
+        rows = np.floor(self.lats / cell_degrees)
+        cols = np.floor(self.lons / cell_degrees)
+        for i in np.flatnonzero(self.valid):
+            buckets[(int(rows[i]), int(cols[i]))].append(i)
+        self.cells = {cell: np.array(points, dtype=np.int32) for cell, points in buckets.items()}
+
+    def __len__(self):
+        return int(self.valid.sum())
+
+    def _cell(self, lat, lon):
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lon / self.cell_degrees))
+
+    def _ring_extent(self, lat, radius_km):
+        """Cells to search in each direction to cover `radius_km`"""
+        lat_cells = math.ceil(radius_km / 111.32 / self.cell_degrees)
+        lon_km = 111.32 * max(math.cos(math.radians(min(abs(lat) + radius_km / 111.32, 89.9))), 1e-6)
+        lon_cells = math.ceil(radius_km / lon_km / self.cell_degrees)
+        return lat_cells, lon_cells
+
+    def _candidates(self, lat, lon, lat_cells, lon_cells):
+        row, col = self._cell(lat, lon)
+        found = [
+            self.cells[(r, c)]
+            for r in range(row - lat_cells, row + lat_cells + 1)
+            for c in range(col - lon_cells, col + lon_cells + 1)
+            if (r, c) in self.cells
+        ]
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int32)
+
+    def within(self, lat, lon, radius_km, mask=None):
+        """Points within `radius_km`, nearest first; returns (indices, distances_km)"""
+        candidates = self._candidates(lat, lon, *self._ring_extent(lat, radius_km))
+        if mask is not None and len(candidates):
+            candidates = candidates[mask[candidates]]
+        distances = haversine_km(lat, lon, self.lats[candidates], self.lons[candidates])
+        keep = distances <= radius_km
+        candidates, distances = candidates[keep], distances[keep]
+        order = np.argsort(distances, kind="stable")
+        return candidates[order], distances[order]
+
+    def nearest(self, lat, lon, k=10, mask=None, max_radius_km=MAX_RADIUS_KM):
+        """The k nearest points (optionally only those in `mask`); returns (indices, distances_km)"""
+        radius = self.cell_degrees * 111.32
+        while True:
+            indices, distances = self.within(lat, lon, radius, mask)
+            if len(indices) >= k or radius >= max_radius_km:
+                return indices[:k], distances[:k]
+            radius = min(radius * 2, max_radius_km)
@@ -0,0 +1,164 @@
+"""Incremental parsing of large JSON datasets (a JSON array or NDJSON) from byte chunks."""
+import codecs
+import json
+import os
+import queue
+import threading
+import zlib
+
+READ_CHUNK_SIZE = 256 * 1024
+# A single record larger than this means the input is not a record stream
+MAX_RECORD_CHARS = 16 * 1024 * 1024
+
+
+def gunzip_chunks(chunks):
+    """Decompress a stream of gzip byte chunks without holding the whole file"""
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+    if not decompressor.eof:
+        raise ValueError("Truncated gzip stream")
+
+
+def iter_json_records(chunks):
+    """Yield the records of a top-level JSON array or of NDJSON, one at a time.
+
+    `chunks` yields bytes (UTF-8) or str pieces of any size. Only the record being
+    parsed is buffered, so memory stays bounded by the largest record rather than
+    the whole dataset.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer, pos = "", 0
+    array = None
+    finished = False
+    chunks = iter(chunks)
+
+    def more():
+        nonlocal buffer, pos
+        chunk = next(chunks, None)
+        if chunk is None:
+            buffer += text.decode(b"", final=True)
+            return False
+        buffer = buffer[pos:] + (text.decode(chunk) if isinstance(chunk, bytes) else chunk)
+        pos = 0
+        return True
+
+    while True:
+        # Skip whitespace and, inside an array, the separating commas
+        while pos < len(buffer) and (buffer[pos].isspace() or (array and buffer[pos] == ",")):
+            pos += 1
+        if pos == len(buffer):
+            if finished or not more():
+                finished = True
+                if array:
+                    raise ValueError("Unterminated JSON array")
+                return
+            continue
+        if array is None:
+            array = buffer[pos] == "["
+            if array:
+                pos += 1
+            continue
+        if array and buffer[pos] == "]":
+            return
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            # Most likely the record continues in the next chunk
+            if finished or not more():
+                finished = True
+                raise ValueError(f"Invalid JSON record: {e}") from e
+            if len(buffer) > MAX_RECORD_CHARS:
+                raise ValueError(f"JSON record larger than {MAX_RECORD_CHARS} characters") from e
+            continue
+        pos = end
+        yield record
+
+
+def iter_json_file(path, chunk_size=READ_CHUNK_SIZE):
+    """Stream the records of a JSON array or NDJSON file (gzip-compressed if it ends in .gz)"""
+    with open(path, "rb") as f:
+        chunks = iter(lambda: f.read(chunk_size), b"")
+        if path.endswith(".gz"):
+            chunks = gunzip_chunks(chunks)
+        yield from iter_json_records(chunks)
+
+
+def read_ahead(iterable, max_items=16):
+    """Iterate `iterable` on a background thread, keeping up to `max_items` ready.
+
+    Lets a slow producer (the network) keep going while the consumer is busy, with
+    the bounded queue capping how much is held in memory.
+    """
+    items = queue.Queue(maxsize=max_items)
+    done = object()
+    stop = threading.Event()
+
+    def put(entry):
+        # Never block for good: the consumer may have stopped reading
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except Exception as e:
+            put((done, e))
+
+    threading.Thread(target=produce, name="read-ahead", daemon=True).start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+class JsonArrayWriter:
+    """Writes records one by one as a JSON array file, replacing `path` only on success"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = None
+
+    def __enter__(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path + ".tmp", "w", encoding="utf-8")
+        self._file.write("[")
+        return self
+
+    def write(self, record):
+        self._file.write(",\n" if self.count else "\n")
+        json.dump(record, self._file, ensure_ascii=False)
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self._file.write("\n]\n")
+            self._file.close()
+            os.replace(self.path + ".tmp", self.path)
+        else:
+            self._file.close()
+            os.remove(self.path + ".tmp")
+        return False
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import numpy as np
+from dotenv import load_dotenv
+from ai.models import MODEL_NAME, TEMPERATURE
+
+load_dotenv()
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+# Semantic lookups compare against at most this many recently used entries
+LLM_CACHE_SEMANTIC_SCAN = int(os.getenv("LLM_CACHE_SEMANTIC_SCAN", "2000"))
+
+
+def normalize_prompt(text):
+    """Normalize a prompt so trivially different resubmissions share a cache key"""
+    text = text.lower().strip()
+    text = re.sub(r"\s+", " ", text)
+    return text.strip(" .!?")
+
+
+class LLMCache:
+    """Disk-backed LLM response cache shared across Streamlit sessions and processes.
+
+    Entries are keyed on (namespace, model name, temperature, normalized prompt) and
+    evicted least-recently-used once the entry count or total size limit is exceeded.
+    When an embeddings object is supplied, lookups made with `semantic=True` fall back
+    to near-duplicate matching on prompt embeddings above `similarity_threshold`.
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH, max_entries=LLM_CACHE_MAX_ENTRIES,
+                 max_bytes=LLM_CACHE_MAX_BYTES, embeddings=None, similarity_threshold=0.98,
+                 semantic_scan=LLM_CACHE_SEMANTIC_SCAN):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.semantic_scan = semantic_scan
+        self._local = threading.local()
+        self._init_db()
+
+    def _connection(self):
+        # sqlite connections cannot be shared between threads, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._connection()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    namespace TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    embedding BLOB,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_access ON entries(last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    @staticmethod
+    def make_key(namespace, prompt, model_name=MODEL_NAME, temperature=TEMPERATURE):
+        """Cache key for a prompt; includes the model name and temperature"""
+        raw = json.dumps([namespace, model_name, temperature, normalize_prompt(prompt)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _bump(self, conn, name):
+        conn.execute(
+            "INSERT INTO stats(name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,)
+        )
+
+    def _embed(self, prompt):
+        try:
+            return self.embeddings.embed_query(normalize_prompt(prompt))
+        except Exception as e:
+            print(f"Error embedding prompt for cache: {e}")
+            return None
+
+    def get(self, namespace, prompt, semantic=False, model_name=MODEL_NAME, temperature=TEMPERATURE):
+        """Return the cached value for a prompt, or None on a miss"""
+        key = self.make_key(namespace, prompt, model_name, temperature)
+        conn = self._connection()
+        with conn:
+            row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row:
+                conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+                self._bump(conn, "hits")
+                return json.loads(row[0])
+
+        if semantic and self.embeddings is not None:
+            match = self._semantic_lookup(namespace, prompt, f"{model_name}@{temperature}")
+            if match is not None:
+                return match
+
+        with conn:
+            self._bump(conn, "misses")
+        return None
+
+    def _semantic_lookup(self, namespace, prompt, model):
+        vector = self._embed(prompt)
+        if vector is None:
+            return None
+        conn = self._connection()
+        rows = conn.execute(
+            "SELECT key, embedding FROM entries WHERE namespace = ? AND model = ? AND embedding IS NOT NULL "
+            "ORDER BY last_access DESC LIMIT ?",
+            (namespace, model, self.semantic_scan)
+        ).fetchall()
+        rows = [(key, blob) for key, blob in rows if len(blob) == len(vector) * 4]
+        if not rows:
+            return None
+        matrix = np.frombuffer(b"".join(blob for _, blob in rows), dtype=np.float32).reshape(len(rows), -1)
+        query = np.asarray(vector, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        scores = np.divide(matrix @ query, norms, out=np.zeros(len(rows), dtype=np.float32), where=norms > 0)
+        best = int(np.argmax(scores))
+        best_key, best_score = rows[best][0], float(scores[best])
+        if best_key is None or best_score < self.similarity_threshold:
+            return None
+        with conn:
+            row = conn.execute("SELECT value FROM entries WHERE key = ?", (best_key,)).fetchone()
+            if not row:
+                return None
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), best_key))
+            self._bump(conn, "semantic_hits")
+        return json.loads(row[0])
+
+    def set(self, namespace, prompt, value, semantic=False, model_name=MODEL_NAME, temperature=TEMPERATURE):
+        """Store a JSON-serializable value for a prompt and evict old entries if needed"""
+        key = self.make_key(namespace, prompt, model_name, temperature)
+        payload = json.dumps(value, default=str)
+        embedding = None
+        if semantic and self.embeddings is not None:
+            vector = self._embed(prompt)
+            if vector is not None:
+                embedding = np.asarray(vector, dtype=np.float32).tobytes()
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries(key, namespace, model, value, embedding, size, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, namespace, f"{model_name}@{temperature}", payload, embedding,
+                 len(payload) + len(embedding or b""), now, now)
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        """Drop least-recently-used entries until both size limits hold"""
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        while count > self.max_entries or total > self.max_bytes:
+            excess = max(count - self.max_entries, 1)
+            rows = conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_access LIMIT ?", (excess,)
+            ).fetchall()
+            if not rows:
+                break
+            conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in rows])
+            count -= len(rows)
+            total -= sum(size for _, size in rows)
+            for _ in rows:
+                self._bump(conn, "evictions")
+
+    def cached(self, namespace, prompt, compute, semantic=False, model_name=MODEL_NAME):
+        """Return the cached value for a prompt, computing and storing it on a miss.
+
+        `model_name` must name the model `compute` calls, so answers from different
+        models never share an entry.
+        """
+        value = self.get(namespace, prompt, semantic=semantic, model_name=model_name)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.set(namespace, prompt, value, semantic=semantic, model_name=model_name)
+        return value
+
+    def stats(self):
+        """Hit-rate statistics shared by every process using this cache file"""
+        conn = self._connection()
+        counters = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        hits = counters.get("hits", 0) + counters.get("semantic_hits", 0)
+        lookups = hits + counters.get("misses", 0)
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {
+            "hits": counters.get("hits", 0),
+            "semantic_hits": counters.get("semantic_hits", 0),
+            "misses": counters.get("misses", 0),
+            "evictions": counters.get("evictions", 0),
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": count,
+            "bytes": total,
+        }
+
+
+def _default_embeddings():
+    """Embeddings for near-duplicate matching, enabled with LLM_CACHE_SEMANTIC=1"""
+    if os.getenv("LLM_CACHE_SEMANTIC", "").lower() not in ("1", "true", "yes"):
+        return None
+    from langchain_ollama import OllamaEmbeddings
+    from ai.embedding_cache import CachedEmbeddings
+    return CachedEmbeddings(OllamaEmbeddings(model="nomic-embed-text"), "nomic-embed-text")
+
+
+# Process-wide cache instance
+llm_cache = LLMCache(embeddings=_default_embeddings())
@@ -0,0 +1,142 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+from langchain.memory import ConversationBufferMemory
+from langchain.memory.chat_memory import BaseChatMemory
+from langchain_core.messages import AIMessage, get_buffer_string
+from pydantic import PrivateAttr
+from dotenv import load_dotenv
+from ai.models import model
+from ai.streaming import chunk_text
+from ai.tokens import estimate_tokens
+
+load_dotenv()
+
+# "window" keeps the last turns plus a rolling summary; "buffer" keeps the whole conversation
+MEMORY_MODE = os.getenv("ASSISTANT_MEMORY_MODE", "window")
+MEMORY_WINDOW_TURNS = int(os.getenv("ASSISTANT_MEMORY_WINDOW_TURNS", "4"))
+
+SUMMARY_PROMPT = """Progressively summarize the lines of conversation provided, adding onto the previous summary and returning a new summary. Keep concrete facts the traveler decided or asked about (places, dates, prices, preferences) and keep it under 150 words.
+
+Current summary:
+{summary}
+
+New lines of conversation:
+{new_lines}
+
+New summary:"""
+
+# Shared by every session; summaries are short and run one at a time per memory
+_summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="memory-summary")
+
+
+class RollingSummaryMemory(BaseChatMemory):
+    """Bounded conversation memory for long chats.
+
+    Keeps the pinned travel context, a rolling summary of older turns and the last
+    `k` turns verbatim, so prompt size stays roughly flat as the conversation grows.
+    Turns that fall out of the window are folded into the summary in the background.
+    """
+
+    llm: Any
+    pinned_context: str = ""
+    k: int = MEMORY_WINDOW_TURNS
+    summary: str = ""
+    memory_key: str = "history"
+    human_prefix: str = "Human"
+    ai_prefix: str = "AI"
+    turn_metrics: List[Dict[str, int]] = []
+
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _pending: list = PrivateAttr(default_factory=list)
+    _summarizing: bool = PrivateAttr(default=False)
+
+    @property
+    def memory_variables(self) -> List[str]:
+        return [self.memory_key]
+
+    def _messages(self):
+        # The summary rides in the pinned AI message: chat models reject system messages mid-conversation
+        pinned = "\n\n".join(part for part in (
+            self.pinned_context,
+            f"Summary of the earlier conversation: {self.summary}" if self.summary else "",
+        ) if part)
+        messages = [AIMessage(content=pinned)] if pinned else []
+        messages.extend(self.chat_memory.messages)
+        return messages
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        messages = self._messages()
+        if self.return_messages:
+            return {self.memory_key: messages}
+        return {self.memory_key: get_buffer_string(messages, human_prefix=self.human_prefix, ai_prefix=self.ai_prefix)}
+
+    def _record_turn(self):
+        """Record the size of the memory the next turn will load"""
+        buffer = get_buffer_string(self._messages(), human_prefix=self.human_prefix, ai_prefix=self.ai_prefix)
+        metrics = {
+            "turn": len(self.turn_metrics) + 1,
+            "memory_tokens": estimate_tokens(buffer),
+            "verbatim_messages": len(self.chat_memory.messages),
+            "summary_tokens": estimate_tokens(self.summary),
+        }
+        self.turn_metrics.append(metrics)
+        print(f"Memory turn {metrics['turn']}: {metrics['memory_tokens']} tokens "
+              f"({metrics['verbatim_messages']} verbatim messages, summary {metrics['summary_tokens']} tokens)")
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        super().save_context(inputs, outputs)
+        messages = self.chat_memory.messages
+        overflow = len(messages) - 2 * self.k
+        if overflow <= 0:
+            self._record_turn()
+            return
+        evicted, self.chat_memory.messages = messages[:overflow], messages[overflow:]
+        self._record_turn()
+        with self._lock:
+            self._pending.extend(evicted)
+            if self._summarizing:
+                return  # the running summarizer picks up the new messages
+            self._summarizing = True
+        _summary_executor.submit(self._summarize_pending)
+
+    def _summarize_pending(self):
+        """Fold evicted turns into the rolling summary until nothing is pending"""
+        while True:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                if not pending:
+                    self._summarizing = False
+                    return
+            new_lines = get_buffer_string(pending, human_prefix=self.human_prefix, ai_prefix=self.ai_prefix)
+            try:
+                response = self.llm.invoke(SUMMARY_PROMPT.format(summary=self.summary or "(none)", new_lines=new_lines))
+                self.summary = chunk_text(response).strip()
+            except Exception as e:
+                print(f"Error summarizing conversation: {str(e)}")
+                with self._lock:
+                    self._pending = pending + self._pending
+                    self._summarizing = False
+                return
+
+    def clear(self) -> None:
+        super().clear()
+        self.summary = ""
+        with self._lock:
+            self._pending = []
+
+
+def create_memory(travel_context_message, memory_key="history", return_messages=False):
+    """Create conversation memory for an assistant, with the travel context always present"""
+    if MEMORY_MODE == "buffer":
+        memory = ConversationBufferMemory(memory_key=memory_key, return_messages=return_messages)
+        memory.chat_memory.add_ai_message(travel_context_message)
+        return memory
+    return RollingSummaryMemory(
+        llm=model,
+        pinned_context=travel_context_message,
+        k=MEMORY_WINDOW_TURNS,
+        memory_key=memory_key,
+        return_messages=return_messages,
+    )
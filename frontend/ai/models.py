@@ -3,4 +3,11 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-model = ChatAnthropic(model="claude-3-5-sonnet-20241022", temperature=0)
+MODEL_NAME = "claude-3-5-sonnet-20241022"
+TEMPERATURE = 0
+
+model = ChatAnthropic(model=MODEL_NAME, temperature=TEMPERATURE)
+
+# Small, fast model for classification-style calls such as research question routing
+ROUTER_MODEL_NAME = "claude-3-5-haiku-20241022"
+router_model = ChatAnthropic(model=ROUTER_MODEL_NAME, temperature=0, max_tokens=5)
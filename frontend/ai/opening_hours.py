@@ -0,0 +1,185 @@
+"""Opening hours parsed into per-weekday minute intervals for "open at / open late" queries."""
+import re
+from datetime import datetime
+import numpy as np
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+# "Open late" means still open at this time
+LATE_NIGHT_MINUTES = 22 * 60
+# Times before this in "open after/until" queries belong to the night before
+EARLY_MORNING_MINUTES = 6 * 60
+
+TIME_PATTERN = r"(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm|a\.m\.|p\.m\.)?"
+RANGE_PATTERN = re.compile(TIME_PATTERN + r"\s*(?:-|–|—|to)\s*" + TIME_PATTERN, re.I)
+CLOSED_PATTERN = re.compile(r"\bclosed\b", re.I)
+ALL_DAY_PATTERN = re.compile(r"\b(open 24 hours|24 hours|24/7)\b", re.I)
+
+OPEN_NOW_PATTERN = re.compile(r"\bopen now\b|\bopen right now\b|\bcurrently open\b", re.I)
+LATE_PATTERN = re.compile(r"\b(open late|late[\s-]night|late dinner|late supper)\b", re.I)
+AFTER_MIDNIGHT_PATTERN = re.compile(r"\bafter midnight\b", re.I)
+OPEN_AFTER_PATTERN = re.compile(r"\bopen (after|past|until|till)\s+(midnight|noon|" + TIME_PATTERN + r")", re.I)
+OPEN_AT_PATTERN = re.compile(r"\bopen (?:at|by|for)\s+(midnight|noon|breakfast|lunch|dinner|" + TIME_PATTERN + r")", re.I)
+DAY_PATTERN = re.compile(r"\b(" + "|".join(WEEKDAYS) + r"|today|tonight|tomorrow)\b", re.I)
+MEAL_MINUTES = {"breakfast": 8 * 60, "lunch": 12 * 60 + 30, "dinner": 19 * 60, "noon": 12 * 60, "midnight": 0}
+
+
+def _to_minutes(hour, minute, meridiem):
+    hour, minute = int(hour), int(minute or 0)
+    if meridiem:
+        meridiem = meridiem.lower().replace(".", "")
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    return hour * 60 + minute
+
+
+def _weekday(name):
+    """Index of a day name or abbreviation ("Mon", "Tuesday"), or None"""
+    name = name.strip().lower()[:3]
+    return next((i for i, day in enumerate(WEEKDAYS) if day.startswith(name)), None) if len(name) == 3 else None
+
+
+def parse_day_hours(text):
+    """Parse one day's hours ("11 AM–2:30 PM, 5–10 PM") into [(start, end)] minutes.
+
+    Intervals past midnight keep an end beyond 1440 (6 PM–2 AM -> (1080, 1560)).
+    """
+    if isinstance(text, (list, tuple)):
+        text = ", ".join(str(t) for t in text)
+    text = re.sub(r"\s+", " ", str(text or "").replace("\u202f", " ").replace("\u2009", " "))
+    if ALL_DAY_PATTERN.search(text):
+        return [(0, MINUTES_PER_DAY)]
+    if CLOSED_PATTERN.search(text) and not RANGE_PATTERN.search(text):
+        return []
+
+    intervals = []
+    for match in RANGE_PATTERN.finditer(text):
+        start_hour, start_minute, start_meridiem, end_hour, end_minute, end_meridiem = match.groups()
+        end = _to_minutes(end_hour, end_minute, end_meridiem)
+        if start_meridiem or not end_meridiem:
+            start = _to_minutes(start_hour, start_minute, start_meridiem)
+        else:
+            # "5–10 PM" shares the end's meridiem unless that would start after the end ("11–2 PM")
+            start = _to_minutes(start_hour, start_minute, end_meridiem)
+            if start > end:
+                start = _to_minutes(start_hour, start_minute, "am" if end_meridiem.lower().startswith("p") else "pm")
+        if end <= start:
+            end += MINUTES_PER_DAY
+        intervals.append((start, end))
+    return intervals
+
+
+def parse_open_hours(open_hours):
+    """Parse a restaurant's `open_hours` mapping into 7 per-weekday interval lists (None if unknown)"""
+    if not isinstance(open_hours, dict) or not open_hours:
+        return None
+    week = [[] for _ in WEEKDAYS]
+    known = False
+    for day, hours in open_hours.items():
+        days = [_weekday(part) for part in re.split(r"\s*(?:-|–|to)\s*", str(day))]
+        if None in days:
+            continue
+        if len(days) == 2:
+            # Day ranges such as "Mon-Fri"
+            days = [(days[0] + offset) % 7 for offset in range((days[1] - days[0]) % 7 + 1)]
+        known = True
+        for index in days:
+            week[index].extend(parse_day_hours(hours))
+    return week if known else None
+
+
+def parse_time_filters(query, now=None):
+    """Derive opening-time filters from a query: {"open_at": (day, minute)} or {"open_after": ...}
+
+    `now` should be the current time at the destination (see `restaurant_shards.shard_now`);
+    it defaults to the server's local time.
+    """
+    now = now or datetime.now()
+    day = now.weekday()
+    day_match = DAY_PATTERN.search(query)
+    if day_match:
+        word = day_match.group(1).lower()
+        if word == "tomorrow":
+            day = (day + 1) % 7
+        elif word in WEEKDAYS:
+            day = WEEKDAYS.index(word)
+
+    if OPEN_NOW_PATTERN.search(query):
+        return {"open_at": (now.weekday(), now.hour * 60 + now.minute)}
+    match = OPEN_AT_PATTERN.search(query)
+    if match:
+        word = match.group(1).lower()
+        minute = MEAL_MINUTES[word] if word in MEAL_MINUTES else _to_minutes(*match.groups()[1:4])
+        return {"open_at": (day, minute)}
+    match = OPEN_AFTER_PATTERN.search(query)
+    if match:
+        verb, word = match.group(1).lower(), match.group(2).lower()
+        if word == "midnight":
+            # "until midnight" means open at 23:59, "after midnight" means open into the next day
+            minute = MINUTES_PER_DAY - 1 if verb in ("until", "till") else MINUTES_PER_DAY
+        elif word in MEAL_MINUTES:
+            minute = MEAL_MINUTES[word]
+        else:
+            hour, minute_part, meridiem = match.groups()[2:5]
+            # "open after 11" without am/pm in a dining context means the evening
+            minute = _to_minutes(hour, minute_part, meridiem or ("pm" if int(hour) < 12 else None))
+            if minute < EARLY_MORNING_MINUTES:
+                # "open till 2am" continues into the next morning
+                minute += MINUTES_PER_DAY
+        return {"open_after": (day, minute)}
+    if AFTER_MIDNIGHT_PATTERN.search(query):
+        return {"open_after": (day, MINUTES_PER_DAY)}
+    if LATE_PATTERN.search(query):
+        return {"open_after": (day, LATE_NIGHT_MINUTES)}
+    return {}
+
+
+class OpeningHoursIndex:
+    """Flat arrays of weekly opening intervals, so a time query is one vectorized scan.
+
+    Each interval is stored as [start, end) minutes since Monday 00:00; intervals that
+    run past Sunday midnight are split so they also match early Monday queries.
+    """
+
+    def __init__(self, restaurants):
+        owners, starts, ends = [], [], []
+        self.known = np.zeros(len(restaurants), dtype=bool)
+        for i, restaurant in enumerate(restaurants):
+            week = parse_open_hours(restaurant.get("open_hours"))
+            if week is None:
+                continue
+            self.known[i] = True
+            for day, intervals in enumerate(week):
+                for start, end in intervals:
+                    start, end = day * MINUTES_PER_DAY + start, day * MINUTES_PER_DAY + end
+                    pieces = [(start, min(end, MINUTES_PER_WEEK))]
+                    if end > MINUTES_PER_WEEK:
+                        pieces.append((0, end - MINUTES_PER_WEEK))
+                    for piece_start, piece_end in pieces:
+                        owners.append(i)
+                        starts.append(piece_start)
+                        ends.append(piece_end)
+        self.owners = np.array(owners, dtype=np.int32)
+        self.starts = np.array(starts, dtype=np.int32)
+        self.ends = np.array(ends, dtype=np.int32)
+        self.size = len(restaurants)
+
+    def _mask(self, hits):
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.owners[hits]] = True
+        return mask
+
+    def open_at(self, day, minute):
+        """Restaurants open at `minute` (0-1439) on weekday `day` (0 = Monday)"""
+        t = day * MINUTES_PER_DAY + minute
+        return self._mask((self.starts <= t) & (self.ends > t))
+
+    def open_after(self, day, minute):
+        """Restaurants that opened on weekday `day` and are still open at or after `minute`.
+
+        `minute` may exceed 1439: "after midnight" on Friday is 1440 on day 4.
+        """
+        if minute >= MINUTES_PER_DAY:
+            return self.open_at((day + 1) % 7, minute - MINUTES_PER_DAY)
+        t = day * MINUTES_PER_DAY + minute
+        return self._mask((self.ends > t) & (self.starts < (day + 1) * MINUTES_PER_DAY))
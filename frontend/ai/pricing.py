@@ -0,0 +1,143 @@
+"""Deterministic trip price calculations over normalized flight and hotel records."""
+from datetime import datetime, date
+
+# Units of each currency per 1 USD; refresh periodically, no network lookups at runtime
+EXCHANGE_RATES = {
+    "USD": 1.0,
+    "EUR": 0.92,
+    "GBP": 0.79,
+    "JPY": 151.0,
+    "THB": 36.0,
+    "INR": 83.0,
+    "CAD": 1.36,
+    "AUD": 1.52,
+    "SGD": 1.35,
+    "CNY": 7.2,
+    "HKD": 7.8,
+    "KRW": 1350.0,
+    "MXN": 17.0,
+    "CHF": 0.9,
+    "AED": 3.67,
+}
+
+DATE_FORMATS = ("%B %d, %Y", "%b %d, %Y", "%Y-%m-%d")
+
+
+def parse_date(value):
+    """Parse a trip date like "May 2, 2025" (or a date/datetime) into a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def nights_between(check_in, check_out):
+    """Number of nights between check-in and check-out, or None if unknown"""
+    start, end = parse_date(check_in), parse_date(check_out)
+    if not start or not end or end <= start:
+        return None
+    return (end - start).days
+
+
+def convert(amount, from_currency, to_currency="USD"):
+    """Convert an amount between currencies using the local rates table"""
+    if amount is None:
+        return None
+    from_currency = (from_currency or "USD").upper()
+    to_currency = (to_currency or "USD").upper()
+    if from_currency == to_currency:
+        return amount
+    if from_currency not in EXCHANGE_RATES or to_currency not in EXCHANGE_RATES:
+        return None
+    return amount / EXCHANGE_RATES[from_currency] * EXCHANGE_RATES[to_currency]
+
+
+def flight_total(legs, travelers=1, currency="USD"):
+    """Flight cost for all travelers.
+
+    Google Flights lists the round-trip fare on each leg, so the trip price is the
+    maximum of the leg prices, not their sum.
+    """
+    prices = [convert(leg["price"], leg.get("currency"), currency) for leg in legs]
+    prices = [price for price in prices if price is not None]
+    if not prices:
+        return None
+    return max(prices) * travelers
+
+
+def hotel_stay_total(hotel, nights, rooms=1, currency="USD"):
+    """Stay cost: per-night price × nights × rooms, converted to `currency`"""
+    per_night = convert(hotel.get("price_per_night"), hotel.get("currency"), currency)
+    if per_night is None or nights is None:
+        return None
+    return per_night * nights * rooms
+
+
+def build_price_breakdown(flights, hotels, check_in, check_out, rooms=1, travelers=1,
+                          currency="USD", max_hotels=5):
+    """Precompute every number the trip summary needs"""
+    nights = nights_between(check_in, check_out)
+    flights_cost = flight_total(flights, travelers, currency)
+
+    priced = []
+    for hotel in hotels:
+        stay = hotel_stay_total(hotel, nights, rooms, currency)
+        priced.append({
+            "id": hotel["id"],
+            "name": hotel["name"],
+            "rating": hotel.get("rating"),
+            "per_night": convert(hotel.get("price_per_night"), hotel.get("currency"), currency),
+            "stay_total": stay,
+            "trip_total": stay + flights_cost if stay is not None and flights_cost is not None else None,
+        })
+
+    with_price = [h for h in priced if h["stay_total"] is not None]
+    cheapest = min(with_price, key=lambda h: (h["stay_total"], h["name"]), default=None)
+    best_rated = max(
+        (h for h in with_price if h["rating"] is not None),
+        key=lambda h: (h["rating"], -h["stay_total"]),
+        default=None,
+    )
+    shortlist = sorted(with_price, key=lambda h: (-(h["rating"] or 0), h["stay_total"], h["name"]))[:max_hotels]
+    return {
+        "currency": currency,
+        "nights": nights,
+        "rooms": rooms,
+        "travelers": travelers,
+        "flight_total": flights_cost,
+        "hotels": shortlist,
+        "cheapest_hotel": cheapest,
+        "best_rated_hotel": best_rated,
+    }
+
+
+def _money(amount, currency):
+    return "n/a" if amount is None else f"{amount:,.2f} {currency}"
+
+
+def format_price_breakdown(breakdown):
+    """Render a price breakdown as plain lines for the summary prompt"""
+    currency = breakdown["currency"]
+    lines = [
+        f"Nights: {breakdown['nights'] if breakdown['nights'] is not None else 'unknown'}",
+        f"Rooms: {breakdown['rooms']}, travelers: {breakdown['travelers']}",
+        f"Flight total (all travelers): {_money(breakdown['flight_total'], currency)}",
+        "Hotels (per night | stay total | trip total incl. flights):",
+    ]
+    for hotel in breakdown["hotels"]:
+        rating = f", {hotel['rating']}★" if hotel["rating"] is not None else ""
+        lines.append(
+            f"- [{hotel['id']}] {hotel['name']}{rating}: {_money(hotel['per_night'], currency)} | "
+            f"{_money(hotel['stay_total'], currency)} | {_money(hotel['trip_total'], currency)}"
+        )
+    if breakdown["cheapest_hotel"]:
+        lines.append(f"Cheapest stay: [{breakdown['cheapest_hotel']['id']}] {breakdown['cheapest_hotel']['name']}")
+    if breakdown["best_rated_hotel"]:
+        lines.append(f"Best rated: [{breakdown['best_rated_hotel']['id']}] {breakdown['best_rated_hotel']['name']}")
+    return "\n".join(lines)
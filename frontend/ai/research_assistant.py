@@ -1,65 +1,90 @@
 from langchain.agents import initialize_agent, Tool, AgentType
-from langchain_community.tools import DuckDuckGoSearchRun
-from langchain.memory import ConversationBufferMemory
-from langchain_chroma import Chroma
 from langchain_ollama import OllamaEmbeddings
-from ai.context import generate_travel_context_memory
+from langchain_core.messages import HumanMessage, SystemMessage
+from ai.context import generate_travel_context_memory, lookup_trip_details, trip_details_query
+from ai.embedding_cache import CachedEmbeddings
+from ai.geo import MAX_RADIUS_KM, parse_radius_km, resolve_place
+from ai.memory import create_memory
+from ai.airports import lookup_airport
+from ai.restaurant_index import EMBEDDING_MODEL
+from ai.restaurants import render_restaurant_document, restaurant_id
+from ai.restaurant_render import RESTAURANT_RESULT_TOKEN_BUDGET, render_restaurant_results
+from ai.restaurant_shards import restaurant_shards, shard_for_destination, shard_label, shard_now, shard_profile
+from ai.results import normalize_hotels
 from dotenv import load_dotenv
-from ai.models import model
-import json
-import os
-import chromadb
+from ai.models import model, router_model
+from ai.router import TRIP_TOOL, LLMCallCounter, Route, RouterStats, route_question
+from util.resources import web_search
+from util.tracing import span
+from ai.streaming import chunk_text, format_agent_step, stream_text
+from ai.tokens import truncate_to_tokens
+import re
 
 load_dotenv()
 
+router_stats = RouterStats()
+
 
 class ResearchAssistant:
-    embeddings = OllamaEmbeddings(
-            model="nomic-embed-text"
-        )
-    vector_store = None
-    
-    @staticmethod
-    def _clean_metadata_value(value):
-        """Clean metadata values to ensure they are valid types"""
-        if value is None:
-            return ""
-        if isinstance(value, (str, int, float, bool)):
-            return value
-        return str(value)
+    embeddings = None
     
     def __init__(self, context):
         # Initialize the language model
         self.context = context
         self.llm = model
         
-        # Initialize the search tool
-        search = DuckDuckGoSearchRun()
+        # Restaurant data comes from the shard for the trip's destination, loaded in the background
+        airport = lookup_airport(context.get('destination'))
+        self.destination_name = airport[1] if airport else (context.get('destination') or "your destination")
+        self.shard_name = shard_for_destination(context.get('destination'))
+        restaurant_area = shard_label(self.shard_name) if self.shard_name else self.destination_name
+        restaurant_shards.prefetch(self.shard_name)
+        # Reference points for "near <place>" come with the shard
+        self.places = shard_profile(self.shard_name).get("places", {})
+        area_example = next(iter(self.places), "old town").title()
+        
+        # Cached, deduplicated search shared by every assistant in the process
+        search = web_search()
         
         # Define tools
         self.tools = [
             Tool(
                 name="Search",
-                func=search.run,
-                description="Useful for searching information about travel destinations, attractions, local customs, and travel tips"
+                func=search,
+                description=f"Useful for searching information about travel destinations, attractions, local customs, and travel tips. To look up several independent things at once, separate the queries with ';' (e.g. '{self.destination_name} weather in May; {self.destination_name} visa rules')"
             ),
             Tool(
                 name="Restaurant_Info",
                 func=self.query_restaurant_data,
-                description="Use this to get information about restaurants in Thailand including location, ratings, opening hours, and services"
+                description=f"Use this to get information about restaurants in {restaurant_area} including location, ratings, opening hours, and services. Opening times in the question are applied as filters, e.g. 'open now', 'open late', 'open after 11pm on Friday', 'open for breakfast on Sunday'"
+            ),
+            Tool(
+                name="Restaurant_Details",
+                func=self.restaurant_details,
+                description="Use this to get the full record (all opening hours, phone, website, services, exact location) of restaurants returned earlier: pass their IDs, e.g. 'R1, R3'"
+            ),
+            Tool(
+                name="Restaurants_Nearby",
+                func=self.query_restaurants_nearby,
+                description=f"Use this to find restaurants near a place: pass a hotel ID (e.g. H1), hotel name, restaurant name or area (e.g. {area_example}), optionally with a distance ('within 500 m') and filters ('highly rated seafood')"
+            ),
+            Tool(
+                name="Trip_Details",
+                func=lambda query: lookup_trip_details(self.context, query),
+                description="Use this to get full details of the booked trip: pass a hotel ID (e.g. H1) or hotel name for that hotel, or 'flights' for the flight details"
             )
         ]
+        self.tools_by_name = {tool.name: tool for tool in self.tools}
+        self.result_ids = {}
+        self.results_by_id = {}
         
         # Initialize conversation memory
-        self.memory = ConversationBufferMemory(
+        self.memory = create_memory(
+            generate_travel_context_memory(self.context),
             memory_key="chat_history",
             return_messages=True
         )
         
-        self.memory.chat_memory.add_ai_message(
-            generate_travel_context_memory(self.context)
-        )
-        
         # Initialize the agent
         self.agent = initialize_agent(
             self.tools,
@@ -71,172 +96,211 @@ class ResearchAssistant:
         )
         
         # Set initial system message
-        self.system_message = """You are a travel research assistant specializing in Thailand. 
+        self.system_message = f"""You are a travel research assistant for a trip to {self.destination_name}. 
         Help users learn about local restaurants, attractions, travel tips, and other travel-related information. 
-        Use the Restaurant_Info tool to find specific details about restaurants in Thailand, and the search tool 
+        Use the Restaurant_Info tool to find specific details about restaurants in {restaurant_area}, the Restaurants_Nearby 
+        tool for restaurants close to a hotel or area, and the search tool 
         for general travel information. Always be helpful and informative."""
     
-    @classmethod  
-    def _initialize_vector_store(cls):
-        """Initialize and populate the vector store with restaurant data"""
-        print("Starting vector store initialization...")
-        
-        # Configure Chroma settings
-        client_settings = chromadb.Settings(
-            anonymized_telemetry=False,
-            is_persistent=True
-        )
-        
-        # Check if vector store already exists
-        if os.path.exists("restaurant_db"):
-            print("Found existing restaurant_db, loading...")
-            cls.vector_store = Chroma(
-                persist_directory="restaurant_db",
-                embedding_function=cls.embeddings,
-                client_settings=client_settings
-            )
-            return cls.vector_store
-        
-        # Load restaurant data
-        try:
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            data_path = os.path.join(current_dir, '..', 'data', 'thailand_restaurants.json')
-            print(f"Loading restaurant data from: {data_path}")
-            
-            with open(data_path, 'r', encoding='utf-8') as f:
-                restaurants_data = json.load(f)
-                total = len(restaurants_data)
-                print(f"Successfully loaded {total} restaurants")
-        except FileNotFoundError as e:
-            print(f"Error: Could not find restaurant data file: {e}")
-            return None
-        except json.JSONDecodeError as e:
-            print(f"Error: Invalid JSON in restaurant data: {e}")
-            return None
-        
-        # Prepare documents for vector store
-        documents = []
-        metadatas = []
-        
-        for i, restaurant in enumerate(restaurants_data):
-            # Show progress every 10%
-            if i % (total // 10) == 0:
-                print(f"Processing restaurants: {(i/total)*100:.1f}% complete...")
-            
-            # Format opening hours
-            open_hours = ""
-            if restaurant.get('open_hours'):
-                for day, hours in restaurant['open_hours'].items():
-                    open_hours += f"{day}: {hours}\n"
-            
-            # Create a detailed text description for each restaurant
-            text = f"""
-            Name: {restaurant.get('name', 'N/A')}
-            Category: {restaurant.get('category', 'N/A')}
-            Address: {restaurant.get('address', 'N/A')}
-            Rating: {restaurant.get('rating', 'N/A')} ({restaurant.get('reviews_count', 0)} reviews)
-            Opening Hours:
-            {open_hours}
-            Current Status: {restaurant.get('open_hours_updated', 'N/A')}
-            Phone: {restaurant.get('phone_number', 'N/A')}
-            Website: {restaurant.get('open_website', 'N/A')}
-            Price Range: {restaurant.get('price_range', 'N/A')}
-            Services: {str(restaurant.get('services_provided', 'N/A'))}
-            Location: Lat {restaurant.get('lat', 'N/A')}, Lon {restaurant.get('lon', 'N/A')}
-            """
-            
-            documents.append(text)
-            metadatas.append({
-                "name": cls._clean_metadata_value(restaurant.get('name')),
-                "category": cls._clean_metadata_value(restaurant.get('category')),
-                "rating": cls._clean_metadata_value(restaurant.get('rating', 0)),
-                "reviews_count": cls._clean_metadata_value(restaurant.get('reviews_count', 0)),
-                "price_range": cls._clean_metadata_value(restaurant.get('price_range'))
-            })
-        
-        # Create and persist vector store
-        if documents:
-            print("\nCreating vector store embeddings (this may take a while)...")
-            batch_size = 100
-            for i in range(0, len(documents), batch_size):
-                batch_end = min(i + batch_size, len(documents))
-                print(f"Processing batch {i//batch_size + 1}/{len(documents)//batch_size + 1}...")
-                
-                if i == 0:
-                    # Create initial vector store with first batch
-                    cls.vector_store = Chroma.from_texts(
-                        documents[i:batch_end],
-                        cls.embeddings,
-                        metadatas=metadatas[i:batch_end],
-                        persist_directory="restaurant_db",
-                        client_settings=client_settings
-                    )
-                else:
-                    # Add subsequent batches
-                    cls.vector_store.add_texts(
-                        documents[i:batch_end],
-                        metadatas=metadatas[i:batch_end]
-                    )
-            
-            print("✅ Vector store created and persisted successfully!")
-            print(f"Total restaurants indexed: {len(documents)}")
-            return cls.vector_store
-        else:
-            print("No documents to process. Creating empty vector store.")
-            cls.vector_store = Chroma(
-                persist_directory="restaurant_db",
-                embedding_function=cls.embeddings
+    @classmethod
+    def get_embeddings(cls):
+        """Create the embeddings client on first use rather than at import"""
+        if cls.embeddings is None:
+            # Query and document embeddings are cached on disk and shared by every worker
+            cls.embeddings = CachedEmbeddings(
+                OllamaEmbeddings(model=EMBEDDING_MODEL),
+                EMBEDDING_MODEL
             )
-            return cls.vector_store
-    
+        return cls.embeddings
+
+    def _restaurant_shard(self):
+        """The destination's restaurant shard, loading it if needed; None if there is no data for it"""
+        return restaurant_shards.get(self.shard_name) if self.shard_name else None
+
     def query_restaurant_data(self, query: str) -> str:
-        """Query the vector store for restaurant information"""
+        """Query the restaurant indexes for restaurant information"""
         print(f"Querying restaurants with: {query}")
         try:
-            # Try a more lenient search
-            results = self.vector_store.similarity_search(
-                query,
-                k=10  # Increase number of results
-            )
+            with span("ResearchAssistant.query_restaurant_data", shard=self.shard_name):
+                shard = self._restaurant_shard()
+                if shard is None:
+                    return f"I don't have restaurant data for {self.destination_name} yet."
+                # "Open now" and today's hours are local to the destination, not the server
+                now = shard_now(self.shard_name)
+                if shard.search_index is not None:
+                    # Hybrid BM25 + vector search with metadata pre-filters
+                    results = [
+                        (restaurant, None)
+                        for restaurant, _ in shard.search_index.search(query, k=10, vector_store=shard.vector_store,
+                                                                       now=now)
+                    ]
+                elif shard.vector_store is not None:
+                    documents = [
+                        re.sub(r"\n\s+", "\n", doc.page_content).strip()
+                        for doc in shard.vector_store.similarity_search(query, k=10)
+                    ]
+                    return truncate_to_tokens("\n\n".join(documents), RESTAURANT_RESULT_TOKEN_BUDGET)
+                else:
+                    return "Restaurant data is still loading. Please try again in a moment."
             
             print(f"Found {len(results)} results")
             
             if not results:
                 return "I couldn't find any restaurants matching your query."
             
-            # Format results
-            response = "Here are the restaurants I found:\n\n"
-            for doc in results:
-                # Add the restaurant information directly without score filtering
-                content = doc.page_content.strip()
-                response += f"{content}\n\n---\n\n"
-            
-            return response.strip()
+            # One compact line per restaurant; full records are available through Restaurant_Details
+            return render_restaurant_results(results, query, id_for=self._result_id, now=now)
             
         except Exception as e:
             print(f"Error in restaurant query: {str(e)}")
             return f"Error searching restaurants: {str(e)}"
     
+    def _result_id(self, restaurant):
+        """Short, per-conversation ID (R1, R2, ...) for a restaurant shown to the agent"""
+        rid = restaurant_id(restaurant)
+        if rid not in self.result_ids:
+            self.result_ids[rid] = f"R{len(self.result_ids) + 1}"
+            self.results_by_id[self.result_ids[rid]] = restaurant
+        return self.result_ids[rid]
+
+    def restaurant_details(self, query: str) -> str:
+        """Full records for restaurant IDs from earlier results (e.g. "R1, R4")"""
+        ids = [match.upper() for match in re.findall(r"\b[Rr]\d+\b", query)]
+        found = [self.results_by_id[i] for i in ids if i in self.results_by_id]
+        if not found:
+            return "No restaurant with that ID has been shown yet. Use Restaurant_Info to find restaurants first."
+        return "\n\n".join(
+            f"[{self._result_id(restaurant)}]\n" + re.sub(r"\n\s+", "\n", render_restaurant_document(restaurant)).strip()
+            for restaurant in found
+        )
+
+    def query_restaurants_nearby(self, query: str) -> str:
+        """Find restaurants around a hotel, restaurant or known place"""
+        print(f"Querying restaurants nearby: {query}")
+        try:
+            with span("ResearchAssistant.query_restaurants_nearby", shard=self.shard_name):
+                shard = self._restaurant_shard()
+                search_index = shard.search_index if shard else None
+                if search_index is None:
+                    return f"Restaurant location data is not available for {self.destination_name}."
+                place = (resolve_place(query, normalize_hotels(self.context.get('hotels')), self.places)
+                         or search_index.locate(query))
+                if place is None:
+                    return ("I couldn't tell where to search from. Pass a hotel ID like H1, "
+                            "a hotel or restaurant name, or a neighbourhood or landmark.")
+                name, lat, lon = place
+                # An explicit distance means "everything within it"; otherwise the nearest matches
+                radius_km = parse_radius_km(query, default=None)
+                now = shard_now(self.shard_name)
+                results = search_index.nearby(lat, lon, query=query, radius_km=radius_km, k=10, now=now)
+
+            if not results:
+                within = radius_km if radius_km is not None else MAX_RADIUS_KM
+                return f"I couldn't find matching restaurants within {within:g} km of {name}."
+
+            rendered = render_restaurant_results(results, query, id_for=self._result_id, now=now)
+            return f"Restaurants near {name}, nearest first:\n{rendered}"
+
+        except Exception as e:
+            print(f"Error in nearby restaurant query: {str(e)}")
+            return f"Error searching nearby restaurants: {str(e)}"
+
+    def _can_locate(self, question):
+        """Whether a nearby-restaurants question names a place the tool can find"""
+        # Only an already loaded shard is consulted, so routing never waits for a load
+        shard = restaurant_shards.peek(self.shard_name) if self.shard_name else None
+        search_index = shard.search_index if shard else None
+        hotels = normalize_hotels(self.context.get('hotels'))
+        return bool(resolve_place(question, hotels, self.places) or (search_index and search_index.locate(question)))
+
+    def _compose_messages(self, user_input, tool_name, observation):
+        """Single-call prompt: conversation so far plus the tool result to answer from"""
+        history = self.memory.load_memory_variables({})[self.memory.memory_key]
+        return [
+            SystemMessage(content=self.system_message),
+            *history,
+            HumanMessage(content=(
+                f"{user_input}\n\n"
+                f"Results from the {tool_name} tool:\n{observation}\n\n"
+                "Answer the question using these results. If they do not answer it, say so briefly."
+            )),
+        ]
+
+    def _route(self, user_input, counter):
+        """Pick the route and the input for its tool; trip questions naming no hotel or flights go to the agent"""
+        route = route_question(user_input, router_model, self._can_locate, callbacks=[counter],
+                               has_restaurants=self.shard_name is not None)
+        tool_input = user_input
+        if route.tool == TRIP_TOOL:
+            tool_input = trip_details_query(self.context, user_input)
+            if tool_input is None:
+                route = Route(None, "trip question without a hotel or flights")
+        print(f"Research route: {route.tool or 'agent'} ({route.reason})")
+        return route, tool_input
+
+    def _record_turn(self, route, counter):
+        router_stats.record(route.tool is not None, counter.calls)
+        print(f"Research turn used {counter.calls} LLM round-trip(s); "
+              f"average {router_stats.average_round_trips:.2f} over {router_stats.turns} turns")
+
     def get_response(self, user_input):
+        counter = LLMCallCounter()
         try:
-            response = self.agent.run(input=user_input)
+            with span("ResearchAssistant.get_response") as current:
+                route, tool_input = self._route(user_input, counter)
+                if route.tool is None:
+                    response = self.agent.run(input=user_input, callbacks=[counter])
+                else:
+                    # Clear lookups skip the ReAct loop: one tool call, one LLM call
+                    observation = self.tools_by_name[route.tool].func(tool_input)
+                    messages = self._compose_messages(user_input, route.tool, observation)
+                    response = chunk_text(self.llm.invoke(messages, config={"callbacks": [counter]}))
+                    self.memory.save_context({"input": user_input}, {"output": response})
+                if current is not None:
+                    current["attributes"].update(route=route.tool or "agent", llm_calls=counter.calls)
+            self._record_turn(route, counter)
             return response
         except Exception as e:
             return f"I encountered an error while researching. Please try rephrasing your question. Error: {str(e)}"
+
+    def stream_response(self, user_input):
+        """Stream intermediate tool steps as they happen, followed by the final answer"""
+        counter = LLMCallCounter()
+        try:
+            with span("ResearchAssistant.stream_response"):
+                route, tool_input = self._route(user_input, counter)
+                if route.tool is None:
+                    for step in self.agent.stream({"input": user_input}, config={"callbacks": [counter]}):
+                        if "output" in step:
+                            yield step["output"]
+                        else:
+                            yield format_agent_step(step)
+                else:
+                    yield f"🔧 *Using {route.tool}:* `{tool_input[:200]}`\n\n"
+                    observation = self.tools_by_name[route.tool].func(tool_input)
+                    messages = self._compose_messages(user_input, route.tool, observation)
+                    chunks = []
+                    for text in stream_text(self.llm, messages, config={"callbacks": [counter]}):
+                        chunks.append(text)
+                        yield text
+                    self.memory.save_context({"input": user_input}, {"output": "".join(chunks)})
+            self._record_turn(route, counter)
+        except Exception as e:
+            yield f"I encountered an error while researching. Please try rephrasing your question. Error: {str(e)}"
     
-    @staticmethod
-    def get_suggested_prompts():
+    def get_suggested_prompts(self):
+        place = self.destination_name
         return {
             "column1": [
-                "Find Thai restaurants with high ratings in Bangkok",
-                "What are the best seafood restaurants in Phuket?",
-                "Show me restaurants open late night in Chiang Mai",
-                "Find restaurants with outdoor seating in Thailand",
+                f"Find restaurants with high ratings in {place}",
+                f"What are the best seafood restaurants in {place}?",
+                f"Show me restaurants open late night in {place}",
+                f"Find restaurants with outdoor seating in {place}",
             ],
             "column2": [
-                "What are the most popular local restaurants in Thailand?",
-                "Find Thai restaurants that serve vegetarian food",
+                f"What are the most popular local restaurants in {place}?",
+                "Find restaurants that serve vegetarian food",
                 "What are the best-rated street food spots?",
-                "Show me restaurants with traditional Thai cuisine",
+                "Show me restaurants with traditional local cuisine",
             ]
-        } 
\ No newline at end of file
+        }
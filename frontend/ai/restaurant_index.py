@@ -0,0 +1,328 @@
+"""Incremental builds of the restaurant vector indexes, driven by content hashes."""
+import hashlib
+import json
+import os
+import time
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import chromadb
+from langchain_chroma import Chroma
+from ai.vector_store import NUMPY_INDEX_PATH, VECTOR_BACKEND, VECTOR_QUANTIZATION, NumpyVectorStore
+from ai.json_stream import JsonArrayWriter, iter_json_file, read_ahead
+from ai.restaurants import RESTAURANT_DATA_PATH, load_restaurants, render_restaurant_document, restaurant_metadata
+
+RESTAURANT_DB_PATH = "restaurant_db"
+# LangChain's default collection name, kept so indexes built through it still open
+RESTAURANT_COLLECTION = "langchain"
+EMBEDDING_MODEL = "nomic-embed-text"
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+# Batches in flight at the embedding server at once
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+EMBED_MAX_RETRIES = 3
+EMBED_RETRY_DELAY = 2.0
+# Write the manifest at most this often during a build so an interrupted build keeps its progress
+MANIFEST_SAVE_INTERVAL = 5.0
+
+
+def document_hash(document, metadata):
+    """Content hash of a rendered restaurant document and its metadata"""
+    payload = document + "\x00" + json.dumps(metadata, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def manifest_path(persist_directory=RESTAURANT_DB_PATH):
+    return os.path.join(persist_directory, MANIFEST_FILE)
+
+
+def load_manifest(persist_directory=RESTAURANT_DB_PATH):
+    """Read the manifest of an existing index, or None if there is none"""
+    try:
+        with open(manifest_path(persist_directory), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def save_manifest(manifest, persist_directory=RESTAURANT_DB_PATH):
+    """Atomically write the manifest next to the Chroma files"""
+    os.makedirs(persist_directory, exist_ok=True)
+    path = manifest_path(persist_directory)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(path + ".tmp", path)
+
+
+def prepare_record(restaurant):
+    """Render one restaurant: (restaurant_id, document, metadata, hash)"""
+    metadata = restaurant_metadata(restaurant)
+    document = render_restaurant_document(restaurant)
+    return metadata["restaurant_id"], document, metadata, document_hash(document, metadata)
+
+
+def prepare_documents(restaurants):
+    """Render every restaurant once: {restaurant_id: (document, metadata, hash)}"""
+    prepared = {}
+    duplicates = 0
+    for restaurant in restaurants:
+        rid, document, metadata, digest = prepare_record(restaurant)
+        if rid in prepared:
+            duplicates += 1
+            continue
+        prepared[rid] = (document, metadata, digest)
+    if duplicates:
+        print(f"Skipped {duplicates} duplicate restaurant records")
+    return prepared
+
+
+def _embed_with_retry(embeddings, texts):
+    for attempt in range(EMBED_MAX_RETRIES + 1):
+        try:
+            return embeddings.embed_documents(texts)
+        except Exception as e:
+            if attempt == EMBED_MAX_RETRIES:
+                raise
+            delay = EMBED_RETRY_DELAY * 2 ** attempt
+            print(f"Embedding batch failed ({e}), retrying in {delay:.0f}s...")
+            time.sleep(delay)
+
+
+def run_embedding_pipeline(collection, embeddings, batches, on_batch_written=None,
+                           concurrency=EMBED_CONCURRENCY):
+    """Embed batches concurrently and write them to a chromadb collection as they complete.
+
+    `batches` yields (ids, documents, metadatas) and is consumed lazily, so producing
+    the next batch overlaps with embedding the previous ones. Up to `concurrency`
+    batches are at the embedding server at once; writes stay on the calling thread
+    because Chroma's persistent client has a single writer. Batches that still fail
+    after retries are skipped and reported, and are picked up again by the next build.
+    """
+    stats = {"documents": 0, "batches": 0, "failed_batches": 0, "seconds": 0.0}
+    start = last_report = time.perf_counter()
+    batches = iter(batches)
+    in_flight = {}
+
+    def write(future):
+        ids, documents, metadatas = in_flight.pop(future)
+        try:
+            vectors = future.result()
+        except Exception as e:
+            stats["failed_batches"] += 1
+            print(f"Giving up on a batch of {len(ids)} documents: {e}")
+            return
+        # Upsert by id, so changed restaurants replace their old vectors
+        collection.upsert(ids=ids, embeddings=vectors, documents=documents, metadatas=metadatas)
+        stats["documents"] += len(ids)
+        stats["batches"] += 1
+        if on_batch_written:
+            on_batch_written(ids)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="embed") as executor:
+        exhausted = False
+        while not exhausted or in_flight:
+            while not exhausted and len(in_flight) < concurrency:
+                batch = next(batches, None)
+                if batch is None:
+                    exhausted = True
+                    break
+                in_flight[executor.submit(_embed_with_retry, embeddings, batch[1])] = batch
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                write(future)
+            if time.perf_counter() - last_report >= 10:
+                elapsed = time.perf_counter() - start
+                print(f"Embedded {stats['documents']} documents ({stats['documents'] / elapsed:.1f} docs/s)")
+                last_report = time.perf_counter()
+
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def _open_client(persist_directory):
+    settings = chromadb.Settings(anonymized_telemetry=False, is_persistent=True)
+    return chromadb.PersistentClient(path=persist_directory, settings=settings)
+
+
+def _open_store(embeddings, client):
+    return Chroma(
+        client=client,
+        collection_name=RESTAURANT_COLLECTION,
+        embedding_function=embeddings,
+    )
+
+
+def _open_current_store(embeddings, model_name, persist_directory):
+    """Open the Chroma index, a direct handle on its collection and its manifest,
+    dropping an index built incompatibly.
+
+    Builds write precomputed vectors through the collection handle; the LangChain
+    store would embed every document again.
+    """
+    manifest = load_manifest(persist_directory)
+    client = _open_client(persist_directory)
+    vector_store = _open_store(embeddings, client)
+    if manifest is None:
+        stale = bool(vector_store.get(limit=1)["ids"])
+    else:
+        stale = manifest.get("version") != MANIFEST_VERSION or manifest.get("embedding_model") != model_name
+    if stale:
+        print("Existing restaurant index is incompatible with this build, rebuilding it...")
+        vector_store.delete_collection()
+        vector_store = _open_store(embeddings, client)
+    if manifest is None or stale:
+        manifest = {"version": MANIFEST_VERSION, "embedding_model": model_name, "documents": {}}
+    # Vectors are always passed in, so the collection needs no embedding function of its own
+    collection = client.get_collection(RESTAURANT_COLLECTION, embedding_function=None)
+    return vector_store, collection, manifest
+
+
+def ingest_restaurant_records(embeddings, records, model_name=EMBEDDING_MODEL, persist_directory=RESTAURANT_DB_PATH,
+                              data_path=None, prune=True):
+    """Index a stream of restaurant records without holding the dataset in memory.
+
+    `records` is any iterable of restaurant dicts, e.g. iter_json_file() or records
+    parsed from a snapshot as it downloads. It is read on a background thread while
+    earlier batches embed, and only the ids and hashes of the records are kept.
+    Unchanged restaurants are skipped. When the stream ends cleanly, restaurants
+    missing from it are deleted (if `prune`) and the records are saved to
+    `data_path` (if given) for the lexical search index.
+    """
+    vector_store, collection, manifest = _open_current_store(embeddings, model_name, persist_directory)
+    documents = manifest["documents"]
+    seen = set()
+    pending = {}
+    counts = {"records": 0, "duplicates": 0, "unchanged": 0, "changed": 0}
+    last_save = time.perf_counter()
+
+    def batches(writer):
+        ids, texts, metadatas = [], [], []
+        for restaurant in read_ahead(records, max_items=EMBED_BATCH_SIZE * EMBED_CONCURRENCY):
+            counts["records"] += 1
+            if writer is not None:
+                writer.write(restaurant)
+            rid, document, metadata, digest = prepare_record(restaurant)
+            if rid in seen:
+                counts["duplicates"] += 1
+                continue
+            seen.add(rid)
+            if documents.get(rid) == digest:
+                counts["unchanged"] += 1
+                continue
+            counts["changed"] += 1
+            pending[rid] = digest
+            ids.append(rid)
+            texts.append(document)
+            metadatas.append(metadata)
+            if len(ids) == EMBED_BATCH_SIZE:
+                yield ids, texts, metadatas
+                ids, texts, metadatas = [], [], []
+        if ids:
+            yield ids, texts, metadatas
+
+    def record(ids):
+        nonlocal last_save
+        documents.update({rid: pending.pop(rid) for rid in ids})
+        if time.perf_counter() - last_save >= MANIFEST_SAVE_INTERVAL:
+            save_manifest(manifest, persist_directory)
+            last_save = time.perf_counter()
+
+    removed = []
+    try:
+        with (JsonArrayWriter(data_path) if data_path else nullcontext()) as writer:
+            stats = run_embedding_pipeline(collection, embeddings, batches(writer), on_batch_written=record)
+        if prune:
+            # Only a complete stream says which restaurants are gone
+            removed = [rid for rid in documents if rid not in seen]
+            if removed:
+                vector_store.delete(ids=removed)
+                for rid in removed:
+                    documents.pop(rid, None)
+    finally:
+        # Whatever was written is in the manifest, so a crashed build resumes where it stopped
+        manifest["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        save_manifest(manifest, persist_directory)
+
+    print(f"Restaurant index: {counts['records']} records, {counts['changed']} new or changed, "
+          f"{len(removed)} removed, {counts['unchanged']} unchanged, {counts['duplicates']} duplicates skipped")
+    if stats["batches"] or stats["failed_batches"]:
+        print(f"✅ Embedded {stats['documents']} restaurants in {stats['seconds']:.1f}s "
+              f"({stats['documents'] / max(stats['seconds'], 1e-9):.1f} docs/s, "
+              f"batch size {EMBED_BATCH_SIZE}, concurrency {EMBED_CONCURRENCY})")
+    if stats["failed_batches"]:
+        print(f"⚠️ {stats['failed_batches']} batches failed and will be retried on the next build")
+    return vector_store
+
+
+def sync_restaurant_index(embeddings, model_name=EMBEDDING_MODEL, data_path=RESTAURANT_DATA_PATH,
+                          persist_directory=RESTAURANT_DB_PATH):
+    """Bring the persisted restaurant index in line with the dataset file.
+
+    The file is streamed record by record. Only restaurants whose rendered document
+    changed since the last build are embedded; restaurants no longer in the dataset
+    are deleted. Indexes built before the manifest existed (random document ids) or
+    with another embedding model are rebuilt once.
+    """
+    print(f"Loading restaurant data from: {data_path}")
+    if not os.path.exists(data_path):
+        print(f"Error: Could not find restaurant data file: {data_path}")
+    else:
+        try:
+            return ingest_restaurant_records(embeddings, iter_json_file(data_path), model_name, persist_directory)
+        except ValueError as e:
+            print(f"Error: Invalid JSON in restaurant data: {e}")
+    if os.path.exists(persist_directory):
+        print("Restaurant data unavailable, loading the existing index as is...")
+        return _open_store(embeddings, _open_client(persist_directory))
+    return None
+
+
+def dataset_fingerprint(prepared, model_name, quantization):
+    """Hash of every document hash, so an unchanged dataset skips the rebuild"""
+    digest = hashlib.sha256(f"{model_name}\x00{quantization}".encode("utf-8"))
+    for rid in sorted(prepared):
+        digest.update(prepared[rid][2].encode("utf-8"))
+    return digest.hexdigest()
+
+
+def sync_numpy_index(embeddings, prepared, model_name=EMBEDDING_MODEL, directory=NUMPY_INDEX_PATH, ivf=False,
+                     quantization=VECTOR_QUANTIZATION):
+    """Open the NumPy index, rebuilding it first if the dataset changed.
+
+    `prepared` is the {restaurant_id: (document, metadata, hash)} map from
+    prepare_documents; with the embedding cache, a rebuild only embeds documents never
+    seen before.
+    """
+    fingerprint = dataset_fingerprint(prepared, model_name, quantization)
+    try:
+        with open(os.path.join(directory, "index.json"), "r", encoding="utf-8") as f:
+            current = json.load(f).get("fingerprint")
+    except (FileNotFoundError, json.JSONDecodeError):
+        current = None
+
+    if current != fingerprint and prepared:
+        ids = list(prepared)
+        documents = [prepared[rid][0] for rid in ids]
+        batches = [documents[i:i + EMBED_BATCH_SIZE] for i in range(0, len(documents), EMBED_BATCH_SIZE)]
+        print(f"Building NumPy vector index for {len(ids)} restaurants...")
+        with ThreadPoolExecutor(max_workers=EMBED_CONCURRENCY, thread_name_prefix="embed") as executor:
+            embedded = executor.map(lambda texts: _embed_with_retry(embeddings, texts), batches)
+            vectors = [vector for batch in embedded for vector in batch]
+        NumpyVectorStore.build(directory, ids, documents, [prepared[rid][1] for rid in ids],
+                               vectors, quantization, fingerprint)
+    if not os.path.exists(os.path.join(directory, "index.json")):
+        return None
+    return NumpyVectorStore(directory, embeddings, ivf=ivf)
+
+
+def open_restaurant_index(embeddings, backend=VECTOR_BACKEND, data_path=RESTAURANT_DATA_PATH, directory=None):
+    """Open (building or updating as needed) the restaurant vector index for `backend`"""
+    if backend == "chroma":
+        return sync_restaurant_index(embeddings, data_path=data_path, persist_directory=directory or RESTAURANT_DB_PATH)
+    if backend not in ("flat", "ivf"):
+        raise ValueError(f"Unknown VECTOR_BACKEND: {backend}")
+    restaurants = load_restaurants(data_path)
+    prepared = prepare_documents(restaurants) if restaurants else {}
+    return sync_numpy_index(embeddings, prepared, directory=directory or NUMPY_INDEX_PATH, ivf=backend == "ivf")
@@ -0,0 +1,107 @@
+"""Compact, token-budgeted rendering of restaurant search results for agent prompts."""
+import re
+from datetime import datetime
+from ai.opening_hours import WEEKDAYS, parse_time_filters
+from ai.tokens import estimate_tokens, truncate_to_tokens
+
+RESTAURANT_RESULT_TOKEN_BUDGET = 350
+MAX_ADDRESS_TOKENS = 15
+MAX_SERVICES_TOKENS = 25
+
+HOURS_PATTERN = re.compile(r"\b(open|opens|opening|hours|close|closes|closing|late|night|now|breakfast|brunch|"
+                           r"lunch|dinner|" + "|".join(WEEKDAYS) + r")\b", re.I)
+PRICE_PATTERN = re.compile(r"\b(cheap|budget|price|prices|pricey|expensive|affordable|upscale|cost|\$|฿)", re.I)
+SERVICES_PATTERN = re.compile(r"\b(outdoor|seating|delivery|takeout|take-away|takeaway|dine-in|wifi|parking|"
+                              r"vegetarian|vegan|halal|reservations?|wheelchair|kids|family|alcohol|beer|"
+                              r"cocktails?|live music|services?|serves?)\b", re.I)
+CONTACT_PATTERN = re.compile(r"\b(phone|call|website|contact|book|booking|reserve)\b", re.I)
+
+
+def relevant_fields(query):
+    """Fields worth showing for this query beyond name, category and rating"""
+    fields = {"address"}
+    if HOURS_PATTERN.search(query):
+        fields.add("hours")
+    if PRICE_PATTERN.search(query):
+        fields.add("price")
+    if SERVICES_PATTERN.search(query):
+        fields.add("services")
+    if CONTACT_PATTERN.search(query):
+        fields.add("contact")
+    return fields
+
+
+def _present(value):
+    return value not in (None, "", "N/A", [], {}) and str(value).strip().lower() not in ("n/a", "none", "nan")
+
+
+def _hours_for_day(restaurant, day):
+    hours = restaurant.get("open_hours")
+    if not isinstance(hours, dict):
+        return None
+    for key, value in hours.items():
+        if str(key).strip().lower()[:3] == WEEKDAYS[day][:3]:
+            return f"{WEEKDAYS[day][:3].capitalize()} {value}"
+    return None
+
+
+def _services(value):
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v) for v in value)
+    if isinstance(value, dict):
+        return ", ".join(str(k) for k, v in value.items() if v)
+    return str(value)
+
+
+def render_restaurant_compact(restaurant, fields, day=None, distance_km=None, result_id=None):
+    """One line per restaurant with only the requested, known fields; hours are for weekday `day`"""
+    parts = [f"[{result_id}] {restaurant.get('name')}" if result_id else str(restaurant.get("name"))]
+    if _present(restaurant.get("category")):
+        parts.append(str(restaurant["category"]))
+    if _present(restaurant.get("rating")):
+        reviews = restaurant.get("reviews_count")
+        parts.append(f"{restaurant['rating']}★" + (f" ({reviews})" if _present(reviews) else ""))
+    if distance_km is not None:
+        parts.append(f"{distance_km:.1f} km")
+    if "price" in fields and _present(restaurant.get("price_range")):
+        parts.append(str(restaurant["price_range"]))
+    if "hours" in fields:
+        hours = _hours_for_day(restaurant, day) if day is not None else None
+        if hours:
+            parts.append(hours)
+    if "services" in fields and _present(restaurant.get("services_provided")):
+        parts.append(truncate_to_tokens(_services(restaurant["services_provided"]), MAX_SERVICES_TOKENS))
+    if "contact" in fields:
+        parts.extend(str(restaurant[key]) for key in ("phone_number", "open_website") if _present(restaurant.get(key)))
+    if "address" in fields and _present(restaurant.get("address")):
+        parts.append(truncate_to_tokens(str(restaurant["address"]), MAX_ADDRESS_TOKENS))
+    return " | ".join(re.sub(r"\s+", " ", part).strip() for part in parts)
+
+
+def render_restaurant_results(results, query, token_budget=RESTAURANT_RESULT_TOKEN_BUDGET, id_for=None, now=None):
+    """Render [(restaurant, distance_km or None)] as compact lines within `token_budget`.
+
+    `id_for(restaurant)` returns a short ID the agent can pass back for full details.
+    Hours are shown for the day the query asks about, else today at the destination (`now`).
+    Lower-ranked results are dropped, not truncated, once the budget is used up.
+    """
+    fields = relevant_fields(query)
+    now = now or datetime.now()
+    time_filter = parse_time_filters(query, now)
+    day = (time_filter.get("open_at") or time_filter.get("open_after") or (now.weekday(),))[0]
+
+    lines, used = [], 0
+    for restaurant, distance_km in results:
+        line = render_restaurant_compact(
+            restaurant, fields, day=day, distance_km=distance_km,
+            result_id=id_for(restaurant) if id_for else None,
+        )
+        cost = estimate_tokens(line) + 1
+        if lines and used + cost > token_budget:
+            break
+        lines.append(line)
+        used += cost
+    omitted = len(results) - len(lines)
+    if omitted:
+        lines.append(f"(+{omitted} more matches not shown)")
+    return "\n".join(lines)
@@ -0,0 +1,292 @@
+"""Hybrid lexical (BM25) + vector restaurant search with structured metadata filters."""
+import math
+import re
+import time
+from collections import Counter, defaultdict
+import numpy as np
+from ai.geo import GeoIndex
+from ai.opening_hours import OpeningHoursIndex, parse_time_filters
+from ai.restaurants import restaurant_metadata
+
+STOPWORDS = {
+    "a", "an", "and", "are", "at", "best", "find", "for", "in", "is", "me", "of", "on",
+    "or", "show", "some", "the", "to", "what", "where", "which", "with", "restaurant",
+    "restaurants", "place", "places", "good", "spots", "spot",
+    # Opening-time words become filters rather than search terms
+    "open", "now", "late", "night", "tonight", "until", "till", "after",
+}
+
+# Query phrases that translate into metadata filters rather than search terms
+RATING_PHRASES = [
+    (re.compile(r"\b(highly|high|top)[\s-]rated\b|\bhigh ratings?\b|\bbest[\s-]rated\b", re.I), 4.5),
+    (re.compile(r"\bwell[\s-]rated\b|\bgood ratings?\b", re.I), 4.0),
+]
+RATING_ABOVE = re.compile(r"\brat(?:ed|ing)\s*(?:above|over|at least|>=?)\s*(\d(?:\.\d)?)", re.I)
+CHEAP_PHRASES = re.compile(r"\b(cheap|budget|inexpensive|affordable|street food)\b", re.I)
+MID_PHRASES = re.compile(r"\b(mid[\s-]range|moderately priced|moderate)\b", re.I)
+UPSCALE_PHRASES = re.compile(r"\b(expensive|upscale|fine dining|luxury|fancy)\b", re.I)
+POPULAR_PHRASES = re.compile(r"\b(popular|well[\s-]known|famous)\b", re.I)
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60
+# Ranking bonus for restaurants whose category the query names, worth one top-ranked retrieval hit
+CATEGORY_BOOST = 1.0 / (RRF_K + 1)
+
+
+def tokenize(text, stopwords=STOPWORDS):
+    return [t for t in re.findall(r"[a-z0-9฀-๿]+", str(text).lower()) if t not in stopwords]
+
+
+def parse_query_filters(query, now=None):
+    """Derive metadata filters (rating, price level, popularity, opening time) from a natural language query"""
+    filters = {}
+    for pattern, rating in RATING_PHRASES:
+        if pattern.search(query):
+            filters["min_rating"] = rating
+            break
+    match = RATING_ABOVE.search(query)
+    if match:
+        filters["min_rating"] = float(match.group(1))
+    if CHEAP_PHRASES.search(query):
+        filters["max_price_level"] = 1
+    elif MID_PHRASES.search(query):
+        filters["min_price_level"], filters["max_price_level"] = 2, 2
+    elif UPSCALE_PHRASES.search(query):
+        filters["min_price_level"] = 3
+    if POPULAR_PHRASES.search(query):
+        filters["min_reviews"] = 100
+    filters.update(parse_time_filters(query, now))
+    return filters
+
+
+def _coordinate(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class RestaurantSearchIndex:
+    """In-memory inverted index plus columnar metadata over the restaurant dataset.
+
+    `stopwords` adds words that carry no meaning within this dataset, such as its country's name.
+    """
+
+    def __init__(self, restaurants, stopwords=()):
+        start = time.perf_counter()
+        self.restaurants = restaurants
+        self.stopwords = STOPWORDS | {word.lower() for word in stopwords}
+        self.metadata = [restaurant_metadata(r) for r in restaurants]
+        self.id_to_index = {m["restaurant_id"]: i for i, m in enumerate(self.metadata)}
+        self.name_to_index = {}
+        for i, m in enumerate(self.metadata):
+            self.name_to_index.setdefault(str(m["name"]).lower(), i)
+
+        # Columnar metadata so filters are a single vectorized mask
+        self.rating = np.array([m["rating"] for m in self.metadata], dtype=np.float32)
+        self.reviews = np.array([m["reviews_count"] for m in self.metadata], dtype=np.int64)
+        self.price_level = np.array([m["price_level"] for m in self.metadata], dtype=np.int8)
+        self.category = np.array([str(m["category"]).lower() for m in self.metadata], dtype=object)
+        self.lat = np.array([_coordinate(r.get("lat")) for r in restaurants], dtype=np.float64)
+        self.lon = np.array([_coordinate(r.get("lon")) for r in restaurants], dtype=np.float64)
+        self.geo = GeoIndex(self.lat, self.lon)
+        self.hours = OpeningHoursIndex(restaurants)
+
+        # Inverted index: token -> (doc indices, term frequencies)
+        postings = defaultdict(list)
+        lengths = np.zeros(len(restaurants), dtype=np.float32)
+        for i, restaurant in enumerate(restaurants):
+            counts = Counter(self.tokenize(self._lexical_text(restaurant)))
+            lengths[i] = sum(counts.values())
+            for token, tf in counts.items():
+                postings[token].append((i, tf))
+        self.postings = {
+            token: (np.array([d for d, _ in docs], dtype=np.int32), np.array([tf for _, tf in docs], dtype=np.float32))
+            for token, docs in postings.items()
+        }
+        self.doc_lengths = lengths
+        self.avg_length = float(lengths.mean()) if len(lengths) else 0.0
+        # Category -> its distinguishing words ("Fast food restaurant" -> ("fast", "food"))
+        self.category_terms = {}
+        for m in self.metadata:
+            if m["category"] and m["category"] not in self.category_terms:
+                terms = tuple(self.tokenize(m["category"]))
+                if terms:
+                    self.category_terms[m["category"]] = terms
+        self.build_seconds = time.perf_counter() - start
+        print(f"Built restaurant search index over {len(restaurants)} restaurants in {self.build_seconds:.2f}s")
+
+    @staticmethod
+    def _lexical_text(restaurant):
+        return " ".join(str(restaurant.get(key) or "") for key in (
+            "name", "category", "address", "price_range", "services_provided"
+        ))
+
+    def __len__(self):
+        return len(self.restaurants)
+
+    def tokenize(self, text):
+        return tokenize(text, self.stopwords)
+
+    def filter_mask(self, filters):
+        """Boolean mask of restaurants matching the metadata filters"""
+        mask = np.ones(len(self.restaurants), dtype=bool)
+        if filters.get("min_rating") is not None:
+            mask &= self.rating >= filters["min_rating"]
+        if filters.get("min_reviews") is not None:
+            mask &= self.reviews >= filters["min_reviews"]
+        if filters.get("max_price_level") is not None:
+            # Unknown price levels (0) are kept rather than silently dropped
+            mask &= (self.price_level <= filters["max_price_level"])
+        if filters.get("min_price_level") is not None:
+            mask &= self.price_level >= filters["min_price_level"]
+        if filters.get("categories"):
+            wanted = [c.lower() for c in filters["categories"]]
+            mask &= np.isin(self.category, wanted)
+        if filters.get("open_at") is not None:
+            mask &= self.hours.open_at(*filters["open_at"])
+        if filters.get("open_after") is not None:
+            mask &= self.hours.open_after(*filters["open_after"])
+        return mask
+
+    def match_categories(self, query):
+        """Categories whose whole name appears in the query, e.g. "seafood" -> "Seafood restaurant".
+
+        "street food" does not match "Fast food restaurant": every distinguishing word of
+        the category must appear, in order.
+        """
+        text = " " + " ".join(self.tokenize(query)) + " "
+        return sorted(category for category, terms in self.category_terms.items()
+                      if f" {' '.join(terms)} " in text)
+
+    def bm25(self, query, mask, limit=50):
+        """Lexical BM25 scores over the masked documents; returns [(index, score)]"""
+        scores = np.zeros(len(self.restaurants), dtype=np.float32)
+        n = len(self.restaurants)
+        for token in set(self.tokenize(query)):
+            if token not in self.postings:
+                continue
+            docs, tfs = self.postings[token]
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = tfs + BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[docs] / (self.avg_length or 1))
+            scores[docs] += idf * tfs * (BM25_K1 + 1) / norm
+        scores[~mask] = 0
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit)[:limit]]
+        return sorted(((int(i), float(scores[i])) for i in candidates), key=lambda item: -item[1])
+
+    @staticmethod
+    def chroma_filter(filters):
+        """Translate filters into a Chroma `where` clause so the vector index pre-filters"""
+        clauses = []
+        if filters.get("min_rating") is not None:
+            clauses.append({"rating": {"$gte": float(filters["min_rating"])}})
+        if filters.get("min_reviews") is not None:
+            clauses.append({"reviews_count": {"$gte": int(filters["min_reviews"])}})
+        if filters.get("max_price_level") is not None:
+            clauses.append({"price_level": {"$lte": int(filters["max_price_level"])}})
+        if filters.get("min_price_level") is not None:
+            clauses.append({"price_level": {"$gte": int(filters["min_price_level"])}})
+        if filters.get("categories"):
+            clauses.append({"category": {"$in": list(filters["categories"])}})
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    def query_filters(self, query, filters=None, now=None):
+        """Filters parsed from the query text, with explicit `filters` taking precedence.
+
+        Categories named in the query are not filters (see `match_categories`); they only
+        boost ranking, so a loose category match can never empty the results.
+        """
+        return dict(parse_query_filters(query, now), **(filters or {}))
+
+    def locate(self, name):
+        """Coordinates of a restaurant by exact or partial name; returns (name, lat, lon) or None"""
+        lowered = (name or "").lower()
+        index = self.name_to_index.get(lowered)
+        if index is None:
+            # Longest restaurant name contained in the text, e.g. "near Jay Fai in Bangkok"
+            matches = [(len(n), i) for n, i in self.name_to_index.items() if len(n) > 3 and n in lowered]
+            index = max(matches)[1] if matches else None
+        if index is None or not self.geo.valid[index]:
+            return None
+        return self.metadata[index]["name"], float(self.lat[index]), float(self.lon[index])
+
+    def nearby(self, lat, lon, query="", radius_km=None, k=10, filters=None, now=None):
+        """Restaurants around a point, nearest first, combined with rating/category/price filters.
+
+        With `radius_km` every match inside the circle is a candidate; without it the
+        k nearest matches are returned. Returns [(restaurant, distance_km)].
+        """
+        mask = self.filter_mask(self.query_filters(query, filters, now))
+        categories = self.match_categories(query)
+        # Prefer the categories the query names, but fall back to any restaurant nearby
+        masks = [mask & np.isin(self.category, [c.lower() for c in categories]), mask] if categories else [mask]
+        for candidate_mask in masks:
+            if radius_km is not None:
+                indices, distances = self.geo.within(lat, lon, radius_km, candidate_mask)
+            else:
+                indices, distances = self.geo.nearest(lat, lon, k, candidate_mask)
+            if len(indices):
+                break
+        return [(self.restaurants[i], float(d)) for i, d in zip(indices[:k], distances[:k])]
+
+    def _resolve(self, metadata):
+        index = self.id_to_index.get(metadata.get("restaurant_id"))
+        if index is None:
+            index = self.name_to_index.get(str(metadata.get("name", "")).lower())
+        return index
+
+    def vector(self, vector_store, query, filters, mask, limit=50):
+        """Vector similarity hits, filtered inside the store; returns [(index, rank score)]"""
+        if vector_store is None:
+            return []
+        try:
+            docs = vector_store.similarity_search(query, k=limit, filter=self.chroma_filter(filters))
+        except Exception as e:
+            print(f"Vector search failed, using lexical results only: {e}")
+            return []
+        hits = []
+        for rank, doc in enumerate(docs):
+            index = self._resolve(doc.metadata)
+            if index is not None and mask[index]:
+                hits.append((index, 1.0 / (rank + 1)))
+        return hits
+
+    def search(self, query, k=10, vector_store=None, filters=None, now=None):
+        """Hybrid search: metadata pre-filter, BM25 + vector retrieval, RRF fusion and re-ranking
+        with a boost for the categories the query names. `now` is the destination's current
+        time for "open now" style queries."""
+        filters = self.query_filters(query, filters, now)
+        mask = self.filter_mask(filters)
+
+        lexical = self.bm25(query, mask)
+        semantic = self.vector(vector_store, query, filters, mask)
+
+        # Reciprocal rank fusion of both result lists
+        fused = defaultdict(float)
+        for results in (lexical, semantic):
+            for rank, (index, _) in enumerate(results):
+                fused[index] += 1.0 / (RRF_K + rank + 1)
+
+        if not fused:
+            # Nothing matched the text: fall back to the best restaurants passing the filters
+            candidates = np.flatnonzero(mask)
+            fused = {int(i): 0.0 for i in candidates}
+
+        # Re-rank with a quality prior from rating and review volume; when the query asks
+        # for a price level, known matches rank above restaurants with no price data
+        price_filtered = "max_price_level" in filters or "min_price_level" in filters
+        categories = {c.lower() for c in self.match_categories(query)}
+
+        def final_score(index):
+            quality = self.rating[index] / 5.0 * math.log1p(self.reviews[index]) / 10.0
+            unknown_price = 0.005 if price_filtered and self.price_level[index] == 0 else 0.0
+            category = CATEGORY_BOOST if self.category[index] in categories else 0.0
+            return fused[index] + category + 0.01 * quality - unknown_price
+
+        ranked = sorted(fused, key=lambda index: (-final_score(index), index))[:k]
+        return [(self.restaurants[index], final_score(index)) for index in ranked]
@@ -0,0 +1,334 @@
+"""Per-country restaurant shards, opened lazily and kept in a memory-bounded LRU."""
+import glob
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Optional
+from zoneinfo import ZoneInfo
+import numpy as np
+from dotenv import load_dotenv
+from ai.airports import airport_country, lookup_airport
+from ai.restaurant_index import RESTAURANT_DB_PATH, load_manifest, open_restaurant_index
+from ai.restaurant_search import RestaurantSearchIndex
+from ai.restaurants import DATA_DIR, RESTAURANT_DATA_PATH, load_restaurants
+from ai.vector_store import NUMPY_INDEX_PATH, VECTOR_BACKEND
+
+load_dotenv()
+
+DEFAULT_RESTAURANT_SHARD = os.getenv("DEFAULT_RESTAURANT_SHARD", "thailand")
+RESTAURANT_SHARD_MEMORY_MB = int(os.getenv("RESTAURANT_SHARD_MEMORY_MB", "1024"))
+RESTAURANT_MAX_SHARDS = int(os.getenv("RESTAURANT_MAX_SHARDS", "3"))
+DATA_SUFFIX = "_restaurants.json"
+# Per-shard settings that travel with the code: <shard>.json with the shard's time zone,
+# extra search stop words (the country's name) and reference places for "near <place>"
+SHARD_PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "shards")
+# Parsed JSON records take a few times their size on disk as Python objects
+RECORD_MEMORY_FACTOR = 4
+
+# Indexes built before sharding sit at the index roots and belong to this dataset's shard
+LEGACY_SHARD = os.path.basename(RESTAURANT_DATA_PATH)[:-len(DATA_SUFFIX)]
+# Chroma keeps each segment in a directory named by its UUID
+CHROMA_SEGMENT_PATTERN = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+# Shard status values
+NOT_BUILT = "not_built"
+BUILT = "built"
+LOADING = "loading"
+LOADED = "loaded"
+FAILED = "failed"
+
+
+def shard_slug(name):
+    """Shard name for a country or region: "South Korea" -> "south_korea" """
+    return re.sub(r"[^a-z0-9]+", "_", str(name).lower()).strip("_")
+
+
+def shard_label(shard):
+    return shard.replace("_", " ").title()
+
+
+def shard_data_path(shard):
+    return os.path.join(DATA_DIR, f"{shard}{DATA_SUFFIX}")
+
+
+def shard_index_directory(shard, backend=VECTOR_BACKEND):
+    root = RESTAURANT_DB_PATH if backend == "chroma" else NUMPY_INDEX_PATH
+    return os.path.join(root, shard)
+
+
+@lru_cache(maxsize=None)
+def shard_profile(shard):
+    """Settings for a shard from SHARD_PROFILE_DIR; empty if it has none"""
+    path = os.path.join(SHARD_PROFILE_DIR, f"{shard}.json")
+    if not shard or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def shard_now(shard, now=None):
+    """The current time in the shard's time zone, for "open now" and today's hours.
+
+    Falls back to the server's local time for shards without a time zone.
+    """
+    timezone = shard_profile(shard).get("timezone")
+    if not timezone:
+        return now or datetime.now()
+    return (now or datetime.now().astimezone()).astimezone(ZoneInfo(timezone))
+
+
+def available_shards():
+    """Shards with a dataset file, by name"""
+    return sorted(os.path.basename(path)[:-len(DATA_SUFFIX)]
+                  for path in glob.glob(os.path.join(DATA_DIR, f"*{DATA_SUFFIX}")))
+
+
+def _legacy_entries(root, backend):
+    """Paths of an index built directly in `root` rather than in a shard directory"""
+    if not os.path.isdir(root):
+        return []
+    names = sorted(os.listdir(root))
+    marker = "manifest.json" if backend == "chroma" else "index.json"
+    if marker not in names and not (backend == "chroma" and "chroma.sqlite3" in names):
+        return []
+    return [os.path.join(root, name) for name in names
+            if os.path.isfile(os.path.join(root, name))
+            or (backend == "chroma" and CHROMA_SEGMENT_PATTERN.match(name))]
+
+
+def migrate_root_indexes(shard=LEGACY_SHARD):
+    """Move indexes left at the index roots by pre-shard builds into the shard's directory.
+
+    When the shard already has its own index, the old root copy is deleted instead,
+    so it no longer takes disk space unused.
+    """
+    for backend in ("chroma", "flat"):
+        root = RESTAURANT_DB_PATH if backend == "chroma" else NUMPY_INDEX_PATH
+        entries = _legacy_entries(root, backend)
+        if not entries:
+            continue
+        target = shard_index_directory(shard, backend)
+        built = (load_manifest(target) is not None if backend == "chroma"
+                 else os.path.exists(os.path.join(target, "index.json")))
+        try:
+            if built:
+                for path in entries:
+                    if os.path.isdir(path):
+                        shutil.rmtree(path)
+                    else:
+                        os.remove(path)
+                print(f"Deleted the old restaurant index in {root}; shard '{shard}' has its own")
+            else:
+                os.makedirs(target, exist_ok=True)
+                for path in entries:
+                    shutil.move(path, os.path.join(target, os.path.basename(path)))
+                print(f"Moved the restaurant index in {root} to {target}")
+        except OSError as e:
+            print(f"Could not migrate the restaurant index in {root}: {str(e)}")
+
+
+def shard_for_destination(destination, shards=None):
+    """Pick the shard for a trip destination (airport code or city): a city shard, else the country's"""
+    shards = available_shards() if shards is None else shards
+    airport = lookup_airport(destination)
+    city = airport[1] if airport else destination
+    country = airport_country(airport[0]) if airport else None
+    for name in (city, country):
+        if name and shard_slug(name) in shards:
+            return shard_slug(name)
+    return None
+
+
+def _directory_bytes(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _array_bytes(obj, depth=2):
+    """Bytes held by the NumPy arrays on an object and the objects it holds"""
+    total = 0
+    for value in vars(obj).values():
+        if isinstance(value, np.memmap):
+            continue
+        if isinstance(value, np.ndarray):
+            total += value.nbytes
+        elif isinstance(value, dict):
+            total += sum(v.nbytes for v in value.values() if isinstance(v, np.ndarray) and not isinstance(v, np.memmap))
+        elif depth and hasattr(value, "__dict__") and not callable(value):
+            total += _array_bytes(value, depth - 1)
+    return total
+
+
+@dataclass
+class Shard:
+    """A loaded shard: lexical/geo search index, vector index and estimated resident memory"""
+    name: str
+    search_index: Optional[RestaurantSearchIndex]
+    vector_store: Any
+    memory_bytes: int
+    load_seconds: float
+
+
+class RestaurantShards:
+    """Registry of restaurant shards with an LRU of loaded ones.
+
+    Shards load on first use and are evicted least-recently-used first once more
+    than `max_shards` are loaded or their estimated memory exceeds `max_memory_mb`.
+    The shard being used is never evicted, so one oversized shard still works.
+    """
+
+    def __init__(self, embeddings_factory, max_memory_mb=RESTAURANT_SHARD_MEMORY_MB,
+                 max_shards=RESTAURANT_MAX_SHARDS, backend=VECTOR_BACKEND):
+        self.embeddings_factory = embeddings_factory
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024
+        self.max_shards = max_shards
+        self.backend = backend
+        self._loaded = OrderedDict()
+        self._loading = set()
+        self._failed = {}
+        self._lock = threading.Lock()
+        self._shard_locks = {}
+        self.counters = {"loads": 0, "hits": 0, "evictions": 0}
+        migrate_root_indexes()
+
+    def peek(self, name):
+        """The shard if it is already loaded, without loading it"""
+        with self._lock:
+            return self._loaded.get(name)
+
+    def get(self, name):
+        """The loaded shard, loading (and evicting others) if needed; None if it has no data"""
+        with self._lock:
+            shard = self._loaded.get(name)
+            if shard is not None:
+                self._loaded.move_to_end(name)
+                self.counters["hits"] += 1
+                return shard
+            lock = self._shard_locks.setdefault(name, threading.Lock())
+        # A per-shard lock lets other shards keep serving while this one loads
+        with lock:
+            shard = self.peek(name)
+            if shard is not None:
+                return shard
+            if not os.path.exists(shard_data_path(name)):
+                return None
+            shard = self._load(name)
+            with self._lock:
+                self._loaded[name] = shard
+                self._loaded.move_to_end(name)
+                self._evict(keep=name)
+            return shard
+
+    def prefetch(self, name):
+        """Start loading a shard in the background; returns immediately"""
+        if name is None or self.peek(name) is not None:
+            return
+        threading.Thread(target=self._prefetch, args=(name,), name=f"shard-{name}", daemon=True).start()
+
+    def _prefetch(self, name):
+        try:
+            self.get(name)
+        except Exception as e:
+            print(f"Loading restaurant shard '{name}' failed: {str(e)}")
+
+    def _load(self, name):
+        start = time.perf_counter()
+        with self._lock:
+            self._loading.add(name)
+        try:
+            data_path = shard_data_path(name)
+            print(f"Loading restaurant shard '{name}' ({self.backend} backend)...")
+            vector_store = open_restaurant_index(self.embeddings_factory(), self.backend, data_path=data_path,
+                                                 directory=shard_index_directory(name, self.backend))
+            restaurants = load_restaurants(data_path)
+            stopwords = shard_profile(name).get("stopwords", ())
+            search_index = RestaurantSearchIndex(restaurants, stopwords) if restaurants else None
+            memory = os.path.getsize(data_path) * RECORD_MEMORY_FACTOR
+            if search_index is not None:
+                memory += _array_bytes(search_index)
+            if vector_store is not None:
+                # Chroma keeps its HNSW index in memory; memmapped NumPy vectors stay in the page cache
+                memory += (_directory_bytes(shard_index_directory(name, self.backend)) if self.backend == "chroma"
+                           else _array_bytes(vector_store))
+            with self._lock:
+                self._failed.pop(name, None)
+                self.counters["loads"] += 1
+        except Exception as e:
+            with self._lock:
+                self._failed[name] = str(e)
+            raise
+        finally:
+            with self._lock:
+                self._loading.discard(name)
+        seconds = time.perf_counter() - start
+        print(f"Restaurant shard '{name}' loaded in {seconds:.1f}s (~{memory / 1e6:.0f} MB)")
+        return Shard(name, search_index, vector_store, memory, seconds)
+
+    def _evict(self, keep):
+        # Called with self._lock held
+        while len(self._loaded) > 1 and (len(self._loaded) > self.max_shards
+                                         or self.memory_bytes() > self.max_memory_bytes):
+            name = next(iter(self._loaded))
+            if name == keep:
+                self._loaded.move_to_end(name)
+                name = next(iter(self._loaded))
+            evicted = self._loaded.pop(name)
+            self.counters["evictions"] += 1
+            print(f"Evicted restaurant shard '{name}' (~{evicted.memory_bytes / 1e6:.0f} MB)")
+
+    def error(self, name):
+        """Why the shard's last load failed, or None"""
+        with self._lock:
+            return self._failed.get(name)
+
+    def memory_bytes(self):
+        return sum(shard.memory_bytes for shard in self._loaded.values())
+
+    def status(self, name):
+        with self._lock:
+            if name in self._loaded:
+                return LOADED
+            if name in self._loading:
+                return LOADING
+            if name in self._failed:
+                return FAILED
+        directory = shard_index_directory(name, self.backend)
+        if self.backend == "chroma":
+            return BUILT if load_manifest(directory) is not None else NOT_BUILT
+        return BUILT if os.path.exists(os.path.join(directory, "index.json")) else NOT_BUILT
+
+    def registry(self):
+        """Every available shard with its build status and, when loaded, its memory use"""
+        entries = []
+        for name in available_shards():
+            shard = self.peek(name)
+            entries.append({
+                "shard": name,
+                "label": shard_label(name),
+                "status": self.status(name),
+                "data_mb": round(os.path.getsize(shard_data_path(name)) / 1e6, 1),
+                "memory_mb": round(shard.memory_bytes / 1e6, 1) if shard else None,
+                "error": self.error(name),
+            })
+        return entries
+
+
+def _embeddings():
+    from ai.research_assistant import ResearchAssistant
+    return ResearchAssistant.get_embeddings()
+
+
+restaurant_shards = RestaurantShards(_embeddings)
@@ -0,0 +1,103 @@
+"""Loading and rendering of restaurant records for the research assistant's indexes."""
+import hashlib
+import json
+import os
+import re
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+RESTAURANT_DATA_PATH = os.path.join(DATA_DIR, 'thailand_restaurants.json')
+
+PRICE_WORDS = {"inexpensive": 1, "cheap": 1, "moderate": 2, "expensive": 3, "very expensive": 4}
+
+
+def load_restaurants(data_path=RESTAURANT_DATA_PATH):
+    """Load the restaurant dataset, returning None if it is missing or invalid"""
+    print(f"Loading restaurant data from: {data_path}")
+    try:
+        with open(data_path, 'r', encoding='utf-8') as f:
+            restaurants = json.load(f)
+        print(f"Successfully loaded {len(restaurants)} restaurants")
+        return restaurants
+    except FileNotFoundError as e:
+        print(f"Error: Could not find restaurant data file: {e}")
+        return None
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON in restaurant data: {e}")
+        return None
+
+
+def clean_metadata_value(value):
+    """Clean metadata values to ensure they are valid types"""
+    if value is None:
+        return ""
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _as_float(value, default=0.0):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def restaurant_id(restaurant):
+    """Stable identifier for a restaurant record"""
+    for key in ("place_id", "cid", "id"):
+        if restaurant.get(key):
+            return str(restaurant[key])
+    raw = "|".join(str(restaurant.get(key, "")) for key in ("name", "address", "lat", "lon"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def price_level(price_range):
+    """Map a price range like "$$", "฿฿฿" or "฿100-200" to a 1-4 level (0 if unknown)"""
+    if not price_range:
+        return 0
+    text = str(price_range).strip().lower()
+    if text in PRICE_WORDS:
+        return PRICE_WORDS[text]
+    symbols = len(re.findall(r"[$฿€£¥₹]", text))
+    numbers = [float(n.replace(",", "")) for n in re.findall(r"\d[\d,]*(?:\.\d+)?", text)]
+    if numbers:
+        # Upper bound of a THB range per person
+        top = max(numbers)
+        return 1 if top <= 200 else 2 if top <= 500 else 3 if top <= 1000 else 4
+    return min(symbols, 4)
+
+
+def render_restaurant_document(restaurant):
+    """Create a detailed text description of a restaurant for embedding"""
+    open_hours = ""
+    if restaurant.get('open_hours'):
+        for day, hours in restaurant['open_hours'].items():
+            open_hours += f"{day}: {hours}\n"
+
+    return f"""
+            Name: {restaurant.get('name', 'N/A')}
+            Category: {restaurant.get('category', 'N/A')}
+            Address: {restaurant.get('address', 'N/A')}
+            Rating: {restaurant.get('rating', 'N/A')} ({restaurant.get('reviews_count', 0)} reviews)
+            Opening Hours:
+            {open_hours}
+            Current Status: {restaurant.get('open_hours_updated', 'N/A')}
+            Phone: {restaurant.get('phone_number', 'N/A')}
+            Website: {restaurant.get('open_website', 'N/A')}
+            Price Range: {restaurant.get('price_range', 'N/A')}
+            Services: {str(restaurant.get('services_provided', 'N/A'))}
+            Location: Lat {restaurant.get('lat', 'N/A')}, Lon {restaurant.get('lon', 'N/A')}
+            """
+
+
+def restaurant_metadata(restaurant):
+    """Structured metadata stored next to each restaurant document"""
+    return {
+        "restaurant_id": restaurant_id(restaurant),
+        "name": clean_metadata_value(restaurant.get('name')),
+        "category": clean_metadata_value(restaurant.get('category')),
+        "rating": _as_float(restaurant.get('rating')),
+        "reviews_count": int(_as_float(restaurant.get('reviews_count'))),
+        "price_range": clean_metadata_value(restaurant.get('price_range')),
+        "price_level": price_level(restaurant.get('price_range')),
+    }
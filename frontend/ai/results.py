@@ -0,0 +1,169 @@
+"""Normalize raw flight and hotel search results into flat, predictable records."""
+import json
+import re
+
+HOTEL_LIST_KEYS = ("hotels", "properties", "results", "organic", "items")
+CURRENCY_SYMBOLS = {"$": "USD", "€": "EUR", "£": "GBP", "¥": "JPY", "฿": "THB", "₹": "INR"}
+
+
+def parse_price(value):
+    """Parse a price from a number, a string like "$1,234" or a dict of price fields.
+
+    Returns (amount, currency) where either may be None.
+    """
+    if value is None or isinstance(value, bool):
+        return None, None
+    if isinstance(value, (int, float)):
+        return float(value), None
+    if isinstance(value, dict):
+        currency = value.get("currency")
+        for key in ("extracted_value", "value", "amount", "extracted_lowest", "lowest", "price", "total"):
+            if key in value:
+                amount, symbol_currency = parse_price(value[key])
+                if amount is not None:
+                    return amount, currency or symbol_currency
+        return None, currency
+    text = str(value)
+    currency = next((code for symbol, code in CURRENCY_SYMBOLS.items() if symbol in text), None)
+    code = re.search(r"\b([A-Z]{3})\b", text)
+    if code and currency is None:
+        currency = code.group(1)
+    match = re.search(r"\d[\d,]*(?:\.\d+)?", text)
+    if not match:
+        return None, currency
+    return float(match.group(0).replace(",", "")), currency
+
+
+def _parse_number(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    match = re.search(r"\d[\d,]*(?:\.\d+)?", str(value or ""))
+    if not match:
+        return None
+    number = float(match.group(0).replace(",", ""))
+    return int(number) if number.is_integer() else number
+
+
+def _first(record, *keys):
+    for key in keys:
+        if record.get(key) not in (None, "", []):
+            return record[key]
+    return None
+
+
+def _find_hotel_list(data):
+    """Locate the list of hotel records inside a search response"""
+    if isinstance(data, list):
+        return [item for item in data if isinstance(item, dict)]
+    if not isinstance(data, dict):
+        return []
+    for key in HOTEL_LIST_KEYS:
+        if isinstance(data.get(key), list):
+            return [item for item in data[key] if isinstance(item, dict)]
+    # Fall back to the largest list of named records anywhere in the response
+    best = []
+    for value in data.values():
+        candidates = _find_hotel_list(value) if isinstance(value, (dict, list)) else []
+        if len(candidates) > len(best) and any(_first(c, "name", "title") for c in candidates):
+            best = candidates
+    return best
+
+
+def _coordinates(record):
+    for key in ("gps_coordinates", "location", "coordinates", "geo"):
+        value = record.get(key)
+        if isinstance(value, dict):
+            lat = _first(value, "latitude", "lat")
+            lon = _first(value, "longitude", "lon", "lng")
+            if lat is not None and lon is not None:
+                return float(lat), float(lon)
+    if record.get("lat") is not None and record.get("lon") is not None:
+        return float(record["lat"]), float(record["lon"])
+    return None, None
+
+
+def normalize_hotels(hotels, default_currency="USD"):
+    """Turn a raw hotel search response into a list of flat hotel records"""
+    if isinstance(hotels, str):
+        try:
+            hotels = json.loads(hotels)
+        except json.JSONDecodeError:
+            return []
+
+    records = []
+    for index, raw in enumerate(_find_hotel_list(hotels)):
+        name = _first(raw, "name", "title")
+        if not name:
+            continue
+        price, currency = parse_price(_first(
+            raw, "price_per_night", "rate_per_night", "price", "extracted_price", "prices"
+        ))
+        total, _ = parse_price(_first(raw, "total_rate", "total_price"))
+        lat, lon = _coordinates(raw)
+        amenities = raw.get("amenities") or []
+        records.append({
+            "id": f"H{index + 1}",
+            "name": str(name),
+            "price_per_night": price,
+            "total_price": total,
+            "currency": currency or default_currency,
+            "rating": _parse_number(_first(raw, "rating", "overall_rating", "score")),
+            "reviews": _parse_number(_first(raw, "reviews", "reviews_cnt", "reviews_count")),
+            "hotel_class": _first(raw, "hotel_class", "stars", "class"),
+            "amenities": [str(a) for a in amenities] if isinstance(amenities, list) else [str(amenities)],
+            "lat": lat,
+            "lon": lon,
+            "link": _first(raw, "link", "url"),
+            "raw": raw,
+        })
+    return records
+
+
+def _extract_json(text):
+    """Pull the first JSON object out of an LLM/agent text result"""
+    if isinstance(text, dict):
+        return text
+    if not isinstance(text, str):
+        return None
+    text = re.sub(r"```(?:json)?", "", text)
+    start = text.find("{")
+    while start != -1:
+        try:
+            obj, _ = json.JSONDecoder().raw_decode(text[start:])
+            if isinstance(obj, dict):
+                return obj
+        except json.JSONDecodeError:
+            pass
+        start = text.find("{", start + 1)
+    return None
+
+
+def _normalize_leg(leg, direction):
+    if not isinstance(leg, dict):
+        return None
+    price, currency = parse_price(leg.get("price"))
+    return {
+        "direction": direction,
+        "airline": leg.get("airline"),
+        "origin": leg.get("origin"),
+        "destination": leg.get("destination"),
+        "start_time": leg.get("start_time"),
+        "end_time": leg.get("end_time"),
+        "duration": leg.get("duration"),
+        "num_stops": _parse_number(leg.get("num_stops")),
+        "stop_locations": leg.get("stop_locations"),
+        "price": price,
+        "currency": currency or "USD",
+    }
+
+
+def normalize_flights(flights):
+    """Turn the flight scraper result into a list of flight leg records"""
+    data = _extract_json(flights)
+    if not data:
+        return []
+    legs = [
+        _normalize_leg(data.get("outbound_flight"), "outbound"),
+        _normalize_leg(data.get("return_flight"), "return"),
+    ]
+    return [leg for leg in legs if leg]
@@ -0,0 +1,150 @@
+"""Intent routing for research questions: direct tool calls for simple lookups, the agent otherwise."""
+import re
+import threading
+from dataclasses import dataclass
+from typing import Optional
+from langchain_core.callbacks import BaseCallbackHandler
+from ai.llm_cache import llm_cache
+from ai.models import ROUTER_MODEL_NAME
+from ai.streaming import chunk_text
+
+RESTAURANT_TOOL = "Restaurant_Info"
+NEARBY_TOOL = "Restaurants_Nearby"
+TRIP_TOOL = "Trip_Details"
+SEARCH_TOOL = "Search"
+
+FOOD_PATTERN = re.compile(
+    r"\b(restaurants?|eat|eating|food|foods|dining|dine|cuisine|seafood|cafes?|coffee|breakfast|brunch|"
+    r"lunch|dinner|street food|noodles?|vegetarian|vegan|halal|bars?|bakery|bakeries|desserts?|"
+    r"pad thai|som tam|curry|buffet|michelin)\b", re.I)
+NEARBY_PATTERN = re.compile(r"\b(near|nearby|close to|closest|nearest|walking distance|within \d)", re.I)
+TRIP_PATTERN = re.compile(r"\b(my (?:hotel|flights?|booking|trip|reservation)|H\d+|check[- ]in|check[- ]out)\b", re.I)
+SEARCH_PATTERN = re.compile(
+    r"\b(weather|visa|transit|transport(?:ation)?|trains?|bus(?:es)?|taxis?|grab|ferry|ferries|currency|"
+    r"exchange rate|tipping|customs|etiquette|dress code|safety|safe|festivals?|events?|temples?|"
+    r"attractions?|things to do|museums?|beach(?:es)?|markets?|sim card|airport transfer|shopping|"
+    r"nightlife|tours?|islands?|scams?|plugs?|vaccin\w*|airports?|how far|distance|"
+    r"how (?:do|can) (?:i|we) get)\b", re.I)
+MULTI_STEP_PATTERN = re.compile(
+    r"\b(itinerary|plan (?:a|my|the|our)|compare|comparison|then|after that|day[- ]by[- ]day|"
+    r"schedule|versus|vs\.?|pros and cons|step by step)\b", re.I)
+
+ROUTER_PROMPT = """Classify this travel research question for routing. Answer with exactly one word:
+restaurants - a single restaurant lookup (cuisine, rating, price, opening hours)
+nearby - restaurants near a specific hotel, restaurant or area
+trip - details of the traveler's booked hotels or flights
+search - one general travel fact (weather, visa, transport, attractions)
+agent - anything needing several steps, comparisons or planning
+
+Question: {question}
+Answer:"""
+ROUTER_ANSWERS = {
+    "restaurants": RESTAURANT_TOOL,
+    "nearby": NEARBY_TOOL,
+    "trip": TRIP_TOOL,
+    "search": SEARCH_TOOL,
+    "agent": None,
+}
+
+
+@dataclass
+class Route:
+    """Where a question goes: a tool to call directly, or None for the full agent"""
+    tool: Optional[str]
+    reason: str
+
+
+def route_by_rules(question, can_locate=None, has_restaurants=True):
+    """Route with keyword rules; returns None when the rules are not sure.
+
+    Without restaurant data for the destination (`has_restaurants` False), food
+    questions go to web search instead of the restaurant tools.
+    """
+    food = bool(FOOD_PATTERN.search(question))
+    search = bool(SEARCH_PATTERN.search(question))
+    trip = bool(TRIP_PATTERN.search(question))
+    if MULTI_STEP_PATTERN.search(question) or question.count("?") > 1:
+        return Route(None, "multi-step")
+    if food and not has_restaurants:
+        return Route(SEARCH_TOOL, "no restaurant data for this destination") if not trip else None
+    if food and NEARBY_PATTERN.search(question):
+        if can_locate is None or can_locate(question):
+            return Route(NEARBY_TOOL, "nearby restaurants")
+        return None
+    if food and not search:
+        return Route(RESTAURANT_TOOL, "restaurant lookup")
+    if search and not food and not trip:
+        return Route(SEARCH_TOOL, "general search")
+    if trip and not food and not search:
+        return Route(TRIP_TOOL, "trip details")
+    if food and search:
+        return Route(None, "mixed restaurant and travel question")
+    return None
+
+
+def route_question(question, router_llm=None, can_locate=None, callbacks=None, has_restaurants=True):
+    """Rules first; unclear questions go to a small model, and to the agent if that fails"""
+    route = route_by_rules(question, can_locate, has_restaurants)
+    if route is not None or router_llm is None:
+        return route or Route(None, "no rule matched")
+    try:
+        answer = llm_cache.cached(
+            "research_route",
+            ROUTER_PROMPT.format(question=question),
+            lambda: chunk_text(router_llm.invoke(ROUTER_PROMPT.format(question=question),
+                                                 config={"callbacks": callbacks or []})),
+            semantic=True,
+            model_name=ROUTER_MODEL_NAME,
+        )
+    except Exception as e:
+        print(f"Router model failed, using the agent: {str(e)}")
+        return Route(None, "router error")
+    word = str(answer).strip().lower().split()[0].strip(".") if str(answer).strip() else "agent"
+    tool = ROUTER_ANSWERS.get(word)
+    if tool in (RESTAURANT_TOOL, NEARBY_TOOL) and not has_restaurants:
+        tool = SEARCH_TOOL
+    if tool == NEARBY_TOOL and can_locate is not None and not can_locate(question):
+        tool = None
+    return Route(tool, f"router model: {word}")
+
+
+class LLMCallCounter(BaseCallbackHandler):
+    """Counts LLM round-trips made while handling one research turn"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.calls += 1
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.calls += 1
+
+
+class RouterStats:
+    """Thread-safe counters for routed turns and LLM round-trips per research turn"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.direct = 0
+        self.llm_calls = 0
+
+    def record(self, direct, llm_calls):
+        with self._lock:
+            self.turns += 1
+            self.direct += 1 if direct else 0
+            self.llm_calls += llm_calls
+
+    @property
+    def average_round_trips(self):
+        return self.llm_calls / self.turns if self.turns else 0.0
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "turns": self.turns,
+                "direct": self.direct,
+                "agent": self.turns - self.direct,
+                "average_round_trips": self.average_round_trips,
+            }
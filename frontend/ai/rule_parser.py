@@ -0,0 +1,441 @@
+import re
+import threading
+from datetime import date, timedelta
+from ai.airports import AIRPORTS, CITY_AIRPORTS
+
+# Minimum confidence for the rule-based result to be used without calling the LLM
+FAST_PATH_CONFIDENCE = 0.9
+# Longer date spans are more likely a misparse than a real trip
+MAX_PLAUSIBLE_TRIP_DAYS = 60
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "fourteen": 14, "twenty": 20, "thirty": 30,
+}
+
+_NUMBER = r"(\d+|" + "|".join(NUMBER_WORDS) + r")"
+_MONTH = (r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|"
+          r"sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?")
+_DAY = r"(\d{1,2})(?:st|nd|rd|th)?"
+_YEAR = r"(?:,?\s+(\d{4}))?"
+_RANGE_END = r"(?:\s*(?:-|–|to|until|till|through|thru)\s*" + _DAY + r"(?![\d/:]|\s*" + _MONTH + r"))?"
+
+DATE_PATTERNS = [
+    # December 1st, 2024 / Dec 1-8, 2024
+    ("month_day", re.compile(r"\b" + _MONTH + r"\s+" + _DAY + r"\b" + _RANGE_END + _YEAR, re.I)),
+    # 1st of December 2024 / 1 Dec
+    ("day_month", re.compile(r"\b" + _DAY + r"\s+(?:of\s+)?" + _MONTH + r"\b" + _YEAR, re.I)),
+    # 2024-12-01
+    ("iso", re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")),
+    # 12/01/2024 or 12/01 (US month/day order)
+    ("slash", re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\b")),
+    ("relative_day", re.compile(r"\b(today|tomorrow|day after tomorrow)\b", re.I)),
+    ("weekday", re.compile(r"\b(this|next|coming)\s+(" + "|".join(WEEKDAYS) + r"|week(?:end)?|month)\b", re.I)),
+    ("in_n", re.compile(r"\bin\s+" + _NUMBER + r"\s+(day|week|month)s?\b", re.I)),
+]
+DURATION_PATTERN = re.compile(r"\bfor\s+(?:about\s+)?" + _NUMBER + r"\s+(day|night|week)s?\b", re.I)
+
+TRAVELER_PATTERNS = [
+    re.compile(r"\b" + _NUMBER + r"\s+(?:travell?ers|people|persons|adults|guests|passengers|pax|of us)\b", re.I),
+    re.compile(r"\b(?:party|group|family)\s+of\s+" + _NUMBER + r"\b", re.I),
+    re.compile(r"\b(?:travell?ers|guests|passengers|people)\s*:\s*(\d+)\b", re.I),
+]
+# Travelers counted by kind ("2 adults and 2 kids") add up to the party size
+PARTY_PATTERN = re.compile(
+    r"\b" + _NUMBER + r"\s+(?:adults?|kids?|children|child|infants?|bab(?:y|ies)|toddlers?|teens?|teenagers?|"
+    r"seniors?)\b", re.I)
+SOLO_PATTERN = re.compile(r"\b(solo|alone|by myself|just me)\b", re.I)
+COUPLE_PATTERN = re.compile(r"\b(couple|honeymoon|my (?:wife|husband|partner|girlfriend|boyfriend)|the two of us)\b", re.I)
+
+MONEY_PATTERN = re.compile(
+    r"(?:(?:\$|usd\s*|us\$)\s?(\d[\d,]*(?:\.\d+)?)\s*(k)?|(\d[\d,]*(?:\.\d+)?)\s*(k)?\s*(?:usd|dollars|bucks)\b)",
+    re.I,
+)
+PER_NIGHT_PATTERN = re.compile(r"^\s*(?:/\s*night|/\s*nt|per\s+night|a\s+night|each\s+night|nightly)", re.I)
+
+CABIN_CLASSES = [
+    ("premium economy", re.compile(r"\bpremium economy\b", re.I)),
+    ("business", re.compile(r"\bbusiness(?:\s+class)?\b", re.I)),
+    ("first", re.compile(r"\bfirst[\s-]class\b", re.I)),
+    ("economy", re.compile(r"\b(?:economy|coach)\b", re.I)),
+]
+DIRECT_PATTERN = re.compile(r"\b(direct|non[\s-]?stop)\b", re.I)
+INDIRECT_PATTERN = re.compile(r"\b(layovers?|stopovers?|connections? (?:are |is )?(?:ok|fine))\b", re.I)
+
+ACCOMMODATION_TYPES = ["hostel", "resort", "apartment", "airbnb", "villa", "guesthouse", "bnb", "hotel"]
+AMENITIES = {
+    "wifi": r"wi-?fi|internet",
+    "gym": r"gym|fitness",
+    "pool": r"pool",
+    "breakfast": r"breakfast",
+    "parking": r"parking",
+    "spa": r"spa",
+    "air conditioning": r"air[\s-]?con(?:ditioning)?|\bac\b",
+    "kitchen": r"kitchen",
+}
+ACTIVITIES = ["hiking", "beach", "beaches", "islands", "museums", "shopping", "nightlife", "diving",
+              "snorkeling", "surfing", "temples", "sightseeing", "skiing", "tours", "massage"]
+FOODS = ["street food", "seafood", "vegetarian", "vegan", "halal", "kosher", "gluten-free",
+         "local food", "fine dining", "thai food", "sushi"]
+
+# Every known place name, longest first so "new york city" wins over "new york"
+_PLACE_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(c) for c in sorted(CITY_AIRPORTS, key=len, reverse=True)) + r")\b"
+    r"|\b([A-Z]{3})\b",
+    re.I,
+)
+_ORIGIN_HINT = re.compile(
+    r"\b(from|leaving|departing|out of|(?:live|living|am|i'm|are|we're|based|staying|currently|home is) in)"
+    r"\s+(?:the\s+)?$", re.I)
+_DESTINATION_HINT = re.compile(r"\b(to|in|visit|visiting|into|towards|destination:?)\s+(?:the\s+)?$", re.I)
+
+
+class ParserStats:
+    """Thread-safe counters for how often the rule-based fast path is used"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.fast_path = 0
+
+    def record(self, hit):
+        with self._lock:
+            self.total += 1
+            if hit:
+                self.fast_path += 1
+
+    @property
+    def hit_rate(self):
+        return self.fast_path / self.total if self.total else 0.0
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "total": self.total,
+                "fast_path": self.fast_path,
+                "llm_fallback": self.total - self.fast_path,
+                "hit_rate": self.hit_rate,
+            }
+
+
+def format_date(value):
+    """Format a date the way the rest of the app expects it: May 2, 2025"""
+    return f"{value:%B} {value.day}, {value.year}"
+
+
+def _to_number(token):
+    token = token.lower()
+    return int(token) if token.isdigit() else NUMBER_WORDS.get(token)
+
+
+def _month_number(token):
+    return MONTHS.get(token.lower().rstrip(".")[:3])
+
+
+def _safe_date(year, month, day):
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _infer_year(month, day, today, not_before=None):
+    """Pick the next occurrence of month/day on or after `not_before` (or today)"""
+    anchor = not_before or today
+    candidate = _safe_date(anchor.year, month, day)
+    if candidate and candidate < anchor:
+        candidate = _safe_date(anchor.year + 1, month, day)
+    return candidate
+
+
+def _find_places(text):
+    """Return (position, code) for each known airport code or city mention"""
+    places = []
+    for match in _PLACE_PATTERN.finditer(text):
+        if match.group(1):
+            code = CITY_AIRPORTS[match.group(1).lower()]
+        else:
+            # Bare three-letter tokens only count as airport codes when typed in capitals
+            token = match.group(2)
+            if not (token.isupper() and token in AIRPORTS):
+                continue
+            code = token
+        places.append((match.start(), code))
+    return places
+
+
+def _parse_places(text):
+    """Assign origin and destination airports; returns (origin, destination, ambiguous)"""
+    places = _find_places(text)
+    origin = destination = None
+    unassigned = []
+    # Two places hinted for the same role ("I live in Seattle ... from Portland") cannot both be right
+    conflict = False
+    for position, code in places:
+        prefix = text[max(0, position - 20):position]
+        if _ORIGIN_HINT.search(prefix):
+            if origin is None:
+                origin = code
+                continue
+            conflict |= origin != code
+        elif _DESTINATION_HINT.search(prefix):
+            if destination is None:
+                destination = code
+                continue
+            conflict |= destination != code
+        unassigned.append(code)
+
+    # "LAX to NYC" style inputs without explicit hints: first is origin, second is destination
+    for code in unassigned:
+        if code in (origin, destination):
+            continue
+        if origin is None:
+            origin = code
+        elif destination is None:
+            destination = code
+
+    distinct = {code for _, code in places}
+    ambiguous = conflict or len(distinct - {origin, destination}) > 0 or origin == destination
+    return origin, destination, ambiguous
+
+
+def _parse_dates(text, today):
+    """Return the dates mentioned in the text in order, which of them had an explicit year,
+    and a trip duration if stated"""
+    found = []
+    for kind, pattern in DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            found.append((match.start(), match.end(), kind, match))
+    found.sort(key=lambda item: (item[0], -(item[1] - item[0])))
+
+    dates = []
+    explicit = []
+    last_end = -1
+    for start, end, kind, match in found:
+        if start < last_end:
+            continue  # overlaps a longer match
+        last_end = end
+        parsed = [d for d in _resolve_date(kind, match, today, dates[-1] if dates else None) if d]
+        dates.extend(parsed)
+        explicit.extend([_has_year(kind, match)] * len(parsed))
+    _apply_trailing_years(dates, explicit)
+
+    duration = None
+    match = DURATION_PATTERN.search(text)
+    if match:
+        count = _to_number(match.group(1))
+        if count:
+            duration = count * 7 if match.group(2).lower() == "week" else count
+    return dates, explicit, duration
+
+
+def _has_year(kind, match):
+    if kind == "month_day":
+        return bool(match.group(5))
+    if kind in ("day_month", "slash"):
+        return bool(match.group(3))
+    return kind == "iso"
+
+
+def _apply_trailing_years(dates, explicit):
+    """"Dec 1 to Dec 8, 2027" states the year once, at the end: give it to the earlier dates.
+
+    Each year-less date takes the year of the next dated one, or the year before when
+    that would put it after the date it precedes ("Dec 28 to Jan 4, 2027").
+    """
+    following = None
+    for index in range(len(dates) - 1, -1, -1):
+        if explicit[index]:
+            following = dates[index]
+            continue
+        if following is None:
+            continue
+        value = dates[index]
+        anchored = _safe_date(following.year, value.month, value.day)
+        if anchored and anchored > following:
+            anchored = _safe_date(following.year - 1, value.month, value.day)
+        if anchored:
+            dates[index] = following = anchored
+
+
+def _resolve_date(kind, match, today, previous):
+    if kind == "month_day":
+        month = _month_number(match.group(1))
+        day, range_day, year = int(match.group(2)), match.group(3), match.group(5)
+        if year:
+            first = _safe_date(int(year), month, day)
+        else:
+            first = _infer_year(month, day, today, previous)
+        if first and range_day:
+            return [first, _safe_date(first.year, month, int(range_day))]
+        return [first]
+    if kind == "day_month":
+        day, month, year = int(match.group(1)), _month_number(match.group(2)), match.group(3)
+        return [_safe_date(int(year), month, day) if year else _infer_year(month, day, today, previous)]
+    if kind == "iso":
+        return [_safe_date(int(match.group(1)), int(match.group(2)), int(match.group(3)))]
+    if kind == "slash":
+        month, day, year = int(match.group(1)), int(match.group(2)), match.group(3)
+        if year:
+            year = int(year) + 2000 if len(year) == 2 else int(year)
+            return [_safe_date(year, month, day)]
+        return [_infer_year(month, day, today, previous)]
+    if kind == "relative_day":
+        word = match.group(1).lower()
+        offset = {"today": 0, "tomorrow": 1}.get(word, 2)
+        return [today + timedelta(days=offset)]
+    if kind == "weekday":
+        target = match.group(2).lower()
+        if target == "month":
+            return [date(today.year + (today.month == 12), today.month % 12 + 1, 1)]
+        if target == "week":
+            weekday = 0  # next week starts on Monday
+        elif target == "weekend":
+            weekday = 5
+        else:
+            weekday = WEEKDAYS.index(target)
+        days = (weekday - today.weekday()) % 7 or 7
+        return [today + timedelta(days=days)]
+    if kind == "in_n":
+        count = _to_number(match.group(1)) or 0
+        unit = match.group(2).lower()
+        days = count * {"day": 1, "week": 7, "month": 30}[unit]
+        return [today + timedelta(days=days)]
+    return []
+
+
+def _parse_travelers(text):
+    """Return (number of travelers or None, whether the text gives conflicting counts)"""
+    party = [_to_number(match.group(1)) or 0 for match in PARTY_PATTERN.finditer(text)]
+    if any(party):
+        return sum(party), False
+    counts = {count for pattern in TRAVELER_PATTERNS
+              for count in (_to_number(match.group(1)) for match in pattern.finditer(text)) if count}
+    if counts:
+        return min(counts), len(counts) > 1
+    if COUPLE_PATTERN.search(text):
+        return 2, False
+    if SOLO_PATTERN.search(text):
+        return 1, False
+    return None, False
+
+
+def _parse_money(text):
+    """Return (budget, max_price_per_night) from dollar amounts in the text"""
+    budget = per_night = None
+    for match in MONEY_PATTERN.finditer(text):
+        raw = match.group(1) or match.group(3)
+        thousands = match.group(2) or match.group(4)
+        amount = float(raw.replace(",", ""))
+        if thousands:
+            amount *= 1000
+        if PER_NIGHT_PATTERN.match(text[match.end():]):
+            per_night = per_night or int(amount)
+        elif budget is None:
+            budget = int(amount)
+    return budget, per_night
+
+
+def _parse_flight(text):
+    cabin = next((name for name, pattern in CABIN_CLASSES if pattern.search(text)), None)
+    direct = None
+    if DIRECT_PATTERN.search(text):
+        direct = True
+    elif INDIRECT_PATTERN.search(text):
+        direct = False
+    return {"class": cabin, "direct": direct}
+
+
+def _parse_accommodation(text, per_night):
+    lowered = text.lower()
+    accommodation_type = next((t for t in ACCOMMODATION_TYPES if re.search(rf"\b{t}s?\b", lowered)), None)
+    amenities = [name for name, pattern in AMENITIES.items() if re.search(pattern, lowered)]
+    return {
+        "type": accommodation_type,
+        "max_price_per_night": per_night,
+        "amenities": amenities,
+    }
+
+
+def parse_travel_request(text, today=None):
+    """Deterministically parse a travel description into the travel preferences schema.
+
+    Returns the same fields as the LLM structured output plus a `confidence` score
+    in [0, 1]. Only inputs scoring at least FAST_PATH_CONFIDENCE should skip the LLM.
+    """
+    today = today or date.today()
+    origin, destination, ambiguous_places = _parse_places(text)
+    dates, explicit, duration = _parse_dates(text, today)
+
+    start_date = dates[0] if dates else None
+    end_date = dates[1] if len(dates) > 1 else None
+    if start_date and end_date is None and duration:
+        end_date = start_date + timedelta(days=duration)
+    if start_date and end_date and end_date < start_date and not (len(explicit) > 1 and explicit[1]):
+        # "Dec 28 to Jan 4" without years rolls the return date into the next year
+        end_date = _safe_date(end_date.year + 1, end_date.month, end_date.day)
+
+    budget, per_night = _parse_money(text)
+    travelers, ambiguous_travelers = _parse_travelers(text)
+    lowered = text.lower()
+
+    result = {
+        "origin_airport_code": origin,
+        "destination_airport_code": destination,
+        "destination_city_name": AIRPORTS[destination][0] if destination else None,
+        "num_guests": travelers,
+        "start_date": format_date(start_date) if start_date else None,
+        "end_date": format_date(end_date) if end_date else None,
+        "budget": budget,
+        "accommodation": _parse_accommodation(text, per_night),
+        "flight": _parse_flight(text),
+        "activities": [a for a in ACTIVITIES if re.search(rf"\b{a}\b", lowered)],
+        "food_preferences": [f for f in FOODS if f in lowered],
+    }
+
+    # Core fields needed to start a search carry the score; ambiguity costs confidence
+    confidence = 0.0
+    confidence += 0.3 if origin else 0.0
+    confidence += 0.3 if destination else 0.0
+    confidence += 0.2 if start_date else 0.0
+    confidence += 0.2 if end_date else 0.0
+    if ambiguous_places:
+        confidence -= 0.3
+    if ambiguous_travelers:
+        # The guest count drives hotel search and pricing, so a guess is not good enough
+        confidence -= 0.2
+    if len(dates) > 2:
+        confidence -= 0.2
+    if start_date and start_date < today:
+        confidence -= 0.2
+    if start_date and end_date and not 0 <= (end_date - start_date).days <= MAX_PLAUSIBLE_TRIP_DAYS:
+        confidence -= 0.2
+    result["confidence"] = round(max(confidence, 0.0), 2)
+    return result
+
+
+def main():
+    """Report the fast-path hit rate over a file of travel descriptions, one per line"""
+    import sys
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "../examples.txt"
+    stats = ParserStats()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            parsed = parse_travel_request(line)
+            stats.record(parsed["confidence"] >= FAST_PATH_CONFIDENCE)
+            print(f"[{parsed['confidence']:.2f}] {line[:80]}")
+    print(stats.as_dict())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+def chunk_text(chunk):
+    """Extract the text of a streamed message chunk (plain string or content blocks)"""
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block.get("text", "") if isinstance(block, dict) else str(block)
+            for block in content
+        )
+    return str(content or "")
+
+
+def stream_text(llm, prompt, config=None):
+    """Yield the text of a model completion as it is generated"""
+    for chunk in llm.stream(prompt, config=config):
+        text = chunk_text(chunk)
+        if text:
+            yield text
+
+
+def format_agent_step(step):
+    """Render an intermediate ReAct agent step (tool call or observation) as markdown"""
+    lines = []
+    for action in step.get("actions", []):
+        lines.append(f"🔧 *Using {action.tool}:* `{str(action.tool_input)[:200]}`\n\n")
+    for agent_step in step.get("steps", []):
+        observation = str(agent_step.observation).strip().replace("\n", " ")
+        lines.append(f"📄 *{agent_step.action.tool} returned {len(observation)} characters*\n\n")
+    return "".join(lines)
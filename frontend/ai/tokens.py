@@ -0,0 +1,21 @@
+import math
+
+# Rough characters-per-token ratio for English text with Claude-style tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Estimate the number of tokens in a piece of text"""
+    if not text:
+        return 0
+    return math.ceil(len(str(text)) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text, max_tokens, suffix="…"):
+    """Cut text down to roughly `max_tokens` tokens, ending on a word boundary"""
+    text = str(text or "")
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max(0, max_tokens * CHARS_PER_TOKEN - len(suffix))
+    cut = text[:limit].rsplit(" ", 1)[0] if " " in text[:limit] else text[:limit]
+    return cut.rstrip(" ,;") + suffix
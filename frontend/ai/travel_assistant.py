@@ -1,8 +1,11 @@
-from langchain.memory import ConversationBufferMemory
+import re
 from langchain.chains import ConversationChain
 from dotenv import load_dotenv
 from ai.models import model
-from ai.context import generate_travel_context_memory
+from ai.context import generate_travel_context_memory, lookup_trip_details
+from ai.memory import create_memory
+from ai.streaming import chunk_text, stream_text
+from util.tracing import span
 
 load_dotenv()
 
@@ -14,12 +17,8 @@ class TravelAssistant:
 
     def _create_assistant(self):
         """Create a travel assistant with context about the trip"""
-        memory = ConversationBufferMemory()
-        
-        # Add travel context to memory
-        memory.chat_memory.add_ai_message(
-            generate_travel_context_memory(self.context)
-        )
+        # Travel context stays pinned in memory however long the chat gets
+        memory = create_memory(generate_travel_context_memory(self.context))
         
         return ConversationChain(
             llm=model,
@@ -27,9 +26,38 @@ class TravelAssistant:
             verbose=True
         )
 
+    def _with_details(self, prompt):
+        """Attach full details for hotels referenced by ID (e.g. H1) or for flights"""
+        lookups = re.findall(r"\bH\d+\b", prompt)
+        if re.search(r"\bflights?\b", prompt, re.I):
+            lookups.append("flights")
+        if not lookups:
+            return prompt
+        details = "\n\n".join(lookup_trip_details(self.context, query) for query in dict.fromkeys(lookups))
+        return f"{prompt}\n\n(Details for reference:\n{details})"
+
+    def _build_prompt(self, prompt):
+        """Format the conversation prompt; looked-up details are not kept in memory"""
+        memory = self.assistant.memory
+        history = memory.load_memory_variables({})[memory.memory_key]
+        return self.assistant.prompt.format(history=history, input=self._with_details(prompt))
+
     def get_response(self, prompt):
         """Get response from the assistant"""
-        return self.assistant.predict(input=prompt)
+        with span("TravelAssistant.get_response"):
+            response = chunk_text(model.invoke(self._build_prompt(prompt)))
+            self.assistant.memory.save_context({"input": prompt}, {"response": response})
+            return response
+
+    def stream_response(self, prompt):
+        """Stream the assistant's response token by token, then save the turn to memory"""
+        with span("TravelAssistant.stream_response"):
+            chunks = []
+            for text in stream_text(model, self._build_prompt(prompt)):
+                chunks.append(text)
+                yield text
+
+            self.assistant.memory.save_context({"input": prompt}, {"response": "".join(chunks)})
 
     @staticmethod
     def get_suggested_prompts():
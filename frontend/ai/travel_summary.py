@@ -1,5 +1,10 @@
 from dotenv import load_dotenv
 from ai.models import model
+from ai.llm_cache import llm_cache
+from ai.streaming import stream_text
+from ai.pricing import build_price_breakdown, format_price_breakdown
+from ai.results import normalize_flights, normalize_hotels
+from util.tracing import span
 
 load_dotenv()
 
@@ -9,20 +14,60 @@ class TravelSummary:
 
     def get_summary(self, flights, hotels, requirements, **kwargs):
         """Get LLM summary of flights and hotels"""
-        response = self.model.invoke(
-            f"""Summarize the following flight and hotels, including the total price for the duration of the stay, and give me a nicely formatted output: 
+        prompt = self._build_prompt(flights, hotels, requirements, **kwargs)
+        with span("TravelSummary.get_summary"):
+            # Identical or near-identical results and requirements produce the same summary, so reuse it
+            return llm_cache.cached(
+                "travel_summary",
+                prompt,
+                lambda: self.model.invoke(prompt).content,
+                semantic=True
+            )
+
+    def stream_summary(self, flights, hotels, requirements, **kwargs):
+        """Stream the LLM summary as it is generated, serving cached summaries at once"""
+        prompt = self._build_prompt(flights, hotels, requirements, **kwargs)
+        with span("TravelSummary.stream_summary"):
+            cached = llm_cache.get("travel_summary", prompt, semantic=True)
+            if cached is not None:
+                yield cached
+                return
+
+            chunks = []
+            for text in stream_text(self.model, prompt):
+                chunks.append(text)
+                yield text
+            llm_cache.set("travel_summary", prompt, "".join(chunks), semantic=True)
+
+    def _build_prompt(self, flights, hotels, requirements, **kwargs):
+        check_in = kwargs.get('check_in', kwargs.get('start_date'))
+        check_out = kwargs.get('check_out', kwargs.get('end_date'))
+        flight_legs = normalize_flights(flights)
+        breakdown = build_price_breakdown(
+            flight_legs,
+            normalize_hotels(hotels),
+            check_in,
+            check_out,
+            rooms=kwargs.get('rooms', 1),
+            travelers=kwargs.get('occupancy', 1)
+        )
+        flight_lines = "\n".join(
+            f"- {leg['direction']}: {leg.get('airline')}, {leg.get('origin')} {leg.get('start_time')} -> "
+            f"{leg.get('destination')} {leg.get('end_time')}, {leg.get('num_stops')} stop(s), {leg.get('duration')}"
+            for leg in flight_legs
+        ) or f"- {flights}"
+
+        return f"""Summarize the following flight and hotels and give me a nicely formatted output.
             
-            Given this information:
-            Flights: {flights} (the price is PER night)
-            Hotels: {hotels}
+            Trip: {kwargs.get('origin', '')} to {kwargs.get('destination', '')}, {check_in} to {check_out}
             
-            Calculate the total price for the duration of the stay based on the provided information. The duration is from {kwargs.get('start_date', 'unknown start date')} to {kwargs.get('end_date', 'unknown end date')}.
+            Flights:
+            {flight_lines}
             
-            Make a recommendation for the best hotel and flight based on this: {requirements} {kwargs}
+            Precomputed prices (use these numbers exactly, do not recalculate):
+            {format_price_breakdown(breakdown)}
             
-            Note: the price of the flight is the maximum of the two prices listed, NOT the combined price. The total price includes both the flight and hotel costs for the entire duration.
+            Make a recommendation for the best hotel and flight based on this: {requirements}
             
             Only used basic markdown formatting in your reply so it can be easily parsed by the frontend.
             """
-        )
-        return response.content 
\ No newline at end of file
@@ -1,13 +1,41 @@
+from datetime import date
 from ai.schemas import travel_preferences_schema
-from ai.models import model
+from ai.models import MODEL_NAME, model
+from ai.llm_cache import llm_cache
+from ai.rule_parser import FAST_PATH_CONFIDENCE, ParserStats, format_date, parse_travel_request
+from util.tracing import span
 
 user_input_model = model.with_structured_output(travel_preferences_schema)
 
+# Hit rate of the rule-based fast path across this process
+parser_stats = ParserStats()
+
 def get_travel_details(requirements, **kwargs):
-    prompt = f"""
-        Read the following information from the user and extract the data into the structured output fields.
-        {requirements} {kwargs}
-        When providing dates give the format like this: May 2, 2025
-        When providing airport codes give 3 uppercase letters
-    """
-    return user_input_model.invoke(prompt)
+    with span("get_travel_details") as current:
+        # Try the deterministic parser first; only fall back to the LLM when it is unsure
+        parsed = parse_travel_request(requirements)
+        fast_path = not kwargs and parsed["confidence"] >= FAST_PATH_CONFIDENCE
+        parser_stats.record(fast_path)
+        if current is not None:
+            current["attributes"].update(fast_path=fast_path, confidence=parsed["confidence"])
+        print(f"Travel request parser: fast_path={fast_path} confidence={parsed['confidence']} "
+              f"hit_rate={parser_stats.hit_rate:.0%}")
+        if fast_path:
+            return parsed
+
+        # Relative and year-less dates depend on today, so the date is part of the prompt and its cache key
+        prompt = f"""
+            Read the following information from the user and extract the data into the structured output fields.
+            Today's date is {format_date(date.today())}.
+            {requirements} {kwargs}
+            When providing dates give the format like this: May 2, 2025
+            When providing airport codes give 3 uppercase letters
+        """
+        # Exact resubmissions reuse the cached structured output. Near-duplicate matching is
+        # deliberately off: requests differing only in a date or city would share an answer.
+        return llm_cache.cached(
+            "travel_details",
+            prompt,
+            lambda: user_input_model.invoke(prompt),
+            model_name=MODEL_NAME
+        )
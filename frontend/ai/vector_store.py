@@ -0,0 +1,212 @@
+"""In-process NumPy vector index (exact or IVF) as a lightweight alternative to Chroma."""
+import json
+import os
+import shutil
+import time
+import numpy as np
+from langchain_core.documents import Document
+
+# "chroma" (default), "flat" for exact NumPy search or "ivf" for partitioned NumPy search
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "float32").lower()
+NUMPY_INDEX_PATH = "restaurant_vectors"
+IVF_PROBES = int(os.getenv("IVF_PROBES", "8"))
+KMEANS_ITERATIONS = 10
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _kmeans(vectors, clusters, iterations=KMEANS_ITERATIONS, seed=0):
+    """Spherical k-means on normalized vectors; returns (centroids, assignments)"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(clusters):
+            members = vectors[assignments == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+        centroids = _normalize(centroids)
+    return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+
+def _compare(column, op, value):
+    if op == "$eq":
+        return column == value
+    if op == "$ne":
+        return column != value
+    if op == "$gt":
+        return column > value
+    if op == "$gte":
+        return column >= value
+    if op == "$lt":
+        return column < value
+    if op == "$lte":
+        return column <= value
+    if op == "$in":
+        return np.isin(column, list(value))
+    if op == "$nin":
+        return ~np.isin(column, list(value))
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+class NumpyVectorStore:
+    """Embeddings in a memory-mapped matrix, metadata in columnar arrays.
+
+    Rows are L2-normalized so cosine similarity is a dot product. With `ivf=True` the
+    rows are grouped by their nearest k-means centroid and a query only scans the
+    `probes` closest groups. Supports `similarity_search(query, k, filter=...)` with the
+    Chroma `where` operators used by the restaurant search, so it can stand in for Chroma.
+    """
+
+    def __init__(self, directory, embeddings, ivf=False, probes=IVF_PROBES):
+        start = time.perf_counter()
+        self.directory = directory
+        self.embeddings = embeddings
+        self.ivf = ivf
+        self.probes = probes
+        with open(os.path.join(directory, "index.json"), "r", encoding="utf-8") as f:
+            self.info = json.load(f)
+        count, dim = self.info["count"], self.info["dim"]
+        self.quantized = self.info["quantization"] == "int8"
+        if self.quantized:
+            self.vectors = np.memmap(os.path.join(directory, "vectors.i8"), dtype=np.int8, mode="r", shape=(count, dim))
+            self.scales = np.load(os.path.join(directory, "scales.npy"))
+        else:
+            self.vectors = np.memmap(os.path.join(directory, "vectors.f32"), dtype=np.float32, mode="r", shape=(count, dim))
+        self.centroids = np.load(os.path.join(directory, "centroids.npy"))
+        self.list_offsets = np.load(os.path.join(directory, "list_offsets.npy"))
+        with open(os.path.join(directory, "metadata.json"), "r", encoding="utf-8") as f:
+            self.columns = {key: np.array(values) for key, values in json.load(f).items()}
+        self._documents = None
+        self.load_seconds = time.perf_counter() - start
+        print(f"Loaded NumPy vector index ({count} vectors, {self.info['quantization']}) in {self.load_seconds * 1000:.0f}ms")
+
+    @property
+    def documents(self):
+        # Document texts are only needed for results, so they are read on first search
+        if self._documents is None:
+            with open(os.path.join(self.directory, "documents.json"), "r", encoding="utf-8") as f:
+                self._documents = json.load(f)
+        return self._documents
+
+    def __len__(self):
+        return self.info["count"]
+
+    def where_mask(self, where):
+        """Evaluate a Chroma-style `where` clause against the metadata columns"""
+        mask = np.ones(len(self), dtype=bool)
+        if not where:
+            return mask
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self.where_mask(clause)
+            elif key == "$or":
+                mask &= np.logical_or.reduce([self.where_mask(clause) for clause in condition])
+            elif key not in self.columns:
+                mask[:] = False
+            elif isinstance(condition, dict):
+                for op, value in condition.items():
+                    mask &= _compare(self.columns[key], op, value)
+            else:
+                mask &= self.columns[key] == condition
+        return mask
+
+    def _candidates(self, query, mask, k):
+        if not self.ivf:
+            return np.flatnonzero(mask)
+        order = np.argsort(-(self.centroids @ query))
+        probes = self.probes
+        while True:
+            # Rows are stored grouped by list, so each probed list is a contiguous slice
+            rows = np.concatenate([
+                np.arange(self.list_offsets[c], self.list_offsets[c + 1]) for c in order[:probes]
+            ]) if probes else np.empty(0, dtype=np.int64)
+            rows = rows[mask[rows]]
+            if len(rows) >= k or probes >= len(order):
+                # Ascending rows read the map sequentially, and let search_vector treat
+                # "every row" as the whole matrix
+                return np.sort(rows)
+            probes = min(probes * 2, len(order))
+
+    def search_vector(self, query, k=10, mask=None):
+        """Top-k rows for a query vector; returns [(row, score)]"""
+        query = _normalize(query)
+        mask = np.ones(len(self), dtype=bool) if mask is None else mask
+        rows = self._candidates(query, mask, k)
+        if not len(rows):
+            return []
+        # Unfiltered exact search scans the whole map without gathering rows first
+        vectors = self.vectors if len(rows) == len(self) else self.vectors[rows]
+        if self.quantized:
+            scales = self.scales if len(rows) == len(self) else self.scales[rows]
+            scores = (vectors.astype(np.float32) @ query) * scales
+        else:
+            scores = vectors @ query
+        top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(rows[i]), float(scores[i])) for i in top]
+
+    def similarity_search_with_score(self, query, k=4, filter=None):
+        query_vector = self.embeddings.embed_query(query)
+        results = []
+        for row, score in self.search_vector(query_vector, k, self.where_mask(filter)):
+            metadata = {key: values[row].item() if hasattr(values[row], "item") else values[row]
+                        for key, values in self.columns.items()}
+            results.append((Document(page_content=self.documents[row], metadata=metadata), score))
+        return results
+
+    def similarity_search(self, query, k=4, filter=None):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    @staticmethod
+    def build(directory, ids, documents, metadatas, vectors, quantization=VECTOR_QUANTIZATION, fingerprint=""):
+        """Write an index: vectors grouped by IVF list, plus metadata columns and documents"""
+        start = time.perf_counter()
+        vectors = _normalize(vectors)
+        count, dim = vectors.shape
+        clusters = max(1, min(int(np.sqrt(count)), count))
+        centroids, assignments = _kmeans(vectors, clusters)
+        order = np.argsort(assignments, kind="stable")
+        list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=clusters))])
+
+        tmp, old = directory + ".tmp", directory + ".old"
+        # Leftovers of an interrupted build would block the swap below or leak stale files into it
+        for leftover in (tmp, old):
+            if os.path.exists(leftover):
+                shutil.rmtree(leftover)
+        os.makedirs(tmp)
+        vectors = vectors[order]
+        if quantization == "int8":
+            scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+            np.round(vectors / scales[:, None]).astype(np.int8).tofile(os.path.join(tmp, "vectors.i8"))
+            np.save(os.path.join(tmp, "scales.npy"), scales.astype(np.float32))
+        else:
+            vectors.tofile(os.path.join(tmp, "vectors.f32"))
+        np.save(os.path.join(tmp, "centroids.npy"), centroids)
+        np.save(os.path.join(tmp, "list_offsets.npy"), list_offsets)
+        columns = {key: [metadatas[i].get(key) for i in order] for key in metadatas[0]} if metadatas else {}
+        columns["restaurant_id"] = [ids[i] for i in order]
+        with open(os.path.join(tmp, "metadata.json"), "w", encoding="utf-8") as f:
+            json.dump(columns, f)
+        with open(os.path.join(tmp, "documents.json"), "w", encoding="utf-8") as f:
+            json.dump([documents[i] for i in order], f)
+        with open(os.path.join(tmp, "index.json"), "w", encoding="utf-8") as f:
+            json.dump({"count": count, "dim": dim, "quantization": quantization,
+                       "lists": clusters, "fingerprint": fingerprint}, f)
+
+        # Swap the finished index in so readers never see a half-written one
+        if os.path.exists(directory):
+            os.replace(directory, old)
+            os.replace(tmp, directory)
+            # Open memory maps of the old index may keep it undeletable (Windows); the next build retries
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(tmp, directory)
+        print(f"Built NumPy vector index ({count} vectors, {clusters} lists) in {time.perf_counter() - start:.1f}s")
+
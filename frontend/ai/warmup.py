@@ -0,0 +1,106 @@
+"""Background warmup of heavy resources so they load off the Streamlit render path."""
+import threading
+import time
+
+NOT_STARTED = "not_started"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class Warmup:
+    """Runs a loader once per process in a background thread and tracks its state.
+
+    Streamlit re-executes the app script on every interaction, but imported modules
+    are cached, so a module-level Warmup survives reruns and is shared by sessions.
+    """
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.state = NOT_STARTED
+        self.error = None
+        self.seconds = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def start(self):
+        """Start loading if nobody has yet; returns immediately"""
+        with self._lock:
+            if self.state != NOT_STARTED:
+                return
+            self.state = LOADING
+        threading.Thread(target=self._run, name=f"warmup-{self.name}", daemon=True).start()
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            self.loader()
+            self.state = READY
+        except Exception as e:
+            print(f"Warmup '{self.name}' failed: {str(e)}")
+            self.error = str(e)
+            self.state = FAILED
+        finally:
+            self.seconds = time.perf_counter() - start
+            print(f"Warmup '{self.name}' finished ({self.state}) in {self.seconds:.1f}s")
+            self._done.set()
+
+    @property
+    def ready(self):
+        return self.state == READY
+
+    def wait(self, timeout=None):
+        """Block until loading finishes (starting it if needed); returns True when ready"""
+        self.start()
+        self._done.wait(timeout)
+        return self.ready
+
+
+def _load_research_resources():
+    # Imported here so langchain, chromadb and the search tools load in the background
+    from ai.restaurant_shards import DEFAULT_RESTAURANT_SHARD, restaurant_shards
+    restaurant_shards.get(DEFAULT_RESTAURANT_SHARD)
+
+
+research_warmup = Warmup("research", _load_research_resources)
+
+
+def restaurant_status(shard=None):
+    """(state, detail) of a restaurant shard for the UI, the default shard if None is given.
+
+    READY comes with the load time in seconds and FAILED with the error. Until the
+    research warmup finishes, the shard module may still be importing on its thread,
+    so every shard counts as loading.
+    """
+    if research_warmup.state in (NOT_STARTED, LOADING):
+        return LOADING, None
+    try:
+        from ai.restaurant_shards import DEFAULT_RESTAURANT_SHARD, restaurant_shards
+        from ai.restaurant_shards import FAILED as SHARD_FAILED, LOADED
+    except Exception as e:
+        return FAILED, str(e)
+    shard = shard or DEFAULT_RESTAURANT_SHARD
+    status = restaurant_shards.status(shard)
+    if status == LOADED:
+        loaded = restaurant_shards.peek(shard)
+        return READY, loaded.load_seconds if loaded else 0.0
+    if status == SHARD_FAILED:
+        return FAILED, restaurant_shards.error(shard)
+    return LOADING, None
+
+
+def _load_destination(destination):
+    try:
+        from ai.restaurant_shards import restaurant_shards, shard_for_destination
+        shard = shard_for_destination(destination)
+        if shard:
+            restaurant_shards.get(shard)
+    except Exception as e:
+        print(f"Warmup for destination '{destination}' failed: {str(e)}")
+
+
+def warm_destination(destination):
+    """Start loading the destination's restaurant shard in the background; returns immediately"""
+    # The import itself is slow, so it happens on the background thread too
+    threading.Thread(target=_load_destination, args=(destination,), name="warmup-destination", daemon=True).start()
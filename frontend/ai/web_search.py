@@ -0,0 +1,112 @@
+"""Web search with a TTL cache, in-flight deduplication and concurrent sub-queries."""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dotenv import load_dotenv
+from ai.llm_cache import normalize_prompt
+
+load_dotenv()
+
+WEB_SEARCH_TTL_SECONDS = int(os.getenv("WEB_SEARCH_TTL_SECONDS", str(6 * 60 * 60)))
+WEB_SEARCH_MAX_ENTRIES = 1000
+MAX_SUBQUERIES = 5
+
+# "weather, visa and transit in Bangkok" -> aspects plus a shared "in Bangkok" tail
+ASPECT_LIST_PATTERN = re.compile(
+    r"^(?P<aspects>[^,;?]+?(?:(?:,\s*|,?\s+(?:and|&)\s+)[^,;?]+?)+)\s+(?P<tail>(?:in|for|at|around|near)\s+[^,;?]+)\??$",
+    re.I,
+)
+
+
+def split_subqueries(question):
+    """Split a multi-aspect question into independent search queries"""
+    question = question.strip()
+    # The agent may pass several queries separated by semicolons
+    if ";" in question:
+        parts = [part.strip() for part in question.split(";") if part.strip()]
+        return parts[:MAX_SUBQUERIES]
+    match = ASPECT_LIST_PATTERN.match(question)
+    if match:
+        aspects = [a.strip() for a in re.split(r",\s*|\s+(?:and|&)\s+", match.group("aspects")) if a.strip()]
+        # Only split short aspect lists; long clauses are usually one question
+        if 1 < len(aspects) <= MAX_SUBQUERIES and all(len(a.split()) <= 4 for a in aspects):
+            return [f"{aspect} {match.group('tail')}" for aspect in aspects]
+    return [question]
+
+
+class CachedWebSearch:
+    """Wraps a search function with a TTL cache shared by every session in the process.
+
+    Concurrent identical queries share one request instead of each hitting the search
+    engine, and multi-aspect questions fan out as concurrent sub-queries.
+    """
+
+    def __init__(self, search, ttl=WEB_SEARCH_TTL_SECONDS, max_entries=WEB_SEARCH_MAX_ENTRIES, max_workers=MAX_SUBQUERIES):
+        self.search = search
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="web-search")
+        self.counters = {"hits": 0, "misses": 0, "deduplicated": 0}
+
+    def run(self, query):
+        """Search one query, served from cache or a matching in-flight request when possible"""
+        key = normalize_prompt(query)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and entry[0] > time.time():
+                self._cache.move_to_end(key)
+                self.counters["hits"] += 1
+                return entry[1]
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self.counters["misses"] += 1
+            else:
+                self.counters["deduplicated"] += 1
+        if not owner:
+            return future.result()
+
+        try:
+            result = self.search(query)
+        except Exception as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._cache[key] = (time.time() + self.ttl, result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            self._in_flight.pop(key, None)
+        future.set_result(result)
+        return result
+
+    def run_many(self, queries):
+        """Run several queries concurrently; returns {query: result or error message}"""
+        futures = {query: self._executor.submit(self.run, query) for query in dict.fromkeys(queries)}
+        results = {}
+        for query, future in futures.items():
+            try:
+                results[query] = future.result()
+            except Exception as e:
+                results[query] = f"Search failed: {str(e)}"
+        return results
+
+    def __call__(self, question):
+        """Tool entry point: split the question into sub-queries and merge their results"""
+        queries = split_subqueries(question)
+        if len(queries) == 1:
+            return self.run(queries[0])
+        start = time.perf_counter()
+        results = self.run_many(queries)
+        print(f"Ran {len(queries)} web searches concurrently in {time.perf_counter() - start:.1f}s")
+        return "\n\n".join(f"Results for '{query}':\n{result}" for query, result in results.items())
@@ -1,48 +1,92 @@
-import requests
+import json
+import queue
+import threading
 import time
+import requests
+from util.resources import http_session
+from util.tracing import TRACE_HEADER, get_trace_id
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+# The backend sends a heartbeat at least every 15 seconds, so a silent minute means a dead stream
+STREAM_READ_TIMEOUT = 60
+STREAM_MAX_RECONNECTS = 3
+# Polling interval when the backend has no stream slot free
+POLL_INTERVAL_SECONDS = 2
 
 class TravelAPIClient:
-    def __init__(self, base_url="http://localhost:5000"):
+    def __init__(self, base_url="http://localhost:5000", session_id=None, timeout=600, cancel_previous=True):
         self.base_url = base_url
+        self.session_id = session_id
+        self.timeout = timeout
+        self.cancel_previous = cancel_previous
+        # Pooled keep-alive connections shared by every client in the process
+        self.http = http_session()
+
+    def _headers(self):
+        """Headers sent with every request, including the current trace ID"""
+        trace_id = get_trace_id()
+        return {TRACE_HEADER: trace_id} if trace_id else {}
+
+    def _task_options(self):
+        """Session, deadline and cancellation options sent with every search"""
+        return {
+            "session_id": self.session_id,
+            "timeout": self.timeout,
+            "cancel_previous": self.cancel_previous
+        }
 
     def search_flights(self, origin, destination, start_date, end_date, preferences):
         """Send flight search request"""
-        response = requests.post(
+        response = self.http.post(
             f"{self.base_url}/search_flights",
             json={
                 "origin": origin,
                 "destination": destination,
                 "start_date": start_date,
                 "end_date": end_date,
-                "preferences": preferences
-            }
+                "preferences": preferences,
+                **self._task_options()
+            },
+            headers=self._headers()
         )
         return response
 
     def search_hotels(self, location, check_in, check_out, occupancy, currency):
         """Send hotel search request"""
-        response = requests.post(
+        response = self.http.post(
             f"{self.base_url}/search_hotels",
             json={
                 "location": location,
                 "check_in": check_in,
                 "check_out": check_out,
                 "occupancy": occupancy,
-                "currency": currency
-            }
+                "currency": currency,
+                **self._task_options()
+            },
+            headers=self._headers()
         )
         return response
 
+    def cancel_task(self, task_id):
+        """Cancel a running search task"""
+        response = self.http.delete(f"{self.base_url}/task/{task_id}", headers=self._headers())
+        return response
+
     def poll_task_status(self, task_id, task_type, progress_container):
-        """Poll the task status endpoint until completion or failure"""
-        
-        
+        """Poll the task status endpoint until completion, failure or the deadline"""
+        deadline = time.monotonic() + self.timeout if self.timeout else None
+
         while True:
-            response = requests.get(f"{self.base_url}/task_status/{task_id}")
+            if deadline is not None and time.monotonic() >= deadline:
+                self.cancel_task(task_id)
+                progress_container.error(f"{task_type.capitalize()} search timed out")
+                return None
+
+            response = self.http.get(f"{self.base_url}/task_status/{task_id}", headers=self._headers())
             if response.status_code == 200:
                 result = response.json()
                 status = result.get("status")
-                
+
                 if status == "completed":
                     progress_container.success(f"{task_type.capitalize()} search completed!")
                     return result.get("data")
@@ -50,8 +94,114 @@ class TravelAPIClient:
                     error_msg = result.get('error', 'Unknown error')
                     progress_container.error(f"{task_type.capitalize()} search failed: {error_msg}")
                     return None
-                
+                elif status == "cancelled":
+                    reason = result.get('error', 'Task cancelled')
+                    progress_container.warning(f"{task_type.capitalize()} search stopped: {reason}")
+                    return None
+
                 time.sleep(2)
             else:
                 progress_container.error(f"Failed to get {task_type} search status")
-                return None 
\ No newline at end of file
+                return None
+
+    def stream_task(self, task_id, headers=None):
+        """Yield a task's events from the NDJSON stream until it finishes.
+
+        A dropped stream reconnects after the last event received, and the client
+        deadline cancels the task like polling does. When the backend has no stream
+        slot free it falls back to polling. The last event is always a status event
+        with the result or the error.
+        """
+        deadline = time.monotonic() + self.timeout if self.timeout else None
+        headers = headers if headers is not None else self._headers()
+        cursor, reconnects = 0, 0
+
+        while True:
+            try:
+                with self.http.get(
+                    f"{self.base_url}/task_stream/{task_id}",
+                    params={"after": cursor},
+                    headers=headers,
+                    stream=True,
+                    timeout=(10, STREAM_READ_TIMEOUT)
+                ) as response:
+                    if response.status_code == 503:
+                        yield from self._poll_events(task_id, headers, deadline)
+                        return
+                    if response.status_code != 200:
+                        yield {"event": "status", "status": "failed",
+                               "error": f"Task stream unavailable (HTTP {response.status_code})"}
+                        return
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        event = json.loads(line)
+                        cursor = event.get("seq") or cursor
+                        if deadline is not None and time.monotonic() >= deadline:
+                            self.cancel_task(task_id)
+                            yield {"event": "status", "status": "cancelled", "error": "Search timed out"}
+                            return
+                        if event.get("event") == "heartbeat":
+                            continue
+                        yield event
+                        if event.get("event") == "status" and event.get("status") in TERMINAL_STATUSES:
+                            return
+                error = "stream ended early"
+            except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                    requests.exceptions.Timeout) as e:
+                error = str(e)
+            reconnects += 1
+            if reconnects > STREAM_MAX_RECONNECTS:
+                yield {"event": "status", "status": "failed", "error": f"Lost connection to the search: {error}"}
+                return
+            print(f"Task stream for {task_id} dropped ({error}), reconnecting...")
+            time.sleep(1)
+
+    def _poll_events(self, task_id, headers, deadline):
+        """Stream-shaped events from polling the task status: new partial results, then the final status"""
+        seen = {}
+        while True:
+            if deadline is not None and time.monotonic() >= deadline:
+                self.cancel_task(task_id)
+                yield {"event": "status", "status": "cancelled", "error": "Search timed out"}
+                return
+            response = self.http.get(f"{self.base_url}/task_status/{task_id}", headers=headers)
+            if response.status_code != 200:
+                yield {"event": "status", "status": "failed",
+                       "error": f"Task status unavailable (HTTP {response.status_code})"}
+                return
+            result = response.json()
+            for kind, data in (result.get("partial") or {}).items():
+                if seen.get(kind) != data:
+                    seen[kind] = data
+                    yield {"event": "partial", "kind": kind, "data": data}
+            if result.get("status") in TERMINAL_STATUSES:
+                yield {"event": "status", "status": result["status"],
+                       "data": result.get("data"), "error": result.get("error")}
+                return
+            time.sleep(POLL_INTERVAL_SECONDS)
+
+    def stream_tasks(self, tasks):
+        """Merge the event streams of several tasks ({name: task_id}) as (name, event) pairs"""
+        events = queue.Queue()
+        # Trace headers come from this thread's context, so build them before handing off
+        headers = self._headers()
+
+        def pump(name, task_id):
+            try:
+                for event in self.stream_task(task_id, headers):
+                    events.put((name, event))
+            except Exception as e:
+                events.put((name, {"event": "status", "status": "failed", "error": str(e)}))
+            finally:
+                events.put((name, None))
+
+        for name, task_id in tasks.items():
+            threading.Thread(target=pump, args=(name, task_id), name=f"task-stream-{name}", daemon=True).start()
+        remaining = len(tasks)
+        while remaining:
+            name, event = events.get()
+            if event is None:
+                remaining -= 1
+                continue
+            yield name, event
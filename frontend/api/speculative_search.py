@@ -0,0 +1,95 @@
+import time
+
+# Parsed fields each backend search needs before it can start
+FLIGHT_FIELDS = ("origin_airport_code", "destination_airport_code", "start_date", "end_date")
+HOTEL_FIELDS = ("destination_city_name", "start_date", "end_date", "num_guests")
+
+
+def guest_count(parsed, default=1):
+    """Number of travelers in a parsed request, or `default` when it is missing or invalid"""
+    try:
+        count = int(parsed.get("num_guests") or 0)
+    except (TypeError, ValueError):
+        return default
+    return count if count > 0 else default
+
+
+def _normalize(value):
+    # The backend strips leading zeros from days ("May 02" -> "May 2"); compare the same way
+    return str(value).replace(" 0", " ").strip().lower() if value else None
+
+
+class SpeculativeSearch:
+    """Starts each backend search as soon as the fields it needs are known.
+
+    `update` is called with every (partial or final) parse of the request. A search
+    whose inputs are unchanged keeps running; one whose inputs changed or disappeared
+    is cancelled and, if possible, restarted with the new inputs. All searches share
+    one trace, so the backend does not treat them as superseding each other.
+    """
+
+    def __init__(self, api_client, preferences, on_destination=None, occupancy=1, currency="USD"):
+        self.api_client = api_client
+        self.preferences = preferences
+        self.on_destination = on_destination
+        self.occupancy = occupancy
+        self.currency = currency
+        self.started = time.perf_counter()
+        self.tasks = {}
+        self.errors = {}
+        self.destination = None
+
+    def _submit(self, kind, key):
+        if kind == "flight":
+            return self.api_client.search_flights(*key, self.preferences)
+        return self.api_client.search_hotels(*key, self.currency)
+
+    def _ensure(self, kind, fields, parsed, source):
+        values = tuple(parsed.get(field) for field in fields)
+        key = tuple(_normalize(value) for value in values)
+        current = self.tasks.get(kind)
+        if current and current["key"] == key:
+            return
+        if current:
+            print(f"Cancelling {kind} search: request changed")
+            self.cancel_task(kind)
+        if not all(key):
+            return
+        response = self._submit(kind, values)
+        if response.status_code != 200:
+            self.errors[kind] = response.status_code
+            return
+        self.errors.pop(kind, None)
+        self.tasks[kind] = {"key": key, "task_id": response.json().get("task_id")}
+        print(f"Started {kind} search {time.perf_counter() - self.started:.2f}s after submit ({source} parse)")
+
+    def update(self, parsed, source="final"):
+        """Start, keep or restart the searches for this parse of the request"""
+        self._ensure("flight", FLIGHT_FIELDS, parsed, source)
+        # A changed guest count changes hotel prices, so it restarts the hotel search
+        self._ensure("hotel", HOTEL_FIELDS, dict(parsed, num_guests=guest_count(parsed, self.occupancy)), source)
+        destination = parsed.get("destination_airport_code")
+        if destination and destination != self.destination:
+            self.destination = destination
+            if self.on_destination:
+                self.on_destination(destination)
+
+    def task_id(self, kind):
+        task = self.tasks.get(kind)
+        return task["task_id"] if task else None
+
+    def task_ids(self):
+        return [task["task_id"] for task in self.tasks.values()]
+
+    def cancel_task(self, kind):
+        task = self.tasks.pop(kind, None)
+        if task:
+            try:
+                self.api_client.cancel_task(task["task_id"])
+            except Exception as e:
+                print(f"Error cancelling task {task['task_id']}: {str(e)}")
+
+    def cancel(self):
+        """Cancel every running search"""
+        for kind in list(self.tasks):
+            self.cancel_task(kind)
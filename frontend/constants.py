@@ -6,6 +6,12 @@ TRAVEL_DESCRIPTION_PLACEHOLDER = """Example: I want to fly from LAX to NYC from
 2 travelers, prefer morning flights, need hotel with wifi and gym. 
 Budget around $1000 for flight and $200/night for hotel in USD."""
 
+# Search Tasks
+SEARCH_TIMEOUT_SECONDS = 600  # Per-request deadline passed down to the backend workers
+CANCEL_PREVIOUS_SEARCH = True  # Cancel the session's previous search when a new one starts
+SPECULATIVE_SEARCH_CONFIDENCE = 0.5  # Start searches from the rule-based parse while the full parse runs
+PARTIAL_RESULTS_SHOWN = 5  # Hotels / flight options listed per group while searches are still running
+
 # Loading States
 LOADING_STATES = {
     "flights": {
@@ -55,6 +61,11 @@ RESEARCH_ASSISTANT_INTRO = """Research assistant for your trip to {destination}!
 Learn about local restaurants, attractions, and travel tips. This assistant can search 
 the internet for up-to-date information about your destination."""
 
+RESEARCH_INDEX_LOADING = "⏳ Restaurant data is still loading; restaurant answers may be limited until it's ready."
+RESEARCH_INDEX_READY = "✅ Restaurant data ready (loaded in {seconds:.1f}s)"
+RESEARCH_INDEX_FAILED = "⚠️ Restaurant data could not be loaded: {error}"
+RESEARCH_INDEX_UNAVAILABLE = "ℹ️ No restaurant data for {destination}; restaurant questions are answered from web search."
+
 # Error Messages
 MISSING_AIRPORTS_ERROR = "Please specify both departure and destination airports in your description"
 MISSING_DATES_ERROR = "Please specify both departure and return dates in your description"
@@ -64,4 +75,5 @@ MISSING_DESCRIPTION_ERROR = "Please describe your travel plans"
 SEARCH_COMPLETED = "🎉 Perfect! We've found some great options for your trip!"
 SEARCH_FAILED = "😕 We couldn't start the search. Please try again."
 SEARCH_INCOMPLETE = "😕 We couldn't complete the search. Please try again."
-NO_SUMMARY_YET = "No travel summary available yet." 
\ No newline at end of file
+NO_SUMMARY_YET = "No travel summary available yet."
+SEARCH_CANCELLED = "🛑 Search cancelled." 
\ No newline at end of file
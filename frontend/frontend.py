@@ -1,20 +1,30 @@
+import time
+_script_start = time.perf_counter()
+
 import streamlit as st
+import uuid
 from datetime import datetime
-from ai.travel_assistant import TravelAssistant
 from ai.travel_summary import TravelSummary
 from api.api_client import TravelAPIClient
-from ai.research_assistant import ResearchAssistant
+from api.speculative_search import SpeculativeSearch, guest_count
+from ai.context import rank_hotels
+from ai.results import normalize_hotels
+from ai.rule_parser import parse_travel_request
 from ai.user_preferences import get_travel_details
+from ai.warmup import research_warmup, restaurant_status, warm_destination, LOADING, READY, FAILED
+from util.resources import shared
+from util.tracing import new_trace_id, set_trace_id, span
 from constants import *
 
+# Only the first run in a process pays the real import cost; reruns find the modules cached
+print(f"Frontend imports took {time.perf_counter() - _script_start:.2f}s")
+
 def format_date(date_str):
     """Format date string for display and API calls"""
     if isinstance(date_str, datetime):
         return date_str.strftime("%B %d, %Y")
     return date_str
 
-ResearchAssistant._initialize_vector_store()
-
 def initialize_session_state():
     """Initialize all session state variables"""
     if 'search_requirements' not in st.session_state:
@@ -33,6 +43,14 @@ def initialize_session_state():
         st.session_state.parsed_data = None
     if 'progress_bar' not in st.session_state:
         st.session_state.progress_bar = None
+    if 'trace_id' not in st.session_state:
+        st.session_state.trace_id = new_trace_id()
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = str(uuid.uuid4())
+    if 'active_task_ids' not in st.session_state:
+        st.session_state.active_task_ids = []
+    if 'speculative_search' not in st.session_state:
+        st.session_state.speculative_search = None
 
 def display_parsed_travel_details(parsed_data):
     """Display and validate parsed travel details"""
@@ -48,72 +66,73 @@ def display_parsed_travel_details(parsed_data):
         for key, value in details.items():
             st.write(f"**{key}:** {value}")
         
+        if parsed_data.get('confidence') is not None:
+            st.caption(f"Parsed without the LLM (confidence {parsed_data['confidence']:.0%})")
+        
         # Validate required fields
         if not (parsed_data['origin_airport_code'] and parsed_data['destination_airport_code']):
+            cancel_active_searches()
             st.error(MISSING_AIRPORTS_ERROR)
             st.stop()
             
         if not (parsed_data['start_date'] and parsed_data['end_date']):
+            cancel_active_searches()
             st.error(MISSING_DATES_ERROR)
             st.stop()
 
 
-def search_travel_options(parsed_data, travel_description, progress_container):
-    """Search for flights and hotels based on parsed data"""
+def search_travel_options(parsed_data, travel_description, progress_container, speculative):
+    """Collect the flight and hotel results of searches started while the request was parsed"""
     with progress_container.status("✨ Finding the best options for you...",state="running", expanded=True):
         my_bar = st.progress(0)
         try:
+            # Both searches are already running (or start now) and run side by side in the backend
             st.write(" - ✈️ Finding available flights for your dates..")
-            flight_response = api_client.search_flights(
-                parsed_data['origin_airport_code'],
-                parsed_data['destination_airport_code'],
-                parsed_data['start_date'],
-                parsed_data['end_date'],
-                travel_description
-            )
-            
-            my_bar.progress(0.2)
-            if flight_response.status_code != 200:
-                st.error(SEARCH_FAILED)
-                return False
-                
-            # Get flight results first
-            st.write(" - ✈️ Analyzing flight options and prices...")
-            
-            flight_task_id = flight_response.json().get("task_id")
-            flight_results = api_client.poll_task_status(flight_task_id, "flight", st)
-            if not flight_results:
-                st.error(SEARCH_INCOMPLETE)
-                return False
-            
-            my_bar.progress(0.4)
             st.write(" - 🏨 Searching for hotels in your destination...")
-            
-            hotel_response = api_client.search_hotels(
-                parsed_data['destination_city_name'],
-                parsed_data['start_date'],
-                parsed_data['end_date'],
-                1,
-                "USD"
-            )
-            my_bar.progress(0.6)
-            if hotel_response.status_code != 200:
+            speculative.update(parsed_data)
+            flight_task_id = speculative.task_id("flight")
+            hotel_task_id = speculative.task_id("hotel")
+            st.session_state.active_task_ids = speculative.task_ids()
+            if not flight_task_id or not hotel_task_id:
+                speculative.cancel()
                 st.error(SEARCH_FAILED)
                 return False
-                
-            # Get hotel results
+            
+            my_bar.progress(0.2)
+            st.write(" - ✈️ Analyzing flight options and prices...")
             st.write(" - 🏨 Finding the best room options for you...")
             
-            hotel_task_id = hotel_response.json().get("task_id")
-            hotel_results = api_client.poll_task_status(hotel_task_id, "hotel", st)
-            if not hotel_results:
+            # Partial results (hotel pages, flight candidates) render as the backend publishes them
+            partial_view = st.empty()
+            partials, results = {}, {}
+            for kind, event in api_client.stream_tasks({"flight": flight_task_id, "hotel": hotel_task_id}):
+                if event["event"] == "partial":
+                    partials[event["kind"]] = event["data"]
+                    render_partial_results(partial_view, partials)
+                    continue
+                status = event.get("status")
+                if status == "completed" and event.get("data"):
+                    results[kind] = event["data"]
+                    st.success(f"{kind.capitalize()} search completed!")
+                    my_bar.progress(0.2 + 0.3 * len(results))
+                elif status in ("completed", "failed", "cancelled"):
+                    speculative.cancel()
+                    st.error(f"{kind.capitalize()} search stopped: {event.get('error') or 'no results'}")
+                    st.error(SEARCH_INCOMPLETE)
+                    return False
+            partial_view.empty()
+            flight_results, hotel_results = results.get("flight"), results.get("hotel")
+            if not flight_results or not hotel_results:
                 st.error(SEARCH_INCOMPLETE)
                 return False
             my_bar.progress(0.8)
+            st.session_state.active_task_ids = []
+            st.session_state.speculative_search = None
             
             # Generate summary
             st.write(" - ✨ Putting together your perfect trip...")
-            summary = travel_summary.get_summary(
+            # Stream the summary so the first tokens show up while it is still being written
+            summary = st.write_stream(travel_summary.stream_summary(
                 flight_results,
                 hotel_results,
                 travel_description,
@@ -121,8 +140,8 @@ def search_travel_options(parsed_data, travel_description, progress_container):
                 origin=parsed_data['origin_airport_code'],
                 check_in=parsed_data['start_date'],
                 check_out=parsed_data['end_date'],
-                occupancy=1
-            )
+                occupancy=guest_count(parsed_data)
+            ))
             my_bar.progress(0.8)
             
             st.success(SEARCH_COMPLETED)
@@ -134,13 +153,15 @@ def search_travel_options(parsed_data, travel_description, progress_container):
                 'destination': parsed_data['destination_airport_code'],
                 'start_date': format_date(parsed_data['start_date']),
                 'end_date': format_date(parsed_data['end_date']),
-                "occupancy": 1,
+                "occupancy": guest_count(parsed_data),
                 'flights': flight_results,
                 'hotels': hotel_results,
                 'preferences': travel_description
             }
             
-            # Initialize assistants
+            # Initialize assistants; imported here so langchain only loads once a trip exists
+            from ai.travel_assistant import TravelAssistant
+            from ai.research_assistant import ResearchAssistant
             st.session_state.travel_assistant = TravelAssistant(travel_context)
             st.session_state.research_assistant = ResearchAssistant(travel_context)
             st.session_state.travel_context = travel_context
@@ -153,6 +174,26 @@ def search_travel_options(parsed_data, travel_description, progress_container):
             st.error(f"An error occurred: {str(e)}")
             return False
 
+def render_partial_results(placeholder, partials):
+    """Show the hotels and flight options found so far while the searches run"""
+    with placeholder.container():
+        hotels = rank_hotels(normalize_hotels(partials.get("hotels_page")))
+        if hotels:
+            st.markdown(f"**🏨 {len(hotels)} hotels found so far**")
+            for hotel in hotels[:PARTIAL_RESULTS_SHOWN]:
+                price = (f"{hotel['price_per_night']:,.0f} {hotel['currency']}/night"
+                         if hotel['price_per_night'] is not None else "price n/a")
+                st.write(f"- {hotel['name']}: {price}")
+        for kind, label in (("outbound_candidates", "✈️ Outbound options so far"),
+                            ("return_candidates", "✈️ Return options so far")):
+            flights = partials.get(kind) or []
+            if flights:
+                st.markdown(f"**{label}**")
+            for flight in flights[:PARTIAL_RESULTS_SHOWN]:
+                st.write(f"- {flight.get('airline') or 'airline n/a'}: {flight.get('start_time') or '?'} → "
+                         f"{flight.get('end_time') or '?'}, {flight.get('duration') or 'duration n/a'}, "
+                         f"{flight.get('price') or 'price n/a'}")
+
 def render_chat_interface(messages, assistant, input_placeholder, message_type="chat"):
     """Render a chat interface with message history and input"""
     for message in messages:
@@ -180,10 +221,33 @@ def render_chat_interface(messages, assistant, input_placeholder, message_type="
         
         # Get and display AI response
         with st.chat_message("assistant"):
-            response = assistant.get_response(prompt)
-            st.markdown(response)
+            if hasattr(assistant, "stream_response"):
+                # Render tokens (and research tool steps) as they arrive
+                response = st.write_stream(assistant.stream_response(prompt))
+                if not isinstance(response, str):
+                    response = "".join(str(part) for part in response)
+            else:
+                response = assistant.get_response(prompt)
+                st.markdown(response)
             messages.append({"role": "assistant", "content": response})
 
+def cancel_active_searches():
+    """Cancel the backend tasks of this session's running search"""
+    # Also runs as a widget callback, before this run's globals are set up
+    client = st.session_state.get("api_client")
+    if client is None:
+        return
+    speculative = st.session_state.get("speculative_search")
+    if speculative is not None:
+        speculative.cancel()
+        st.session_state.speculative_search = None
+    for task_id in st.session_state.get("active_task_ids", []):
+        try:
+            client.cancel_task(task_id)
+        except Exception as e:
+            print(f"Error cancelling task {task_id}: {str(e)}")
+    st.session_state.active_task_ids = []
+
 def render_search_tab():
     """Render the search tab content"""
     st.header("Tell Us About Your Trip")
@@ -192,24 +256,48 @@ def render_search_tab():
         "Describe your travel plans in natural language",
         height=200,
         help=TRAVEL_DESCRIPTION_HELP,
-        placeholder=TRAVEL_DESCRIPTION_PLACEHOLDER
+        placeholder=TRAVEL_DESCRIPTION_PLACEHOLDER,
+        # Searches started for the previous wording are wasted once the request is edited
+        on_change=cancel_active_searches
     )
 
-    if st.button("Plan My Trip"):
+    plan_col, cancel_col = st.columns([1, 1])
+    # Clicking while a search runs interrupts that run; the rerun then cancels its backend tasks
+    if cancel_col.button("Cancel Search") and st.session_state.active_task_ids:
+        cancel_active_searches()
+        st.info(SEARCH_CANCELLED)
+
+    if plan_col.button("Plan My Trip"):
         if not travel_description:
             st.warning(MISSING_DESCRIPTION_ERROR)
             st.stop()
         
-        # Parse and process travel details
-        parsed_data = get_travel_details(travel_description)
-        st.session_state.parsed_data = parsed_data
-        
-        # Display and validate parsed data
-        display_parsed_travel_details(parsed_data)
+        # Start a new trace for this search; the backend cancels the previous one's tasks
+        st.session_state.trace_id = set_trace_id(new_trace_id())
+        st.session_state.active_task_ids = []
+        speculative = SpeculativeSearch(api_client, travel_description, on_destination=warm_destination)
+        st.session_state.speculative_search = speculative
         
-        # Search for travel options
-        progress_container = st.container()
-        search_travel_options(parsed_data, travel_description, progress_container)
+        with span("plan_trip"):
+            # The rule-based parse is instant: start whatever searches its fields already allow
+            # while the full parse (possibly an LLM call) runs; mismatches are cancelled below
+            draft = parse_travel_request(travel_description)
+            if draft["confidence"] >= SPECULATIVE_SEARCH_CONFIDENCE:
+                speculative.update(draft, source="draft")
+                st.session_state.active_task_ids = speculative.task_ids()
+            
+            # Parse and process travel details
+            parsed_data = get_travel_details(travel_description)
+            st.session_state.parsed_data = parsed_data
+            speculative.update(parsed_data)
+            st.session_state.active_task_ids = speculative.task_ids()
+            
+            # Display and validate parsed data
+            display_parsed_travel_details(parsed_data)
+            
+            # Search for travel options
+            progress_container = st.container()
+            search_travel_options(parsed_data, travel_description, progress_container, speculative)
 
 def render_results_tab():
     """Render the results tab content"""
@@ -234,8 +322,24 @@ def render_results_tab():
                 "Ask me anything about your trip..."
             )
 
+def render_research_status():
+    """Show whether the trip destination's restaurant data has finished loading in the background"""
+    assistant = st.session_state.research_assistant
+    if assistant is not None and assistant.shard_name is None:
+        st.caption(RESEARCH_INDEX_UNAVAILABLE.format(destination=assistant.destination_name))
+        return
+    # Before a trip exists, the default shard is the one loading
+    state, detail = restaurant_status(assistant.shard_name if assistant is not None else None)
+    if state == READY:
+        st.caption(RESEARCH_INDEX_READY.format(seconds=detail))
+    elif state == FAILED:
+        st.warning(RESEARCH_INDEX_FAILED.format(error=detail))
+    elif state == LOADING:
+        st.info(RESEARCH_INDEX_LOADING)
+
 def render_research_tab():
     """Render the research tab content"""
+    render_research_status()
     if not st.session_state.travel_assistant or not st.session_state.research_assistant:
         st.info("👋 Please complete your trip search first to access the research assistant.")
         st.markdown(RESEARCH_LOCKED_MESSAGE)
@@ -256,13 +360,24 @@ def render_research_tab():
 
 def main():
     """Main application entry point"""
-    # Initialize services
+    # Build or open the restaurant index in the background; a no-op after the first run
+    research_warmup.start()
+
+    # Initialize services; the summary service is stateless and shared by all sessions
     global api_client, travel_summary
-    api_client = TravelAPIClient()
-    travel_summary = TravelSummary()
+    travel_summary = shared("travel_summary", TravelSummary)
     
     # Initialize session state
     initialize_session_state()
+    if 'api_client' not in st.session_state:
+        # One client per session, all sharing the process-wide connection pool
+        st.session_state.api_client = TravelAPIClient(
+            session_id=st.session_state.session_id,
+            timeout=SEARCH_TIMEOUT_SECONDS,
+            cancel_previous=CANCEL_PREVIOUS_SEARCH
+        )
+    api_client = st.session_state.api_client
+    set_trace_id(st.session_state.trace_id)
     
     # Main UI
     st.title("Travel Search")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The frontend runs from its own directory and imports `ai`, `api` and `util` as top-level packages
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
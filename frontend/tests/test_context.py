@@ -0,0 +1,32 @@
+import json
+from ai.context import lookup_trip_details, trip_details_query
+
+CONTEXT = {
+    "flights": [],
+    "hotels": [
+        {"name": "Riverside Inn", "rate_per_night": "$50", "rating": 4.1},
+        {"name": "Old Town Hostel", "rate_per_night": "$12", "rating": 4.6},
+    ],
+}
+
+
+def test_hotel_id_is_extracted():
+    assert trip_details_query(CONTEXT, "Tell me about h2") == "H2"
+
+
+def test_hotel_name_maps_to_its_id():
+    assert trip_details_query(CONTEXT, "Does the Riverside Inn have a pool?") == "H1"
+
+
+def test_flight_questions_look_up_flights():
+    assert trip_details_query(CONTEXT, "When does my flight leave?") == "flights"
+
+
+def test_unnamed_hotel_is_left_to_the_agent():
+    assert trip_details_query(CONTEXT, "What amenities does my hotel have?") is None
+    assert trip_details_query(CONTEXT, "When is check-in at my hotel?") is None
+
+
+def test_extracted_query_finds_the_hotel():
+    query = trip_details_query(CONTEXT, "Tell me about H2")
+    assert json.loads(lookup_trip_details(CONTEXT, query))["name"] == "Old Town Hostel"
@@ -0,0 +1,49 @@
+import numpy as np
+from ai.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0, 0.5] for t in texts]
+
+    def embed_query(self, text):
+        self.calls.append([text])
+        return [float(len(text)), 0.0, 1.0]
+
+
+def test_only_new_texts_are_embedded(tmp_path):
+    inner = CountingEmbeddings()
+    embeddings = CachedEmbeddings(inner, "test-model", cache=EmbeddingCache(str(tmp_path)))
+    first = embeddings.embed_documents(["a", "bb"])
+    second = embeddings.embed_documents(["bb", "ccc"])
+    assert inner.calls == [["a", "bb"], ["ccc"]]
+    assert second[0] == first[1]
+
+
+def test_queries_and_documents_are_cached_separately(tmp_path):
+    inner = CountingEmbeddings()
+    embeddings = CachedEmbeddings(inner, "test-model", cache=EmbeddingCache(str(tmp_path)))
+    assert embeddings.embed_documents(["x"])[0] != embeddings.embed_query("x")
+    embeddings.embed_query("x")
+    assert inner.calls == [["x"], ["x"]]
+
+
+def test_vectors_persist_across_instances(tmp_path):
+    EmbeddingCache(str(tmp_path)).put_many("m", [("k1", [1.0, 2.0]), ("k2", [3.0, 4.0])])
+    cache = EmbeddingCache(str(tmp_path), memory_items=0)
+    found = cache.get_many(["k1", "k2", "missing"])
+    assert set(found) == {"k1", "k2"}
+    assert np.allclose(found["k2"], [3.0, 4.0])
+    assert cache.counters["disk_hits"] == 2 and cache.counters["misses"] == 1
+
+
+def test_models_do_not_share_entries(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    inner = CountingEmbeddings()
+    CachedEmbeddings(inner, "model-a", cache=cache).embed_documents(["same"])
+    CachedEmbeddings(inner, "model-b", cache=cache).embed_documents(["same"])
+    assert len(inner.calls) == 2
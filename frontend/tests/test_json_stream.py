@@ -0,0 +1,102 @@
+import gzip
+import json
+import threading
+import time
+import pytest
+from ai.json_stream import JsonArrayWriter, gunzip_chunks, iter_json_file, iter_json_records, read_ahead
+
+RECORDS = [{"name": "Jay Fai", "rating": 4.6}, {"name": "ร้านอาหาร", "tags": ["a", "b"]}, {"nested": {"x": [1, 2]}}]
+
+
+def split(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64, 10000])
+def test_array_across_chunk_boundaries(size):
+    data = json.dumps(RECORDS, ensure_ascii=False).encode("utf-8")
+    assert list(iter_json_records(split(data, size))) == RECORDS
+
+
+@pytest.mark.parametrize("size", [1, 5, 10000])
+def test_ndjson(size):
+    data = "\n".join(json.dumps(r) for r in RECORDS).encode("utf-8")
+    assert list(iter_json_records(split(data, size))) == RECORDS
+
+
+def test_empty_inputs():
+    assert list(iter_json_records([b"[]"])) == []
+    assert list(iter_json_records([b"  \n"])) == []
+
+
+def test_gzip_chunks():
+    data = gzip.compress(json.dumps(RECORDS).encode("utf-8"))
+    assert list(iter_json_records(gunzip_chunks(split(data, 11)))) == RECORDS
+
+
+def test_truncated_gzip_is_an_error():
+    data = gzip.compress(json.dumps(RECORDS).encode("utf-8"))
+    with pytest.raises(ValueError):
+        list(gunzip_chunks([data[:-10]]))
+
+
+def test_unterminated_array_is_an_error():
+    with pytest.raises(ValueError):
+        list(iter_json_records([b'[{"a": 1}, {"b": 2}']))
+
+
+def test_invalid_record_is_an_error():
+    with pytest.raises(ValueError):
+        list(iter_json_records([b'[{"a": 1}, {"b": }]']))
+
+
+def test_writer_round_trip(tmp_path):
+    path = str(tmp_path / "out" / "records.json")
+    with JsonArrayWriter(path) as writer:
+        for record in RECORDS:
+            writer.write(record)
+    assert writer.count == len(RECORDS)
+    assert list(iter_json_file(path, chunk_size=5)) == RECORDS
+
+
+def test_writer_keeps_old_file_on_error(tmp_path):
+    path = str(tmp_path / "records.json")
+    with open(path, "w") as f:
+        f.write("[]")
+    with pytest.raises(RuntimeError):
+        with JsonArrayWriter(path) as writer:
+            writer.write(RECORDS[0])
+            raise RuntimeError("stream failed")
+    assert list(iter_json_file(path)) == []
+    assert not (tmp_path / "records.json.tmp").exists()
+
+
+def test_read_ahead_preserves_order_and_errors():
+    assert list(read_ahead(range(100), max_items=4)) == list(range(100))
+
+    def failing():
+        yield 1
+        raise IOError("connection lost")
+
+    with pytest.raises(IOError):
+        list(read_ahead(failing()))
+
+
+def test_read_ahead_producer_exits_when_consumer_stops():
+    exhausted = threading.Event()
+
+    def produce():
+        yield from (0, 1)
+        exhausted.set()
+
+    before = set(threading.enumerate())
+    # The queue holds one item, so the producer ends up blocked on its final put
+    reader = read_ahead(produce(), max_items=1)
+    assert next(reader) == 0
+    assert exhausted.wait(timeout=5)
+    time.sleep(0.1)
+    producers = [t for t in threading.enumerate() if t not in before and t.name == "read-ahead"]
+    reader.close()
+    for thread in producers:
+        thread.join(timeout=5)
+        assert not thread.is_alive()
@@ -0,0 +1,27 @@
+from ai.llm_cache import LLMCache
+
+
+class WordEmbeddings:
+    """Bag-of-words vectors over a tiny vocabulary"""
+    VOCAB = ["flights", "hotels", "bangkok", "tokyo", "cheap"]
+
+    def embed_query(self, text):
+        words = text.split()
+        return [float(words.count(word)) for word in self.VOCAB]
+
+
+def test_near_duplicate_prompts_share_an_entry(tmp_path):
+    cache = LLMCache(path=str(tmp_path / "cache.sqlite"), embeddings=WordEmbeddings(), similarity_threshold=0.99)
+    cache.set("travel_summary", "cheap flights and hotels in Bangkok", "summary", semantic=True)
+    assert cache.get("travel_summary", "Bangkok: cheap flights, hotels", semantic=True) is None
+    assert cache.get("travel_summary", "cheap hotels and flights in bangkok", semantic=True) == "summary"
+    assert cache.get("travel_summary", "cheap flights and hotels in Tokyo", semantic=True) is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_semantic_matching_is_opt_in(tmp_path):
+    cache = LLMCache(path=str(tmp_path / "cache.sqlite"), embeddings=WordEmbeddings())
+    cache.set("travel_summary", "cheap flights and hotels in Bangkok", "summary", semantic=True)
+    assert cache.get("travel_summary", "cheap hotels and flights in bangkok") is None
+    assert cache.cached("travel_summary", "cheap hotels and flights in bangkok",
+                        lambda: "fresh", semantic=True) == "summary"
@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+from ai.opening_hours import OpeningHoursIndex, parse_day_hours, parse_open_hours, parse_time_filters
+from ai.restaurant_render import render_restaurant_results
+from ai.restaurant_shards import shard_now
+
+
+def test_split_shifts_and_shared_meridiem():
+    assert parse_day_hours("11 AM–2:30 PM, 5–10 PM") == [(660, 870), (1020, 1320)]
+
+
+def test_past_midnight_interval():
+    assert parse_day_hours("6 PM–2 AM") == [(1080, 1560)]
+
+
+def test_closed_and_all_day():
+    assert parse_day_hours("Closed") == []
+    assert parse_day_hours("Open 24 hours") == [(0, 1440)]
+
+
+def test_day_ranges_expand():
+    week = parse_open_hours({"Mon-Fri": "9 AM–5 PM", "Saturday": "Closed"})
+    assert week[0] == week[4] == [(540, 1020)]
+    assert week[5] == [] and week[6] == []
+
+
+def test_unknown_hours():
+    assert parse_open_hours(None) is None
+    assert parse_open_hours({"someday": "9 AM–5 PM"}) is None
+
+
+def test_index_queries_cross_midnight_and_week_end():
+    index = OpeningHoursIndex([
+        {"open_hours": {"Sunday": "8 PM–2 AM"}},
+        {"open_hours": {"Monday": "9 AM–5 PM"}},
+        {},
+    ])
+    # Early Monday morning is still Sunday night's shift
+    assert index.open_at(0, 60).tolist() == [True, False, False]
+    assert index.open_at(0, 10 * 60).tolist() == [False, True, False]
+    assert index.open_after(6, 23 * 60).tolist() == [True, False, False]
+
+
+def test_open_now_uses_the_destination_clock_near_midnight():
+    # 23:30 on Sunday in UTC is already 06:30 on Monday in Bangkok
+    server_now = datetime(2026, 10, 18, 23, 30, tzinfo=timezone.utc)
+    now = shard_now("thailand", server_now)
+    assert (now.weekday(), now.hour) == (0, 6)
+    assert parse_time_filters("open now", now) == {"open_at": (0, 6 * 60 + 30)}
+    assert parse_time_filters("open late tomorrow", now) == {"open_after": (1, 22 * 60)}
+
+    restaurant = {"name": "Jok Prince", "open_hours": {"Sunday": "6 PM–11 PM", "Monday": "6 AM–11 AM"}}
+    assert render_restaurant_results([(restaurant, None)], "when does it open?", now=now).endswith("Mon 6 AM–11 AM")
@@ -0,0 +1,93 @@
+from datetime import datetime
+import numpy as np
+from ai.opening_hours import parse_time_filters
+from ai.restaurant_search import RestaurantSearchIndex, parse_query_filters
+
+RESTAURANTS = [
+    {"name": "Green Leaf", "category": "Vegetarian restaurant", "rating": 4.7, "reviews_count": 320,
+     "price_range": "$$", "address": "Sukhumvit, Bangkok", "lat": 13.74, "lon": 100.56},
+    {"name": "Burger Hub", "category": "Fast food restaurant", "rating": 3.9, "reviews_count": 80,
+     "price_range": "$", "address": "Silom, Bangkok", "lat": 13.73, "lon": 100.53},
+    {"name": "Jay Fai", "category": "Thai restaurant", "rating": 4.6, "reviews_count": 5000,
+     "price_range": "$$$", "address": "Maha Chai Rd, Bangkok", "lat": 13.75, "lon": 100.50,
+     "services_provided": "street food, dine-in"},
+    {"name": "Soi 38 Noodles", "category": "Noodle shop", "rating": 4.8, "reviews_count": 150,
+     "price_range": "฿50-100", "address": "Sukhumvit Soi 38, Bangkok", "lat": 13.72, "lon": 100.58,
+     "services_provided": "street food"},
+    {"name": "Ocean Grill", "category": "Seafood restaurant", "rating": 4.2, "reviews_count": 40,
+     "address": "Riverside, Bangkok", "lat": 13.72, "lon": 100.51},
+]
+
+
+def make_index():
+    return RestaurantSearchIndex(RESTAURANTS)
+
+
+def test_rating_and_price_phrases_become_filters():
+    filters = parse_query_filters("cheap highly rated noodles")
+    assert filters["min_rating"] == 4.5
+    assert filters["max_price_level"] == 1
+
+
+def test_explicit_rating_threshold():
+    assert parse_query_filters("places rated above 4.2")["min_rating"] == 4.2
+
+
+def test_upscale_and_popular_phrases():
+    filters = parse_query_filters("famous fine dining")
+    assert filters["min_price_level"] == 3
+    assert filters["min_reviews"] == 100
+
+
+def test_plain_query_has_no_filters():
+    assert parse_query_filters("seafood") == {}
+
+
+def test_time_phrases_become_opening_filters():
+    now = datetime(2026, 10, 19, 18, 30)  # a Monday
+    assert parse_query_filters("open now")["open_at"] is not None
+    assert parse_time_filters("open late", now=now) == {"open_after": (0, 22 * 60)}
+
+
+def test_categories_match_whole_names_only():
+    index = make_index()
+    assert index.match_categories("vegetarian food") == ["Vegetarian restaurant"]
+    assert index.match_categories("best-rated street food spots") == []
+    assert index.match_categories("fast food near me") == ["Fast food restaurant"]
+    assert index.match_categories("seafood") == ["Seafood restaurant"]
+
+
+def test_categories_are_not_hard_filters():
+    index = make_index()
+    assert "categories" not in index.query_filters("vegetarian food")
+    assert index.query_filters("vegetarian food", {"categories": ["Thai restaurant"]})["categories"] == ["Thai restaurant"]
+
+
+def test_named_category_ranks_first():
+    results = make_index().search("vegetarian food", k=3)
+    assert results[0][0]["name"] == "Green Leaf"
+
+
+def test_street_food_query_still_finds_results():
+    names = [r["name"] for r, _ in make_index().search("best-rated street food spots", k=5)]
+    assert "Soi 38 Noodles" in names
+    assert "Burger Hub" not in names  # rated below the best-rated threshold
+
+
+def test_filters_exclude_non_matching_restaurants():
+    names = [r["name"] for r, _ in make_index().search("upscale thai", k=5)]
+    assert names == ["Jay Fai"]
+
+
+def test_nearby_prefers_named_category_and_falls_back():
+    index = make_index()
+    nearest = index.nearby(13.74, 100.53, query="seafood", k=1)
+    assert nearest[0][0]["name"] == "Ocean Grill"
+    nearest = index.nearby(13.74, 100.53, query="pizza", k=1)
+    assert nearest[0][0]["name"] == "Burger Hub"
+
+
+def test_shard_stop_words_are_not_search_terms():
+    mask = np.ones(len(RESTAURANTS), dtype=bool)
+    assert make_index().bm25("bangkok", mask)
+    assert RestaurantSearchIndex(RESTAURANTS, stopwords=["Bangkok"]).bm25("bangkok", mask) == []
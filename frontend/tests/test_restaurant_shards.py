@@ -0,0 +1,49 @@
+import json
+import os
+from ai import restaurant_shards
+from ai.geo import resolve_place
+from ai.restaurant_shards import migrate_root_indexes, shard_profile
+
+
+def test_places_come_from_the_shard_profile():
+    places = shard_profile("thailand")["places"]
+    assert resolve_place("noodles near Silom", places=places) == ("Silom", 13.7246, 100.529)
+    assert resolve_place("noodles near Silom") is None
+    assert shard_profile("atlantis") == {}
+
+
+def test_root_indexes_move_into_the_shard(tmp_path, monkeypatch):
+    chroma_root, numpy_root = tmp_path / "restaurant_db", tmp_path / "restaurant_vectors"
+    monkeypatch.setattr(restaurant_shards, "RESTAURANT_DB_PATH", str(chroma_root))
+    monkeypatch.setattr(restaurant_shards, "NUMPY_INDEX_PATH", str(numpy_root))
+    segment = chroma_root / "0b8f5a52-3c1e-4d7a-9f4e-2a6c1d9e8b70"
+    segment.mkdir(parents=True)
+    (segment / "data_level0.bin").write_bytes(b"x")
+    (chroma_root / "chroma.sqlite3").write_bytes(b"x")
+    (chroma_root / "manifest.json").write_text(json.dumps({"version": 1}))
+    (chroma_root / "japan").mkdir()
+    numpy_root.mkdir()
+    (numpy_root / "index.json").write_text("{}")
+    (numpy_root / "vectors.i8").write_bytes(b"x")
+
+    migrate_root_indexes("thailand")
+
+    assert sorted(os.listdir(chroma_root)) == ["japan", "thailand"]
+    assert sorted(os.listdir(chroma_root / "thailand")) == [
+        "0b8f5a52-3c1e-4d7a-9f4e-2a6c1d9e8b70", "chroma.sqlite3", "manifest.json"]
+    assert sorted(os.listdir(numpy_root / "thailand")) == ["index.json", "vectors.i8"]
+
+
+def test_root_index_is_deleted_when_the_shard_has_its_own(tmp_path, monkeypatch):
+    numpy_root = tmp_path / "restaurant_vectors"
+    monkeypatch.setattr(restaurant_shards, "RESTAURANT_DB_PATH", str(tmp_path / "restaurant_db"))
+    monkeypatch.setattr(restaurant_shards, "NUMPY_INDEX_PATH", str(numpy_root))
+    (numpy_root / "thailand").mkdir(parents=True)
+    (numpy_root / "thailand" / "index.json").write_text('{"fingerprint": "new"}')
+    (numpy_root / "index.json").write_text('{"fingerprint": "old"}')
+    (numpy_root / "vectors.i8").write_bytes(b"x")
+
+    migrate_root_indexes("thailand")
+
+    assert os.listdir(numpy_root) == ["thailand"]
+    assert (numpy_root / "thailand" / "index.json").read_text() == '{"fingerprint": "new"}'
@@ -0,0 +1,29 @@
+from ai.router import NEARBY_TOOL, RESTAURANT_TOOL, SEARCH_TOOL, TRIP_TOOL, route_by_rules, route_question
+
+
+def test_food_question_uses_restaurant_data():
+    assert route_by_rules("What are the best seafood restaurants?").tool == RESTAURANT_TOOL
+
+
+def test_food_question_without_restaurant_data_goes_to_search():
+    route = route_by_rules("What are the best seafood restaurants?", has_restaurants=False)
+    assert route.tool == SEARCH_TOOL
+
+
+def test_nearby_question_without_restaurant_data_goes_to_search():
+    route = route_by_rules("Any good cafes near Wat Arun pier?", can_locate=lambda q: True, has_restaurants=False)
+    assert route.tool == SEARCH_TOOL
+
+
+def test_nearby_question_needs_a_known_place():
+    assert route_by_rules("Cafes near the old pier", can_locate=lambda q: True).tool == NEARBY_TOOL
+    assert route_by_rules("Cafes near the old pier", can_locate=lambda q: False) is None
+
+
+def test_trip_and_multi_step_questions():
+    assert route_by_rules("Tell me about H2").tool == TRIP_TOOL
+    assert route_by_rules("Plan a day-by-day itinerary for my trip").tool is None
+
+
+def test_unclear_question_without_router_model_goes_to_agent():
+    assert route_question("Hmm, what do you think?", has_restaurants=False).tool is None
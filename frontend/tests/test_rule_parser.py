@@ -0,0 +1,95 @@
+from datetime import date
+from ai.rule_parser import FAST_PATH_CONFIDENCE, parse_travel_request
+
+TODAY = date(2026, 10, 19)
+
+
+def parse(text):
+    return parse_travel_request(text, today=TODAY)
+
+
+def test_complete_request_takes_fast_path():
+    result = parse("Flying from LAX to Bangkok December 1st to December 8th for 2 people")
+    assert result["origin_airport_code"] == "LAX"
+    assert result["destination_airport_code"] == "BKK"
+    assert result["start_date"] == "December 1, 2026"
+    assert result["end_date"] == "December 8, 2026"
+    assert result["num_guests"] == 2
+    assert result["confidence"] >= FAST_PATH_CONFIDENCE
+
+
+def test_trailing_year_applies_to_whole_range():
+    result = parse("From LAX to Bangkok December 1st to December 8th, 2027")
+    assert result["start_date"] == "December 1, 2027"
+    assert result["end_date"] == "December 8, 2027"
+    assert result["confidence"] >= FAST_PATH_CONFIDENCE
+
+
+def test_trailing_year_crossing_new_year():
+    result = parse("From LAX to Bangkok Dec 28 to Jan 4, 2027")
+    assert result["start_date"] == "December 28, 2026"
+    assert result["end_date"] == "January 4, 2027"
+
+
+def test_past_trailing_year_is_not_trusted():
+    result = parse("From LAX to Bangkok December 1st to December 8th, 2024")
+    assert result["start_date"] == "December 1, 2024"
+    assert result["end_date"] == "December 8, 2024"
+    assert result["confidence"] < FAST_PATH_CONFIDENCE
+
+
+def test_year_less_range_rolls_into_next_year():
+    result = parse("From LAX to Bangkok Dec 28 to Jan 4")
+    assert result["start_date"] == "December 28, 2026"
+    assert result["end_date"] == "January 4, 2027"
+
+
+def test_explicit_end_before_start_is_not_trusted():
+    result = parse("From LAX to Bangkok December 8, 2027 to December 1, 2026")
+    assert result["confidence"] < FAST_PATH_CONFIDENCE
+
+
+def test_implausibly_long_span_is_not_trusted():
+    result = parse("From LAX to Bangkok December 1st to March 8th")
+    assert result["end_date"] == "March 8, 2027"
+    assert result["confidence"] < FAST_PATH_CONFIDENCE
+
+
+def test_duration_sets_end_date():
+    result = parse("From LAX to Tokyo on 2026-11-02 for a week")
+    assert result["start_date"] == "November 2, 2026"
+    assert result["end_date"] == "November 9, 2026"
+
+
+def test_missing_origin_falls_back_to_llm():
+    result = parse("I want to visit Bangkok sometime")
+    assert result["origin_airport_code"] is None
+    assert result["confidence"] < FAST_PATH_CONFIDENCE
+
+
+def test_where_the_traveler_lives_is_the_origin():
+    result = parse("I live in Seattle and want to go to Tokyo Dec 1 to Dec 8")
+    assert result["origin_airport_code"] == "SEA"
+    assert result["destination_airport_code"] == "NRT"
+
+
+def test_where_the_traveler_is_now_is_the_origin():
+    result = parse("I am in Bangkok, want to fly to Phuket Nov 3 to Nov 7")
+    assert result["origin_airport_code"] == "BKK"
+    assert result["destination_airport_code"] == "HKT"
+
+
+def test_conflicting_origins_are_not_trusted():
+    result = parse("I live in Seattle, flying from Chicago to Tokyo Dec 1 to Dec 8")
+    assert result["confidence"] < FAST_PATH_CONFIDENCE
+
+
+def test_travelers_by_kind_add_up():
+    result = parse("LAX to Bangkok Dec 1 to Dec 8 for 2 kids and 2 adults")
+    assert result["num_guests"] == 4
+    assert result["confidence"] >= FAST_PATH_CONFIDENCE
+
+
+def test_conflicting_traveler_counts_are_not_trusted():
+    result = parse("LAX to Bangkok Dec 1 to Dec 8, 3 people, maybe a group of 4")
+    assert result["confidence"] < FAST_PATH_CONFIDENCE
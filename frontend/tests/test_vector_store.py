@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from ai.vector_store import NumpyVectorStore
+
+
+class FixedEmbeddings:
+    """Maps each known text to a fixed vector"""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_query(self, text):
+        return self.vectors[text]
+
+
+def build(directory, quantization="float32", count=40, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(count, 8)).astype(np.float32)
+    ids = [f"r{i}" for i in range(count)]
+    documents = [f"doc {i}" for i in range(count)]
+    metadatas = [{"rating": float(i % 5), "category": "Thai restaurant" if i % 2 else "Cafe"} for i in range(count)]
+    NumpyVectorStore.build(directory, ids, documents, metadatas, vectors, quantization=quantization)
+    return vectors, documents
+
+
+@pytest.mark.parametrize("quantization", ["float32", "int8"])
+@pytest.mark.parametrize("ivf", [False, True])
+def test_nearest_neighbour_is_the_query_row(tmp_path, quantization, ivf):
+    directory = str(tmp_path / "index")
+    vectors, documents = build(directory, quantization)
+    store = NumpyVectorStore(directory, FixedEmbeddings({"q": vectors[7].tolist()}), ivf=ivf)
+    docs = store.similarity_search("q", k=3)
+    assert docs[0].page_content == documents[7]
+    assert docs[0].metadata["restaurant_id"] == "r7"
+
+
+def test_where_filter(tmp_path):
+    directory = str(tmp_path / "index")
+    vectors, _ = build(directory)
+    store = NumpyVectorStore(directory, FixedEmbeddings({"q": vectors[8].tolist()}))
+    where = {"$and": [{"rating": {"$gte": 3.0}}, {"category": {"$in": ["Thai restaurant"]}}]}
+    docs = store.similarity_search("q", k=5, filter=where)
+    assert docs
+    assert all(d.metadata["rating"] >= 3.0 and d.metadata["category"] == "Thai restaurant" for d in docs)
+
+
+def test_rebuild_replaces_index_despite_leftovers(tmp_path):
+    directory = str(tmp_path / "index")
+    build(directory, seed=0)
+    # Leftovers of an interrupted earlier build
+    (tmp_path / "index.old").mkdir()
+    (tmp_path / "index.old" / "vectors.f32").write_bytes(b"stale")
+    (tmp_path / "index.tmp").mkdir()
+    (tmp_path / "index.tmp" / "vectors.i8").write_bytes(b"stale")
+    vectors, documents = build(directory, count=10, seed=1)
+    store = NumpyVectorStore(directory, FixedEmbeddings({"q": vectors[3].tolist()}))
+    assert len(store) == 10
+    assert store.similarity_search("q", k=1)[0].page_content == documents[3]
+    assert not (tmp_path / "index.old").exists()
+    assert not (tmp_path / "index.tmp").exists()
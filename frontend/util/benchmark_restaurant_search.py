@@ -0,0 +1,64 @@
+import argparse
+import statistics
+import time
+from ai.restaurants import load_restaurants
+from ai.restaurant_search import RestaurantSearchIndex
+
+BENCHMARK_QUERIES = [
+    "highly rated cheap seafood",
+    "Find Thai restaurants with high ratings in Bangkok",
+    "What are the best seafood restaurants in Phuket?",
+    "Show me restaurants open late night in Chiang Mai",
+    "Find restaurants with outdoor seating in Thailand",
+    "What are the most popular local restaurants in Thailand?",
+    "Find Thai restaurants that serve vegetarian food",
+    "What are the best-rated street food spots?",
+    "Show me restaurants with traditional Thai cuisine",
+    "upscale fine dining rated above 4.5",
+]
+
+
+def time_queries(search, queries, repeats):
+    latencies = []
+    for _ in range(repeats):
+        for query in queries:
+            start = time.perf_counter()
+            search(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "max_ms": latencies[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hybrid restaurant search latency")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--with-vectors", action="store_true",
+                        help="Also benchmark the vector path (needs restaurant_db and the embedding server)")
+    args = parser.parse_args()
+
+    from ai.restaurant_shards import DEFAULT_RESTAURANT_SHARD, restaurant_shards, shard_data_path, shard_profile
+    restaurants = load_restaurants(shard_data_path(DEFAULT_RESTAURANT_SHARD))
+    if not restaurants:
+        return
+
+    index = RestaurantSearchIndex(restaurants, shard_profile(DEFAULT_RESTAURANT_SHARD).get("stopwords", ()))
+    print(f"Index build: {index.build_seconds:.2f}s for {len(index)} restaurants")
+    print(f"Opening hours known for {int(index.hours.known.sum())} restaurants "
+          f"({len(index.hours.starts)} weekly intervals)")
+    print("Open-at scan:", time_queries(lambda q: index.hours.open_at(4, 23 * 60), ["friday 23:00"], args.repeats * 20))
+    print("Lexical + filters:", time_queries(lambda q: index.search(q), BENCHMARK_QUERIES, args.repeats))
+
+    if args.with_vectors:
+        vector_store = restaurant_shards.get(DEFAULT_RESTAURANT_SHARD).vector_store
+        print("Vector only (similarity_search k=10):",
+              time_queries(lambda q: vector_store.similarity_search(q, k=10), BENCHMARK_QUERIES, args.repeats))
+        print("Hybrid:",
+              time_queries(lambda q: index.search(q, vector_store=vector_store), BENCHMARK_QUERIES, args.repeats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import json
+import subprocess
+import sys
+import time
+from util.benchmark_restaurant_search import BENCHMARK_QUERIES, time_queries
+
+try:
+    import resource
+except ImportError:
+    # Unix only; on Windows the comparison runs without max RSS
+    resource = None
+
+BACKENDS = ["chroma", "flat", "ivf"]
+
+
+def run_backend(backend, repeats, shard):
+    """Open one backend and time it; run in its own process so RSS is not shared"""
+    start = time.perf_counter()
+    from ai.research_assistant import ResearchAssistant
+    from ai.restaurant_index import open_restaurant_index
+    from ai.restaurant_shards import DEFAULT_RESTAURANT_SHARD, shard_data_path, shard_index_directory
+    imported = time.perf_counter()
+    shard = shard or DEFAULT_RESTAURANT_SHARD
+    vector_store = open_restaurant_index(ResearchAssistant.get_embeddings(), backend=backend,
+                                         data_path=shard_data_path(shard),
+                                         directory=shard_index_directory(shard, backend))
+    opened = time.perf_counter()
+    if vector_store is None:
+        return {"backend": backend, "error": "index unavailable"}
+
+    # Query embeddings come from the embedding cache after the first pass, so every
+    # backend is measured on search cost rather than on the embedding server
+    for query in BENCHMARK_QUERIES:
+        vector_store.similarity_search(query, k=10)
+    latency = time_queries(lambda q: vector_store.similarity_search(q, k=10), BENCHMARK_QUERIES, repeats)
+    filtered = time_queries(
+        lambda q: vector_store.similarity_search(q, k=10, filter={"rating": {"$gte": 4.5}}),
+        BENCHMARK_QUERIES, repeats,
+    )
+    max_rss_mb = None
+    if resource is not None:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in KB on Linux
+        max_rss_mb = max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+    return {
+        "backend": backend,
+        "import_s": imported - start,
+        "open_s": opened - imported,
+        "query": latency,
+        "filtered_query": filtered,
+        "max_rss_mb": max_rss_mb,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Chroma and NumPy vector backends")
+    parser.add_argument("--backend", choices=BACKENDS, help="Benchmark a single backend in this process")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--shard", help="Restaurant shard whose indexes to compare (default: DEFAULT_RESTAURANT_SHARD)")
+    args = parser.parse_args()
+
+    if args.backend:
+        print(json.dumps(run_backend(args.backend, args.repeats, args.shard)))
+        return
+
+    for backend in BACKENDS:
+        output = subprocess.run(
+            [sys.executable, "-m", "util.benchmark_vector_backends", "--backend", backend,
+             "--repeats", str(args.repeats)] + (["--shard", args.shard] if args.shard else []),
+            capture_output=True, text=True,
+        )
+        lines = output.stdout.strip().splitlines()
+        try:
+            result = json.loads(lines[-1])
+        except (IndexError, json.JSONDecodeError):
+            print(f"{backend}: failed\n{output.stderr[-2000:]}")
+            continue
+        if "error" in result:
+            print(f"{backend}: {result['error']}")
+            continue
+        print(f"{backend:>6}: import {result['import_s']:.2f}s, open {result['open_s'] * 1000:.0f}ms, "
+              f"query p50 {result['query']['p50_ms']:.1f}ms / p95 {result['query']['p95_ms']:.1f}ms, "
+              f"filtered p50 {result['filtered_query']['p50_ms']:.1f}ms"
+              + (f", max RSS {result['max_rss_mb']:.0f}MB" if result["max_rss_mb"] is not None else ""))
+
+
+if __name__ == "__main__":
+    main()
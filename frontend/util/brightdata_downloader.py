@@ -1,11 +1,23 @@
 import requests
 import time
+import gzip
+import hashlib
+import shutil
 from typing import Dict, Optional
 from dotenv import load_dotenv
 import os
+from util.tracing import span
+from ai.json_stream import gunzip_chunks
 
 load_dotenv()
 
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+DOWNLOAD_MAX_ATTEMPTS = 5
+DOWNLOAD_TIMEOUT = (10, 60)
+PROGRESS_INTERVAL_SECONDS = 5
+# Give up on a snapshot that is still not ready (HTTP 202) after this long
+SNAPSHOT_MAX_WAIT_SECONDS = 30 * 60
+
 class BrightDataDownloader:
     def __init__(self):
         self.base_url = "https://api.brightdata.com"
@@ -26,7 +38,8 @@ class BrightDataDownloader:
             payload["records_limit"] = records_limit
 
         try:
-            response = requests.post(url, json=payload, headers=self.headers)
+            with span("brightdata.filter_dataset", dataset_id=dataset_id):
+                response = requests.post(url, json=payload, headers=self.headers)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -37,26 +50,193 @@ class BrightDataDownloader:
         """Check the status of a specific snapshot"""
         url = f"{self.base_url}/datasets/snapshots/{snapshot_id}"
         try:
-            response = requests.request("GET", url, headers=self.headers)
+            with span("brightdata.get_snapshot_status", snapshot_id=snapshot_id):
+                response = requests.request("GET", url, headers=self.headers)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             print(f"Error checking snapshot status: {e}")
             raise
 
-    def download_snapshot(self, snapshot_id: str, output_file: str) -> None:
-        """Download the snapshot data and save to file"""
-        time.sleep(5)
+    def download_snapshot(self, snapshot_id: str, output_file: str, compress: bool = True,
+                          expected_sha256: Optional[str] = None, max_attempts: int = DOWNLOAD_MAX_ATTEMPTS,
+                          delay: int = 5, max_wait: int = SNAPSHOT_MAX_WAIT_SECONDS) -> Dict:
+        """Stream the snapshot to disk, resuming an interrupted download where it stopped.
+
+        The body goes to `<output_file>.<snapshot_id>.part` (gzip-compressed when
+        `compress` is set) in fixed-size chunks, so memory use does not grow with the
+        snapshot. A dropped connection retries with an HTTP Range request for the
+        remaining bytes, guarded by the ETag of the first response so a changed snapshot
+        restarts instead of being spliced. The finished file is checked against
+        `expected_sha256` (of the downloaded bytes) and the gzip CRC, then decompressed
+        into `output_file`. Waiting for a snapshot that is not ready gives up after
+        `max_wait` seconds.
+        """
         url = f"{self.base_url}/datasets/snapshots/{snapshot_id}/download"
-        try:
-            response = requests.request("GET", url, headers=self.headers)
+        params = {"format": "json"}
+        if compress:
+            params["compress"] = "true"
+        # Partial files are per snapshot, so a resume never mixes two snapshots' bytes
+        part_file = f"{output_file}.{snapshot_id}{'.gz' if compress else ''}.part"
+
+        start = time.perf_counter()
+        attempt = 0
+        with span("brightdata.download_snapshot", snapshot_id=snapshot_id, compress=compress):
+            while True:
+                try:
+                    total, resumed = self._download_to_part(url, params, part_file)
+                    if total is None:
+                        # The snapshot is still being built; the API answers 202 until it is ready
+                        _wait_until_ready(snapshot_id, start, delay, max_wait)
+                        continue
+                    break
+                except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                        requests.exceptions.Timeout) as e:
+                    attempt += 1
+                    if attempt >= max_attempts:
+                        print(f"Error downloading snapshot: {e}")
+                        raise
+                    wait = min(2 ** attempt, 60)
+                    print(f"Download interrupted ({e}); resuming in {wait} seconds "
+                          f"(attempt {attempt + 1}/{max_attempts})")
+                    time.sleep(wait)
+                except requests.exceptions.RequestException as e:
+                    print(f"Error downloading snapshot: {e}")
+                    raise
+
+            size = os.path.getsize(part_file)
+            if total and size != total:
+                raise IOError(f"Incomplete download: got {size} of {total} bytes")
+            checksum = file_sha256(part_file)
+            _remove(_etag_file(part_file))
+            if expected_sha256 and checksum != expected_sha256.lower():
+                os.remove(part_file)
+                raise IOError(f"Checksum mismatch for snapshot {snapshot_id}: expected {expected_sha256}, got {checksum}")
+
+            if compress:
+                # gzip checks its own CRC32 and length trailer while decompressing
+                with gzip.open(part_file, "rb") as src, open(output_file, "wb") as dst:
+                    shutil.copyfileobj(src, dst, DOWNLOAD_CHUNK_SIZE)
+                os.remove(part_file)
+            else:
+                os.replace(part_file, output_file)
+
+        seconds = time.perf_counter() - start
+        print(f"Data successfully saved to {output_file} ({size / 1e6:.1f} MB downloaded"
+              f"{f', {resumed / 1e6:.1f} MB resumed' if resumed else ''} in {seconds:.1f}s, sha256 {checksum[:12]})")
+        return {"output_file": output_file, "bytes": size, "resumed_bytes": resumed,
+                "sha256": checksum, "seconds": seconds}
+
+    def stream_snapshot(self, snapshot_id: str, compress: bool = True,
+                        max_attempts: int = DOWNLOAD_MAX_ATTEMPTS, delay: int = 5,
+                        max_wait: int = SNAPSHOT_MAX_WAIT_SECONDS):
+        """Yield the snapshot body as decompressed byte chunks while it downloads.
+
+        Nothing is written to disk. A dropped connection resumes with a Range request
+        from the last byte received, so consumers see one uninterrupted stream; the
+        resume is conditional on the first response's ETag, and fails if the snapshot
+        changed. Waiting for a snapshot that is not ready gives up after `max_wait` seconds.
+        """
+        url = f"{self.base_url}/datasets/snapshots/{snapshot_id}/download"
+        params = {"format": "json"}
+        if compress:
+            params["compress"] = "true"
+        received, total, attempt, etag = 0, None, 0, None
+        requested = time.perf_counter()
+
+        def body():
+            nonlocal received, total, attempt, etag
+            while True:
+                headers = dict(self.headers)
+                headers["Accept-Encoding"] = "identity"
+                if received:
+                    headers["Range"] = f"bytes={received}-"
+                    if etag:
+                        headers["If-Range"] = etag
+                try:
+                    with requests.get(url, params=params, headers=headers, stream=True,
+                                      timeout=DOWNLOAD_TIMEOUT) as response:
+                        if response.status_code == 202:
+                            _wait_until_ready(snapshot_id, requested, delay, max_wait)
+                            continue
+                        response.raise_for_status()
+                        if received and response.status_code != 206:
+                            raise IOError("Snapshot changed or the server does not support resuming this download")
+                        if total is None:
+                            length = response.headers.get("Content-Length")
+                            total = int(length) if length else None
+                            etag = response.headers.get("ETag")
+                        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                            received += len(chunk)
+                            yield chunk
+                    return
+                except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                        requests.exceptions.Timeout) as e:
+                    attempt += 1
+                    if attempt >= max_attempts:
+                        print(f"Error streaming snapshot: {e}")
+                        raise
+                    wait = min(2 ** attempt, 60)
+                    print(f"Stream interrupted at {received / 1e6:.1f} MB ({e}); resuming in {wait} seconds")
+                    time.sleep(wait)
+
+        start = last_report = time.perf_counter()
+        with span("brightdata.stream_snapshot", snapshot_id=snapshot_id, compress=compress):
+            for chunk in (gunzip_chunks(body()) if compress else body()):
+                yield chunk
+                now = time.perf_counter()
+                if now - last_report >= PROGRESS_INTERVAL_SECONDS:
+                    last_report = now
+                    progress = f" of {total / 1e6:.1f} MB ({received / total:.0%})" if total else ""
+                    print(f"Streamed {received / 1e6:.1f} MB{progress} at "
+                          f"{received / (now - start) / 1e6:.1f} MB/s")
+        print(f"Streamed snapshot {snapshot_id}: {received / 1e6:.1f} MB in {time.perf_counter() - start:.1f}s")
+
+    def _download_to_part(self, url: str, params: Dict, part_file: str):
+        """Append the rest of the body to `part_file`; returns (total bytes or None if not ready, resumed bytes)"""
+        resumed = os.path.getsize(part_file) if os.path.exists(part_file) else 0
+        headers = dict(self.headers)
+        # Byte ranges only make sense on the raw body, so ask for no transfer encoding
+        headers["Accept-Encoding"] = "identity"
+        if resumed:
+            headers["Range"] = f"bytes={resumed}-"
+            etag = _read_etag(part_file)
+            if etag:
+                # The server sends the whole body (200) instead if the snapshot changed
+                headers["If-Range"] = etag
+
+        with requests.get(url, params=params, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+            if response.status_code == 202:
+                return None, resumed
+            if response.status_code == 416 and resumed:
+                # The partial file already holds the whole body
+                return _total_from_content_range(response.headers.get("Content-Range")) or resumed, resumed
             response.raise_for_status()
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(response.text)
-            print(f"Data successfully saved to {output_file}")
-        except requests.exceptions.RequestException as e:
-            print(f"Error downloading snapshot: {e}")
-            raise
+
+            if resumed and response.status_code == 206:
+                total = _total_from_content_range(response.headers.get("Content-Range"))
+                mode = "ab"
+                print(f"Resuming download at {resumed / 1e6:.1f} MB")
+            else:
+                # A fresh download, a changed snapshot or a server ignoring Range: start over
+                length = response.headers.get("Content-Length")
+                total = int(length) if length else None
+                mode, resumed = "wb", 0
+                _write_etag(part_file, response.headers.get("ETag"))
+
+            done = resumed
+            started = last_report = time.perf_counter()
+            with open(part_file, mode) as f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                    done += len(chunk)
+                    now = time.perf_counter()
+                    if now - last_report >= PROGRESS_INTERVAL_SECONDS:
+                        last_report = now
+                        rate = (done - resumed) / (now - started) / 1e6
+                        progress = f" of {total / 1e6:.1f} MB ({done / total:.0%})" if total else ""
+                        print(f"Downloaded {done / 1e6:.1f} MB{progress} at {rate:.1f} MB/s")
+            return total or done, resumed
 
     def poll_and_download(self, dataset_id: str, filter_params: Dict, 
                          output_file: str, records_limit: Optional[int] = None, 
@@ -100,6 +280,56 @@ class BrightDataDownloader:
         print("Downloading snapshot data...")
         self.download_snapshot(snapshot_id, output_file)
 
+def _total_from_content_range(value: Optional[str]) -> Optional[int]:
+    # "bytes 100-199/1000" or "bytes */1000"
+    if not value or "/" not in value:
+        return None
+    total = value.rsplit("/", 1)[1].strip()
+    return int(total) if total.isdigit() else None
+
+
+def _wait_until_ready(snapshot_id: str, since: float, delay: int, max_wait: int) -> None:
+    waited = time.perf_counter() - since
+    if waited >= max_wait:
+        raise TimeoutError(f"Snapshot {snapshot_id} was not ready after {waited:.0f} seconds")
+    print(f"Snapshot {snapshot_id} is not ready yet, waiting {delay} seconds...")
+    time.sleep(delay)
+
+
+def _etag_file(part_file: str) -> str:
+    return f"{part_file}.etag"
+
+
+def _read_etag(part_file: str) -> Optional[str]:
+    try:
+        with open(_etag_file(part_file), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _write_etag(part_file: str, etag: Optional[str]) -> None:
+    if etag:
+        with open(_etag_file(part_file), "w", encoding="utf-8") as f:
+            f.write(etag)
+    else:
+        _remove(_etag_file(part_file))
+
+
+def _remove(path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 def main():
     # Example usage
     downloader = BrightDataDownloader()
@@ -0,0 +1,60 @@
+import argparse
+import sys
+import time
+from ai.json_stream import iter_json_file, iter_json_records
+from ai.restaurant_index import ingest_restaurant_records
+from ai.research_assistant import ResearchAssistant
+from ai.restaurant_shards import DEFAULT_RESTAURANT_SHARD, shard_data_path, shard_index_directory, shard_slug
+from util.brightdata_downloader import BrightDataDownloader
+
+try:
+    import resource
+except ImportError:
+    # Unix only; Windows runs skip the peak memory report
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where it cannot be read"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stream a restaurant dataset into the vector index while it downloads")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--snapshot-id", help="BrightData snapshot to stream")
+    source.add_argument("--file", help="Local JSON array or NDJSON file (.gz allowed)")
+    parser.add_argument("--shard", default=DEFAULT_RESTAURANT_SHARD,
+                        help="Country or region shard to build, e.g. 'japan' (default: %(default)s); "
+                             "--data-path and --db default to that shard's files")
+    parser.add_argument("--data-path", help="Save the records here as a JSON array, for the search index")
+    parser.add_argument("--db", help="Chroma persist directory")
+    parser.add_argument("--no-prune", action="store_true",
+                        help="Keep indexed restaurants that are missing from this dataset")
+    args = parser.parse_args()
+    # Shards are only found and loaded through their data file, so always write one
+    shard = shard_slug(args.shard)
+    args.data_path = args.data_path or shard_data_path(shard)
+    args.db = args.db or shard_index_directory(shard, "chroma")
+    print(f"Ingesting into shard '{shard}': index {args.db}, data {args.data_path}")
+
+    if args.snapshot_id:
+        records = iter_json_records(BrightDataDownloader().stream_snapshot(args.snapshot_id))
+    else:
+        records = iter_json_file(args.file)
+
+    start = time.perf_counter()
+    ingest_restaurant_records(ResearchAssistant.get_embeddings(), records, persist_directory=args.db,
+                              data_path=args.data_path, prune=not args.no_prune)
+    peak = peak_rss_mb()
+    print(f"Ingestion finished in {time.perf_counter() - start:.1f}s"
+          + (f", peak RSS {peak:.0f} MB" if peak is not None else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import argparse
+import re
+from ai.restaurants import load_restaurants, render_restaurant_document
+from ai.restaurant_render import render_restaurant_results
+from ai.restaurant_search import RestaurantSearchIndex
+from ai.restaurant_shards import DEFAULT_RESTAURANT_SHARD, shard_data_path, shard_now, shard_profile
+from ai.opening_hours import WEEKDAYS, parse_time_filters
+from ai.tokens import estimate_tokens
+from util.benchmark_restaurant_search import BENCHMARK_QUERIES
+
+# Fixed questions for the quality comparison, with the facts a good answer needs
+QUALITY_QUERIES = [
+    ("Show me restaurants open late night in Chiang Mai", ["name", "rating", "hours"]),
+    ("Which highly rated cheap seafood places should I try?", ["name", "rating", "price"]),
+    ("Find restaurants with outdoor seating in Thailand", ["name", "services"]),
+    ("What are the best seafood restaurants in Phuket and their phone numbers?", ["name", "rating", "contact"]),
+    ("Where can I get breakfast in Bangkok, and when do they open?", ["name", "hours", "address"]),
+    ("Find Thai restaurants that serve vegetarian food", ["name", "services"]),
+    ("How expensive are the best-rated street food spots?", ["name", "rating", "price"]),
+    ("Which upscale restaurants rated above 4.5 take reservations?", ["name", "rating", "services", "contact"]),
+]
+
+ANSWER_PROMPT = """Answer the traveler's question using only these restaurant search results.
+
+Question: {question}
+
+Results:
+{results}
+
+Answer:"""
+
+JUDGE_PROMPT = """Grade two answers to a traveler's restaurant question against the reference data.
+Score each from 1 (wrong or missing what was asked) to 5 (correct and complete for what was asked).
+Reply with two numbers only, e.g. "4 3".
+
+Question: {question}
+
+Reference data:
+{reference}
+
+Answer A:
+{answer_a}
+
+Answer B:
+{answer_b}
+
+Scores:"""
+
+
+def full_output(results):
+    # The Restaurant_Info format before compact rendering
+    response = "Here are the restaurants I found:\n\n"
+    for restaurant, _ in results:
+        response += f"{render_restaurant_document(restaurant).strip()}\n\n---\n\n"
+    return response.strip()
+
+
+def _flat(text):
+    return re.sub(r"\s+", " ", str(text)).strip().lower()
+
+
+def _fact(restaurant, fact, day):
+    """The text a rendering must contain for one requested fact, or None if the record lacks it"""
+    if fact == "name":
+        value = restaurant.get("name")
+    elif fact == "rating":
+        value = restaurant.get("rating")
+    elif fact == "price":
+        value = restaurant.get("price_range")
+    elif fact == "address":
+        value = str(restaurant.get("address") or "")[:20]
+    elif fact == "hours":
+        hours = restaurant.get("open_hours")
+        value = next((v for k, v in hours.items() if str(k).strip().lower()[:3] == WEEKDAYS[day][:3]), None) \
+            if isinstance(hours, dict) else None
+    elif fact == "services":
+        services = restaurant.get("services_provided")
+        value = services[0] if isinstance(services, (list, tuple)) and services else services
+    else:
+        value = restaurant.get("phone_number") or restaurant.get("open_website")
+    if value in (None, "", "N/A") or isinstance(value, (list, dict)):
+        return None
+    return _flat(value)
+
+
+def fact_coverage(text, results, facts, day):
+    """(found, known): how many of the requested facts the results have, and how many the text shows"""
+    text = _flat(text)
+    found = known = 0
+    for restaurant, _ in results:
+        for fact in facts:
+            value = _fact(restaurant, fact, day)
+            if value is None:
+                continue
+            known += 1
+            found += value in text
+    return found, known
+
+
+def compare_tokens(index, now):
+    total_full = total_compact = 0
+    print(f"{'query':<60} {'full':>6} {'compact':>8}")
+    for query in BENCHMARK_QUERIES:
+        results = index.search(query, k=10, now=now)
+        full = estimate_tokens(full_output(results))
+        compact = estimate_tokens(render_restaurant_results([(r, None) for r, _ in results], query, now=now))
+        total_full += full
+        total_compact += compact
+        print(f"{query[:60]:<60} {full:>6} {compact:>8}")
+    saved = 1 - total_compact / total_full if total_full else 0.0
+    print(f"{'total':<60} {total_full:>6} {total_compact:>8}  ({saved:.0%} fewer tokens)")
+
+
+def compare_quality(index, now, judge=False):
+    """Facts each rendering keeps for the questions in QUALITY_QUERIES, and optionally LLM-graded answers"""
+    if judge:
+        from ai.models import model
+        from ai.streaming import chunk_text
+
+    totals = {"full": [0, 0], "compact": [0, 0]}
+    scores = {"full": [], "compact": []}
+    print(f"\n{'question':<60} {'full':>9} {'compact':>9}")
+    for question, facts in QUALITY_QUERIES:
+        results = index.search(question, k=10, now=now)
+        time_filter = parse_time_filters(question, now)
+        day = (time_filter.get("open_at") or time_filter.get("open_after") or (now.weekday(),))[0]
+        renderings = {
+            "full": full_output(results),
+            "compact": render_restaurant_results([(r, None) for r, _ in results], question, now=now),
+        }
+        row = []
+        for name, text in renderings.items():
+            found, known = fact_coverage(text, results, facts, day)
+            totals[name][0] += found
+            totals[name][1] += known
+            row.append(f"{found}/{known}")
+        print(f"{question[:60]:<60} {row[0]:>9} {row[1]:>9}")
+
+        if judge and results:
+            answers = {name: chunk_text(model.invoke(ANSWER_PROMPT.format(question=question, results=text)))
+                       for name, text in renderings.items()}
+            reply = chunk_text(model.invoke(JUDGE_PROMPT.format(
+                question=question, reference=renderings["full"],
+                answer_a=answers["full"], answer_b=answers["compact"])))
+            grades = re.findall(r"[1-5]", reply)
+            if len(grades) >= 2:
+                scores["full"].append(int(grades[0]))
+                scores["compact"].append(int(grades[1]))
+
+    coverage = {name: found / known if known else 1.0 for name, (found, known) in totals.items()}
+    print(f"{'facts shown':<60} {coverage['full']:>9.0%} {coverage['compact']:>9.0%}")
+    if judge and scores["full"]:
+        average = {name: sum(values) / len(values) for name, values in scores.items()}
+        print(f"{'LLM-graded answer quality (1-5)':<60} {average['full']:>9.2f} {average['compact']:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the old full and the compact restaurant result rendering: tokens and answer quality")
+    parser.add_argument("--judge", action="store_true",
+                        help="Also answer each quality question from both renderings and grade the answers "
+                             "with the LLM (needs ANTHROPIC_API_KEY)")
+    args = parser.parse_args()
+
+    restaurants = load_restaurants(shard_data_path(DEFAULT_RESTAURANT_SHARD))
+    if not restaurants:
+        return
+
+    index = RestaurantSearchIndex(restaurants, shard_profile(DEFAULT_RESTAURANT_SHARD).get("stopwords", ()))
+    now = shard_now(DEFAULT_RESTAURANT_SHARD)
+    compare_tokens(index, now)
+    compare_quality(index, now, judge=args.judge)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Process-wide registry of expensive, session-independent objects."""
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+HTTP_POOL_SIZE = 20
+
+_resources = {}
+_locks = {}
+_registry_lock = threading.Lock()
+
+
+def shared(name, factory):
+    """Return the process-wide instance called `name`, creating it with `factory` once.
+
+    Streamlit reruns the app script for every interaction and every session, but
+    imported modules are cached, so objects kept here are built once per process and
+    reused by all sessions. Only register objects that hold no per-session state.
+    """
+    if name in _resources:
+        return _resources[name]
+    with _registry_lock:
+        lock = _locks.setdefault(name, threading.Lock())
+    # A per-name lock keeps one slow factory from blocking unrelated lookups
+    with lock:
+        if name not in _resources:
+            _resources[name] = factory()
+        return _resources[name]
+
+
+def _create_http_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def http_session():
+    """Keep-alive HTTP session with a connection pool, shared by all backend calls"""
+    return shared("http_session", _create_http_session)
+
+
+def web_search_tool():
+    """Shared DuckDuckGo search tool for the research assistants"""
+    from langchain_community.tools import DuckDuckGoSearchRun
+    return shared("web_search_tool", DuckDuckGoSearchRun)
+
+
+def web_search():
+    """Shared cached web search, so repeated queries from any session reuse results"""
+    from ai.web_search import CachedWebSearch
+    return shared("web_search", lambda: CachedWebSearch(web_search_tool().run))
@@ -0,0 +1,165 @@
+"""Request tracing: spans exported as JSONL and correlated across services by trace ID.
+
+The frontend and backend run as separate apps, each from its own directory with its
+own top-level `util` package, so there is no shared package to import this from and
+each app carries a copy. Keep the span code identical in both; the service recorded
+on spans is TRACE_SERVICE, defaulting to the app's directory name.
+
+Run as a script to render a trace waterfall from the exported files.
+"""
+import argparse
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TRACE_HEADER = "X-Trace-Id"
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "traces.jsonl")
+TRACE_SERVICE = os.getenv("TRACE_SERVICE") or os.path.basename(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+_span_id = contextvars.ContextVar("span_id", default=None)
+_export_lock = threading.Lock()
+
+
+def new_trace_id():
+    """Generate a new trace ID"""
+    return uuid.uuid4().hex
+
+
+def set_trace_id(trace_id):
+    """Bind a trace ID to the current thread/task context"""
+    _trace_id.set(trace_id)
+    _span_id.set(None)
+    return trace_id
+
+
+def get_trace_id():
+    """Return the trace ID of the current context, if any"""
+    return _trace_id.get()
+
+
+def export_span(record, path=None):
+    """Append a finished span to the local JSONL exporter"""
+    line = json.dumps(record, default=str)
+    with _export_lock:
+        with open(path or TRACE_EXPORT_PATH, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+
+
+@contextmanager
+def span(name, **attributes):
+    """Record a span around a block of work in the current trace"""
+    trace_id = _trace_id.get()
+    if trace_id is None:
+        yield None
+        return
+
+    span_id = uuid.uuid4().hex[:16]
+    parent_id = _span_id.get()
+    token = _span_id.set(span_id)
+    record = {
+        "trace_id": trace_id,
+        "span_id": span_id,
+        "parent_id": parent_id,
+        "name": name,
+        "service": TRACE_SERVICE,
+        "attributes": attributes,
+        "start": time.time(),
+        "status": "ok",
+    }
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record["status"] = "error"
+        record["error"] = str(e)
+        raise
+    finally:
+        record["duration_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        _span_id.reset(token)
+        try:
+            export_span(record)
+        except OSError as e:
+            print(f"Error exporting span: {e}")
+
+
+def load_spans(paths, trace_id=None):
+    """Load spans from one or more JSONL files, optionally filtered by trace ID"""
+    spans = []
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"Trace file not found: {path}")
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if trace_id is None or record.get("trace_id") == trace_id:
+                    spans.append(record)
+    return spans
+
+
+def render_waterfall(spans, width=60):
+    """Render spans of a single trace as a text waterfall"""
+    if not spans:
+        return "No spans found."
+
+    trace_start = min(s["start"] for s in spans)
+    trace_end = max(s["start"] + s["duration_ms"] / 1000 for s in spans)
+    total = max(trace_end - trace_start, 1e-6)
+
+    children = {}
+    ids = {s["span_id"] for s in spans}
+    for s in spans:
+        parent = s.get("parent_id") if s.get("parent_id") in ids else None
+        children.setdefault(parent, []).append(s)
+    for group in children.values():
+        group.sort(key=lambda s: s["start"])
+
+    lines = [f"Trace {spans[0]['trace_id']} ({total * 1000:.0f} ms)"]
+
+    def walk(parent, depth):
+        for s in children.get(parent, []):
+            offset = int((s["start"] - trace_start) / total * width)
+            length = max(1, int(s["duration_ms"] / 1000 / total * width))
+            bar = " " * offset + "█" * min(length, width - offset)
+            label = f"{'  ' * depth}{s.get('service', '?')}:{s['name']}"
+            status = "" if s.get("status") == "ok" else f" [{s.get('status')}]"
+            lines.append(f"{label[:40]:<40} |{bar:<{width}}| {s['duration_ms']:>9.1f} ms{status}")
+            walk(s["span_id"], depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a per-request trace waterfall")
+    parser.add_argument("trace_id", nargs="?", help="Trace ID to render (defaults to the most recent)")
+    parser.add_argument("--files", nargs="+", default=[TRACE_EXPORT_PATH],
+                        help="JSONL trace files to read (e.g. frontend and backend exports)")
+    args = parser.parse_args()
+
+    spans = load_spans(args.files)
+    if not spans:
+        print("No spans found.")
+        return
+
+    trace_id = args.trace_id or max(spans, key=lambda s: s["start"])["trace_id"]
+    print(render_waterfall([s for s in spans if s["trace_id"] == trace_id]))
+
+
+if __name__ == "__main__":
+    main()